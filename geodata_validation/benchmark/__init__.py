@@ -0,0 +1 @@
+"""Synthetic layers and benchmarks of the validation checks, not part of the deployed plugin."""
@@ -0,0 +1,178 @@
+"""Benchmarks every check headless on synthetic layers, e.g.
+
+    python -m geodata_validation.benchmark run --sizes 1000 100000 -o benchmark.json
+    python -m geodata_validation.benchmark compare geodata_validation/benchmark/baseline.json benchmark.json
+    python -m geodata_validation.benchmark run --extra-fields 200 -o wide.json
+
+Every check runs in a process of its own, started with QGIS offscreen, so the peak RSS
+increase is the one of that check only. The fastest of ``repeat`` runs is kept.
+compare exits with 1 if a check got slower or needs more memory than the threshold allows
+and with 2 if there is no baseline or none of the runs is in it. No baseline is shipped,
+it is recorded on the reference machine with ``make benchmark-baseline`` and committed.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+
+SIZES = (1000, 10000, 100000)
+
+# shares of the planted defects, small enough that the checks mostly see valid data as in the wild
+DEFECTS = {"holes": 0.01, "gaps": 0.01, "overlaps": 0.01, "duplicates": 0.01,
+           "out_of_bounds": 0.001, "invalid": 0.01, "empty": 0.001}
+NULLS = 0.05
+
+# a check is a regression if it needs this much more time or memory than in the baseline
+THRESHOLD = 0.25
+# memory increases below this are noise of the allocator
+MIN_RSS = 16 * 2**20
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _init_worker(prefix_path: str|None):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from .. import cli
+        cli._init_worker(prefix_path)
+
+
+def _in_process(prefix_path: str|None, func, *args):
+        # a fresh process for every run, the peak RSS of a process never goes down again
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(prefix_path,)) as pool:
+            return pool.submit(func, *args).result()
+
+
+def _generate(path: str, count: int, seed: int, vertices: int, extra_fields: int) -> dict[str, int]:
+        from .synthetic import generate
+        return generate(path, count, seed, vertices, extra_fields, NULLS, **DEFECTS)
+
+
+def _run_check(path: str, check: str, repeat: int) -> dict:
+        from qgis.core import Qgis, QgsVectorLayer
+        from ..funcs import scheduler, profiling
+
+        layer = QgsVectorLayer(path, os.path.basename(path), "ogr")
+        if not layer.isValid():
+            raise IOError(f"Can't open {path}")
+
+        rss = profiling.peak_rss()
+        best = None
+        for _ in range(repeat):
+            profiler = profiling.Profiler()
+            started, cpu = time.perf_counter(), time.process_time()
+            scheduler.run_checks(layer, [check], report=lambda info: None, max_workers=1, profiler=profiler)
+            (wall, cpu) = (time.perf_counter() - started, time.process_time() - cpu)
+            if best is None or wall < best["wall"]:
+                best = {"wall": wall, "cpu": cpu, "provider": sum(p.provider for p in profiler.profiles.values())}
+
+        features = layer.featureCount()
+        best.update({"check": check, "features": features, "features_per_second": features / best["wall"] if best["wall"] else 0,
+                     "peak_rss_increase": None if rss is None else profiling.peak_rss() - rss, "qgis": Qgis.version()})
+        return best
+
+
+def run(sizes, checks, data_dir: str, repeat: int=3, seed: int=0, vertices: int=1, extra_fields: int=0,
+        prefix_path: str|None=None, report=print) -> dict:
+        os.makedirs(data_dir, exist_ok=True)
+        out = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                        "machine": platform.machine(), "cpus": os.cpu_count(), "repeat": repeat, "seed": seed,
+                        "vertices": vertices, "extra_fields": extra_fields, "defects": DEFECTS, "nulls": NULLS},
+               "runs": {}}
+
+        for count in sizes:
+            # synthetic layers are deterministic, once generated they are reused
+            path = os.path.join(data_dir, f"synthetic_{count}_{seed}_{vertices}_{extra_fields}.gpkg")
+            if not os.path.exists(path):
+                report(f"generating {count} features to {path}")
+                planted = _in_process(prefix_path, _generate, path, count, seed, vertices, extra_fields)
+                report(", ".join(f"{name}: {n}" for name, n in planted.items()))
+
+            for check in checks:
+                key = f"{check}@{count}"
+                result = _in_process(prefix_path, _run_check, path, check, repeat)
+                out["runs"][key] = result
+                rss = result["peak_rss_increase"]
+                report(f"{key}: {result['wall']:.3f} s (provider {result['provider']:.3f} s), "
+                       f"{result['features_per_second']:.0f} features/s"
+                       + (f", peak RSS +{rss / 2**20:.1f} MB" if rss is not None else ""))
+
+        return out
+
+
+def compare(baseline: dict, current: dict, threshold: float=THRESHOLD) -> list[str]:
+        """Returns the runs that got slower or need more memory than ``threshold`` allows,
+        runs missing in the baseline are not compared."""
+        regressions = []
+        for key, now in sorted(current["runs"].items()):
+            before = baseline.get("runs", {}).get(key)
+            if before is None:
+                continue
+            if now["wall"] > before["wall"] * (1 + threshold):
+                regressions.append(f"{key}: wall {before['wall']:.3f} s -> {now['wall']:.3f} s "
+                                   f"({now['wall'] / before['wall'] - 1:+.0%})")
+            (rss_before, rss_now) = (before.get("peak_rss_increase"), now.get("peak_rss_increase"))
+            if rss_before is not None and rss_now is not None and rss_now > max(rss_before, MIN_RSS) * (1 + threshold):
+                regressions.append(f"{key}: peak RSS +{rss_before / 2**20:.1f} MB -> +{rss_now / 2**20:.1f} MB")
+        return regressions
+
+
+def main(argv: list[str]|None=None) -> int:
+        parser = argparse.ArgumentParser(description="Benchmark the validation checks on synthetic layers.")
+        commands = parser.add_subparsers(dest="command", required=True)
+
+        run_parser = commands.add_parser("run", help="run the benchmarks and write the timings to a JSON file")
+        run_parser.add_argument("-o", "--output", required=True, help="JSON file for the timings")
+        run_parser.add_argument("-s", "--sizes", nargs="+", type=int, default=SIZES, help="feature counts of the layers")
+        run_parser.add_argument("-c", "--checks", nargs="+", default=None, help="checks to run, default all")
+        run_parser.add_argument("-d", "--data-dir", default=os.path.join(os.getcwd(), "benchmark_data"),
+                                help="directory for the synthetic layers, they are reused between runs")
+        run_parser.add_argument("-r", "--repeat", type=int, default=3, help="runs per check, the fastest is kept")
+        run_parser.add_argument("--seed", type=int, default=0)
+        run_parser.add_argument("--vertices", type=int, default=1, help="vertices per side of every cell")
+        run_parser.add_argument("--extra-fields", type=int, default=0, help="additional numeric columns")
+        run_parser.add_argument("--prefix-path", default=os.environ.get("QGIS_PREFIX_PATH"), help="QGIS install prefix")
+
+        compare_parser = commands.add_parser("compare", help="compare timings with a baseline")
+        compare_parser.add_argument("baseline", nargs="?", default=BASELINE)
+        compare_parser.add_argument("current")
+        compare_parser.add_argument("-t", "--threshold", type=float, default=THRESHOLD,
+                                    help="allowed relative increase of time and memory")
+        args = parser.parse_args(argv)
+
+        if args.command == "run":
+            from ..funcs import scheduler
+            checks = args.checks or list(scheduler.CHECKS)
+            out = run(args.sizes, checks, args.data_dir, args.repeat, args.seed, args.vertices, args.extra_fields,
+                      args.prefix_path)
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(out, f, indent=2)
+            return 0
+
+        if not os.path.exists(args.baseline):
+            # no gate without a baseline recorded on the reference machine
+            print(f"no baseline at {args.baseline}, record it on the reference machine with 'make benchmark-baseline'")
+            return 2
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for line in regressions:
+            print(line)
+        compared = len(set(current["runs"]) & set(baseline.get("runs", {})))
+        print(f"compared {compared} of {len(current['runs'])} runs with the baseline: {len(regressions)} regressions")
+        if current["runs"] and not compared:
+            # nothing compared is no pass, the baseline has to be recorded on the reference machine first
+            print(f"no run is in the baseline {args.baseline}, record it with 'make benchmark-baseline'")
+            return 2
+        return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Measures what loading the plugin costs QGIS, e.g.
+
+    python -m geodata_validation.benchmark.load_time --repeat 5
+
+Every step of loading the plugin (classFactory, initGui and opening the dialog the
+first time) is timed in a fresh process with QGIS offscreen. The increase of the
+resident memory and the modules a step imported are reported too, with
+--trace-memory also the peak of Python allocations (tracemalloc slows the steps
+down). Nothing of the plugin but its package __init__ is imported before classFactory.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+
+# modules that are expensive to import and should not be loaded by classFactory or initGui
+HEAVY_MODULES = ("numpy", "pyarrow", "processing", "sqlite3")
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+
+def _rss() -> int|None:
+        # current resident memory in bytes, only where /proc is available
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+
+def _step(name: str, func, trace_memory: bool) -> tuple[dict, object]:
+        modules = set(sys.modules)
+        rss = _rss()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            (_, peak) = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        after = _rss()
+
+        imported = sorted(set(sys.modules) - modules)
+        return ({"step": name, "seconds": seconds, "python_peak": peak,
+                 "rss_increase": None if rss is None or after is None else after - rss,
+                 "modules": len(imported), "own_modules": [m for m in imported if m.startswith(PACKAGE)],
+                 "heavy_modules": [m for m in imported if m in HEAVY_MODULES]},
+                value)
+
+
+def _measure(prefix_path: str|None, open_dialog: bool, trace_memory: bool) -> list[dict]:
+        import importlib
+        from qgis.core import QgsApplication
+        from qgis.gui import QgsMapCanvas
+        from qgis.PyQt.QtWidgets import QWidget
+
+        if prefix_path:
+            QgsApplication.setPrefixPath(prefix_path, True)
+        app = QgsApplication([], True)
+        app.initQgis()
+        from ..test.qgis_interface import QgisInterface
+        parent = QWidget()
+        iface = QgisInterface(QgsMapCanvas(parent))
+
+        package = importlib.import_module(PACKAGE)
+        steps = []
+        (step, plugin) = _step("classFactory", lambda: package.classFactory(iface), trace_memory)
+        steps.append(step)
+        (step, _) = _step("initGui", plugin.initGui, trace_memory)
+        steps.append(step)
+        if open_dialog:
+            (step, _) = _step("first run", plugin.run, trace_memory)
+            steps.append(step)
+            plugin.dlg.close()
+        plugin.unload()
+        return steps
+
+
+def measure(repeat: int=5, prefix_path: str|None=None, open_dialog: bool=True, trace_memory: bool=False) -> dict:
+        # the plugin can only be loaded once per process, every repetition gets a process of its own
+        context = multiprocessing.get_context("spawn")
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                runs.append(pool.submit(_measure, prefix_path, open_dialog, trace_memory).result())
+
+        out = {}
+        for i, step in enumerate(runs[0]):
+            seconds = [run[i]["seconds"] for run in runs]
+            out[step["step"]] = {**step, "seconds": statistics.median(seconds), "min_seconds": min(seconds),
+                                 "max_seconds": max(seconds)}
+        return out
+
+
+def main(argv: list[str]|None=None) -> int:
+        parser = argparse.ArgumentParser(description="Measure the time and memory loading the plugin costs QGIS.")
+        parser.add_argument("-r", "--repeat", type=int, default=5, help="processes to measure, the median time is reported")
+        parser.add_argument("-o", "--output", default=None, help="JSON file for the measurements")
+        parser.add_argument("--no-dialog", action="store_true", help="don't measure opening the dialog the first time")
+        parser.add_argument("--trace-memory", action="store_true", help="also trace the peak of Python allocations")
+        parser.add_argument("--prefix-path", default=os.environ.get("QGIS_PREFIX_PATH"), help="QGIS install prefix")
+        args = parser.parse_args(argv)
+
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        steps = measure(args.repeat, args.prefix_path, not args.no_dialog, args.trace_memory)
+        for name, step in steps.items():
+            (rss, peak) = (step["rss_increase"], step["python_peak"])
+            print(f"{name}: {step['seconds'] * 1000:.1f} ms (min {step['min_seconds'] * 1000:.1f} ms)"
+                  + (f", python memory {peak / 2**20:.1f} MB" if peak is not None else "")
+                  + (f", RSS +{rss / 2**20:.1f} MB" if rss is not None else "")
+                  + f", {step['modules']} modules imported, {len(step['own_modules'])} of the plugin")
+            if step["heavy_modules"]:
+                print(f"    heavy imports: {', '.join(step['heavy_modules'])}")
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(steps, f, indent=2)
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+from qgis.core import QgsVectorFileWriter, QgsCoordinateReferenceSystem, QgsCoordinateTransformContext
+from qgis.core import QgsFields, QgsField, QgsFeature, QgsGeometry, QgsPolygon, QgsLineString, QgsWkbTypes
+from qgis.PyQt.QtCore import QVariant
+
+import math
+import random
+
+
+# geometry defects are planted one per feature, at most, NULLs on top of them
+DEFECTS = ("holes", "gaps", "overlaps", "duplicates", "out_of_bounds", "invalid", "empty")
+
+# cells of 100 m in UTM zone 32N, far enough from the bounds of the crs for out of bounds shifts
+CRS = "EPSG:25832"
+ORIGIN = (400000.0, 5400000.0)
+CELL = 100.0
+OUT_OF_BOUNDS_SHIFT = 1.0e8
+
+
+def _square(x0: float, y0: float, x1: float, y1: float, per_side: int) -> tuple[list[float], list[float]]:
+        # closed ring with per_side vertices on every side, the vertex density of the feature
+        xs, ys = [], []
+        for (ax, ay, bx, by) in ((x0, y0, x1, y0), (x1, y0, x1, y1), (x1, y1, x0, y1), (x0, y1, x0, y0)):
+            for k in range(per_side):
+                xs.append(ax + (bx - ax) * k / per_side)
+                ys.append(ay + (by - ay) * k / per_side)
+        xs.append(x0)
+        ys.append(y0)
+        return (xs, ys)
+
+
+def _bowtie(x0: float, y0: float, x1: float, y1: float) -> tuple[list[float], list[float]]:
+        # self intersecting ring, the invalid geometry
+        return ([x0, x1, x1, x0, x0], [y0, y1, y0, y1, y0])
+
+
+def features(count: int, seed: int=0, vertices: int=1, extra_fields: int=0, nulls: float=0.0, **ratios):
+        """Yields (rings, attributes, defects) for ``count`` features in a grid of square cells.
+
+        ``ratios`` gives the share of features with one of the DEFECTS, ``nulls`` the share
+        with NULL attributes and ``vertices`` the number of vertices per side of a cell.
+        The same arguments always give the same features. ``rings`` is a list of (xs, ys)
+        with the exterior ring first, empty for empty geometries.
+        """
+        unknown = set(ratios) - set(DEFECTS)
+        if unknown:
+            raise ValueError(f"Unknown defects {', '.join(sorted(unknown))}, use some of {', '.join(DEFECTS)}")
+        if sum(ratios.values()) > 1:
+            raise ValueError("The ratios of the geometry defects add up to more than 1")
+
+        rng = random.Random(seed)
+        columns = max(math.ceil(math.sqrt(count)), 1)
+        previous = None
+
+        for i in range(count):
+            (col, row) = (i % columns, i // columns)
+            x0, y0 = ORIGIN[0] + col * CELL, ORIGIN[1] + row * CELL
+            x1, y1 = x0 + CELL, y0 + CELL
+
+            attributes = [i, f"feature {i}", rng.uniform(0, 1000), rng.choice("abcde")]
+            attributes += [rng.random() for _ in range(extra_fields)]
+
+            # one draw decides the geometry defect, so the shares of the defects add up
+            draw = rng.random()
+            defect = None
+            for name in DEFECTS:
+                draw -= ratios.get(name, 0.0)
+                if draw < 0:
+                    defect = name
+                    break
+
+            if defect == "duplicates" and previous is not None:
+                # a copy of the previous feature, only the fid the file gives it differs
+                rings = previous[0]
+                attributes = list(previous[1])
+            elif defect == "empty":
+                rings = []
+            elif defect == "invalid":
+                rings = [_bowtie(x0, y0, x1, y1)]
+            else:
+                if defect == "gaps":
+                    # shrunk cells leave a gap to all of their neighbours
+                    (x0, y0, x1, y1) = (x0 + CELL * 0.05, y0 + CELL * 0.05, x1 - CELL * 0.05, y1 - CELL * 0.05)
+                elif defect == "overlaps":
+                    x1 += CELL * 0.1
+                elif defect == "out_of_bounds":
+                    (x0, x1) = (x0 + OUT_OF_BOUNDS_SHIFT, x1 + OUT_OF_BOUNDS_SHIFT)
+                rings = [_square(x0, y0, x1, y1, vertices)]
+                if defect == "holes":
+                    (cx, cy, r) = ((x0 + x1) / 2, (y0 + y1) / 2, CELL * 0.1)
+                    rings.append(_square(cx - r, cy - r, cx + r, cy + r, vertices))
+            if defect == "duplicates" and previous is None:
+                defect = None
+
+            defects = [defect] if defect else []
+            if nulls and rng.random() < nulls:
+                attributes = [attributes[0]] + [None] * (len(attributes) - 1)
+                defects.append("nulls")
+
+            previous = (rings, attributes)
+            yield (rings, attributes, defects)
+
+
+def fields(extra_fields: int=0) -> QgsFields:
+        out = QgsFields()
+        for (name, kind) in (("id", QVariant.LongLong), ("name", QVariant.String),
+                             ("value", QVariant.Double), ("category", QVariant.String)):
+            out.append(QgsField(name, kind))
+        for i in range(extra_fields):
+            out.append(QgsField(f"attr_{i}", QVariant.Double))
+        return out
+
+
+def _geometry(rings: list) -> QgsGeometry:
+        if not rings:
+            return QgsGeometry()
+        polygon = QgsPolygon()
+        polygon.setExteriorRing(QgsLineString(*rings[0]))
+        for ring in rings[1:]:
+            polygon.addInteriorRing(QgsLineString(*ring))
+        return QgsGeometry(polygon)
+
+
+def generate(path: str, count: int, seed: int=0, vertices: int=1, extra_fields: int=0, nulls: float=0.0,
+             layer_name: str="synthetic", batch_size: int=10000, **ratios) -> dict[str, int]:
+        """Writes a synthetic polygon layer to a GeoPackage and returns the number of planted defects.
+
+        Features are generated and written ``batch_size`` at a time, so layers of millions
+        of features don't have to fit into memory.
+        """
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.layerName = layer_name
+        layer_fields = fields(extra_fields)
+        writer = QgsVectorFileWriter.create(path, layer_fields, QgsWkbTypes.Polygon, QgsCoordinateReferenceSystem(CRS),
+                                            QgsCoordinateTransformContext(), options)
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            raise IOError(f"Can't write {path}: {writer.errorMessage()}")
+
+        planted = {name: 0 for name in DEFECTS + ("nulls",)}
+        batch = []
+        for (rings, attributes, defects) in features(count, seed, vertices, extra_fields, nulls, **ratios):
+            feat = QgsFeature(layer_fields)
+            feat.setGeometry(_geometry(rings))
+            feat.setAttributes(attributes)
+            batch.append(feat)
+            for defect in defects:
+                planted[defect] += 1
+            if len(batch) >= batch_size:
+                writer.addFeatures(batch)
+                batch = []
+        if batch:
+            writer.addFeatures(batch)
+        # the file writer only flushes and closes when it is deleted
+        del writer
+        return planted
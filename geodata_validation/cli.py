@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Headless batch validation
+                                 A QGIS plugin
+ Vaildate geodata in repect to geometry, coordinate reference system and data structure
+                              -------------------
+        begin                : 2025-02-16
+        copyright            : (C) 2025 by Jo Ritter
+        email                : tempmail@mail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+ Validates whole directory trees without the QGIS GUI, e.g.
+
+    python -m geodata_validation.cli /data/nightly -o /data/reports -j 16
+
+ Every vector file (and every layer of multi layer GeoPackages) is validated in a
+ process pool. One JSON result file is written per input next to a summary.json.
+ With --cache unchanged files are skipped and changed layers are only checked again
+ for the features that changed since the last run. --profile writes the timings of
+ every check to a .profile.json sidecar of the result file.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+
+VECTOR_EXTENSIONS = (".shp", ".gpkg", ".sqlite", ".geojson", ".fgb", ".gml", ".kml", ".tab")
+
+# QgsApplication of the worker process, created once by the pool initializer
+QGIS_APP = None
+
+
+def discover(paths: list[str], exclude: str|None=None) -> list[str]:
+        exclude = os.path.abspath(exclude) if exclude else None
+        files = []
+        for path in paths:
+            if os.path.isfile(path):
+                files.append(os.path.abspath(path))
+                continue
+            for root, dirs, names in os.walk(path):
+                if exclude and os.path.commonpath([os.path.abspath(root), exclude]) == exclude:
+                    continue
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(VECTOR_EXTENSIONS):
+                        files.append(os.path.abspath(os.path.join(root, name)))
+        return files
+
+
+def _init_worker(prefix_path: str|None):
+        global QGIS_APP
+        from qgis.core import QgsApplication
+
+        if prefix_path:
+            QgsApplication.setPrefixPath(prefix_path, True)
+        QGIS_APP = QgsApplication([], False)
+        QGIS_APP.initQgis()
+
+
+def _sublayers(path: str) -> list[tuple[str, str]]:
+        # every layer of a multi layer file, single layer files give themselves
+        from qgis.core import QgsProviderRegistry, Qgis
+
+        sublayers = QgsProviderRegistry.instance().providerMetadata("ogr").querySublayers(path)
+        layers = [(sublayer.name(), sublayer.uri()) for sublayer in sublayers if sublayer.type() == Qgis.LayerType.Vector]
+        return layers or [(os.path.splitext(os.path.basename(path))[0], path)]
+
+
+def _result_to_dict(result) -> dict:
+        return {"category": result.category,
+                "analysis": result.analysis,
+                "info": result.info_output,
+                "fids": {name: fids.tolist() for name, fids in result.fids.items()},
+                "layers": {name: layer.featureCount() for name, layer in result.geodata_layer.items()}}
+
+
+def validate_file(path: str, checks: list[str], cache_path: str|None=None, profile: bool=False,
+                  capture: str|None=None) -> dict:
+        from qgis.core import QgsVectorLayer
+        from .funcs import scheduler, fingerprint_cache, profiling
+        from .funcs.status import Infotext
+
+        started = time.perf_counter()
+        out = {"path": path, "layers": [], "status": "ok"}
+        cache = fingerprint_cache.FingerprintCache(cache_path) if cache_path else None
+        try:
+            for name, uri in _sublayers(path):
+                layer = QgsVectorLayer(uri, name, "ogr")
+                if not layer.isValid():
+                    out["layers"].append({"name": name, "uri": uri, "status": "invalid layer"})
+                    out["status"] = "error"
+                    continue
+
+                log = Infotext()
+                profiler = profiling.Profiler(capture) if profile or capture else None
+                entry = {"name": name, "uri": uri, "status": "ok", "feature_count": layer.featureCount()}
+                # files are already spread over processes, the checks of one file run on one thread
+                if cache is None:
+                    results = scheduler.run_checks(layer, checks, report=log.extend, max_workers=1, profiler=profiler)
+                else:
+                    (results, issues, changes) = fingerprint_cache.revalidate(layer, uri, checks, cache, report=log.extend,
+                                                                               profiler=profiler)
+                    entry["issues"] = {check: [list(issue) for issue in found] for check, found in issues.items()}
+                    entry.update(changes)
+
+                if profiler is not None:
+                    log.extend(profiler.report())
+                    out.setdefault("profiles", {})[name] = profiler.as_dict()
+                entry["results"] = [_result_to_dict(result) for result in results.values()]
+                entry["report"] = log.content
+                entry["events"] = log.as_dicts()
+                out["layers"].append(entry)
+
+            if cache is not None and out["status"] == "ok":
+                cache.store_output(path, checks, {key: value for key, value in out.items() if key != "profiles"})
+        except Exception:
+            out["status"] = "error"
+            out["error"] = traceback.format_exc()
+        finally:
+            if cache is not None:
+                cache.close()
+
+        out["seconds"] = time.perf_counter() - started
+        return out
+
+
+def _result_path(path: str, base: str, out_dir: str) -> str:
+        relative = os.path.relpath(path, base) if os.path.commonpath([path, base]) == base else os.path.basename(path)
+        return os.path.join(out_dir, relative + ".json")
+
+
+def _write_result(out: dict, result_path: str):
+        os.makedirs(os.path.dirname(result_path), exist_ok=True)
+        with open(result_path, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2, default=str)
+
+
+def run(paths: list[str], out_dir: str, checks: list[str], jobs: int, prefix_path: str|None,
+        cache_path: str|None=None, profile: bool=False, capture: str|None=None) -> dict:
+        files = discover(paths, exclude=out_dir)
+        base = os.path.commonpath([os.path.abspath(p) if os.path.isdir(p) else os.path.dirname(os.path.abspath(p)) for p in paths])
+        summary = {"files": len(files), "ok": 0, "error": 0, "cached": 0, "results": {}}
+
+        # files that did not change since the cached run are not handed to a worker at all
+        if cache_path:
+            from .funcs.fingerprint_cache import FingerprintCache
+            cache = FingerprintCache(cache_path)
+            pending = []
+            for path in files:
+                out = cache.cached_output(path, checks)
+                if out is None:
+                    pending.append(path)
+                    continue
+                result_path = _result_path(path, base, out_dir)
+                _write_result(out, result_path)
+                summary["ok"] += 1
+                summary["cached"] += 1
+                summary["results"][path] = {"status": "ok", "result_file": result_path, "seconds": 0, "cached": True}
+            cache.close()
+            files = pending
+
+        # spawn, so every worker gets a clean process for its own QgsApplication
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=_init_worker, initargs=(prefix_path,)) as pool:
+            futures = {pool.submit(validate_file, path, checks, cache_path, profile, capture): path for path in files}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    out = future.result()
+                except Exception:
+                    out = {"path": path, "status": "error", "error": traceback.format_exc()}
+
+                result_path = _result_path(path, base, out_dir)
+                # the timings go to a sidecar of the result file, they differ from run to run
+                profiles = out.pop("profiles", None)
+                if profiles is not None:
+                    _write_result(profiles, result_path[:-len(".json")] + ".profile.json")
+                _write_result(out, result_path)
+
+                summary[out["status"]] += 1
+                summary["results"][path] = {"status": out["status"], "result_file": result_path, "seconds": out.get("seconds")}
+
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        return summary
+
+
+def main(argv: list[str]|None=None) -> int:
+        parser = argparse.ArgumentParser(description="Validate vector geodata files without the QGIS GUI.")
+        parser.add_argument("paths", nargs="+", help="files or directories that are searched recursively")
+        parser.add_argument("-o", "--output", required=True, help="directory for the result files and summary.json")
+        parser.add_argument("-c", "--checks", nargs="+", default=None, help="checks to run, default all")
+        parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+        parser.add_argument("--prefix-path", default=os.environ.get("QGIS_PREFIX_PATH"), help="QGIS install prefix")
+        parser.add_argument("--cache", default=None,
+                            help="sqlite file with the fingerprints of earlier runs, unchanged files are skipped "
+                                 "and changed layers are only checked again for changed features")
+        parser.add_argument("--profile", action="store_true",
+                            help="report the timings of every check and write them to a .profile.json next to the result file")
+        parser.add_argument("--cprofile", default=None, metavar="CHECK",
+                            help="run this check under cProfile, the statistics are added to the profile")
+        args = parser.parse_args(argv)
+
+        # the registry is only loaded for the check names, QgsApplication is started in the workers.
+        # unknown names are a usage error before any worker is started, not an error in every result file
+        from .funcs import scheduler
+        checks = args.checks or list(scheduler.CHECKS)
+        unknown = [name for name in checks if name not in scheduler.CHECKS]
+        if unknown:
+            parser.error(f"unknown checks: {', '.join(unknown)} (choose from {', '.join(scheduler.CHECKS)})")
+        if args.cprofile is not None and args.cprofile not in checks:
+            parser.error(f"--cprofile {args.cprofile} is not one of the checks that are run")
+
+        summary = run(args.paths, args.output, checks, args.jobs, args.prefix_path, args.cache, args.profile, args.cprofile)
+        print(f"validated {summary['files']} files: {summary['ok']} ok ({summary['cached']} unchanged), {summary['error']} with errors")
+        return 0 if summary["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
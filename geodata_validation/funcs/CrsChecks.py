@@ -1,8 +1,12 @@
 
 from .status import Result, Infotext
-from qgis.core import QgsVectorLayer, QgsCoordinateReferenceSystem, QgsCoordinateTransform
-from qgis.core import QgsProject, QgsRectangle
-from qgis.core import QgsGeometry
+from .scan import FeatureVisitor, run_scan
+from . import registry
+from . import crs_cache
+from qgis.core import QgsVectorLayer, QgsCoordinateReferenceSystem
+from qgis.core import QgsRectangle, QgsFeature
+
+from array import array
 
 
 category_name = "Crs Checks"
@@ -41,28 +45,17 @@ def crs_code(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotex
 def crs_compare(vectorlayer: type[QgsVectorLayer], compare_crs: type[QgsCoordinateReferenceSystem]) -> tuple[Result or None, Infotext or None]:
         pass
 
-def check_crs_bounds(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
-        info = Infotext()
-        result = Result(category=category_name, analysis="Check Geometries for Crs bounds")
-        
-        crs = vectorlayer.crs()
-        crs_bounds = crs.bounds()
-
-        if 'EPSG' in crs.authid():
-            epsg_code = int(crs.authid().split(':')[1])
-            dest_crs = QgsCoordinateReferenceSystem(epsg_code)
-        else:
-            dest_crs = QgsCoordinateReferenceSystem().createFromWkt(crs.asWkt())
-        
-        source_crs = QgsCoordinateReferenceSystem(4326)
-
-        crs_transform = QgsCoordinateTransform(source_crs, dest_crs, QgsProject.instance())
+class CrsBoundsVisitor(FeatureVisitor):
+    category = category_name
+    analysis = "Check Geometries for Crs bounds"
+    attributes = ()
 
-        bound_polygon = QgsGeometry.fromWkt(crs_bounds.asWktPolygon())
-        bound_polygon.transorm(crs_transform)
+    def __init__(self, vectorlayer: type[QgsVectorLayer], crs_info: type[crs_cache.CrsInfo]=None):
+        super().__init__(vectorlayer)
 
-        xmin, xmax = bound_polygon.boundingBox().xMinimum(), bound_polygon.boundingBox().xMaximum()
-        ymin, ymax = bound_polygon.boundingBox().yMinimum(), bound_polygon.boundingBox().yMaximum()
+        bounds = (crs_info or crs_cache.crs_info(vectorlayer.crs())).bounds
+        xmin, xmax = bounds.xMinimum(), bounds.xMaximum()
+        ymin, ymax = bounds.yMinimum(), bounds.yMaximum()
 
         # crit_factor = 5 # adding the reciproce of this to the bounds for the check
 
@@ -70,18 +63,70 @@ def check_crs_bounds(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None,
         # crit_ymin, crit_ymax = ymin - (ymax-ymin)/crit_factor, ymax + (ymax-ymin)/crit_factor
 
         #crit_rectangle = QgsRectangle(crit_xmin, crit_ymin, crit_xmax, crit_ymax)
-        crit_rectangle = QgsRectangle(xmin, ymin, xmax, ymax)
-
-        feats_out_of_bounds = []
-        for feat in vectorlayer.getFeatures():
-            geom = feat.geometry()
-            if not crit_rectangle.intersects(geom.boundingBox()):
-                feats_out_of_bounds.append(tuple(feat.attributes(), geom))
-        
+        self.crit_rectangle = QgsRectangle(xmin, ymin, xmax, ymax)
+
+        # bounding boxes are only collected here and tested all at once in finish
+        self.fids = array('q')
+        self.xmin, self.ymin = array('d'), array('d')
+        self.xmax, self.ymax = array('d'), array('d')
+
+        # common case: the whole layer extent lies inside the bounds, no feature has to be read
+        self.extent_inside = self.crit_rectangle.contains(vectorlayer.extent())
+        self.done = self.extent_inside
+
+    def visit(self, feat: type[QgsFeature]):
+        if not feat.hasGeometry():
+            return
+        bbox = feat.geometry().boundingBox()
+        self.fids.append(feat.id())
+        self.xmin.append(bbox.xMinimum())
+        self.ymin.append(bbox.yMinimum())
+        self.xmax.append(bbox.xMaximum())
+        self.ymax.append(bbox.yMaximum())
+
+    def _out_of_bounds(self) -> list[int]:
+        rect = self.crit_rectangle
+        bounds = (rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum())
+
+        # numpy takes long to import, it is only loaded once bounds have to be tested feature by feature
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is None:
+            return [fid for fid, xmin, ymin, xmax, ymax in zip(self.fids, self.xmin, self.ymin, self.xmax, self.ymax)
+                    if xmax < bounds[0] or ymax < bounds[1] or xmin > bounds[2] or ymin > bounds[3]]
+
+        xmin, ymin = np.frombuffer(self.xmin, dtype=np.float64), np.frombuffer(self.ymin, dtype=np.float64)
+        xmax, ymax = np.frombuffer(self.xmax, dtype=np.float64), np.frombuffer(self.ymax, dtype=np.float64)
+        outside = (xmax < bounds[0]) | (ymax < bounds[1]) | (xmin > bounds[2]) | (ymin > bounds[3])
+        return np.frombuffer(self.fids, dtype=np.int64)[outside].tolist()
+
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        if self.extent_inside:
+            self.info.add_info(f"All geometries are inside the bounds of the crs (layer extent lies inside the bounds).")
+            return (None, self.info)
+
+        feats_out_of_bounds = self._out_of_bounds()
         if len(feats_out_of_bounds) > 0:
-            info.add_warning(f"{len(feats_out_of_bounds)} features/geometries lie out of bounds of the crs of the layer")
-            result.append_info("Geometies out of bounds", f"{len(feats_out_of_bounds)} features are out of bounds of the crs of the layer")
+            self.info.add_warning(f"{len(feats_out_of_bounds)} features/geometries lie out of bounds of the crs of the layer",
+                                  fids=feats_out_of_bounds)
+            self.result.append_fids("Geometies out of bounds", feats_out_of_bounds)
         else:
-            info.add_info(f"All geometries are inside the bounds of the crs.")
+            self.info.add_info(f"All geometries are inside the bounds of the crs.")
+
+        return (self.result if self.result.has_data() else None, self.info)
+
+
+def check_crs_bounds(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
+        return run_scan(vectorlayer, [CrsBoundsVisitor(vectorlayer)])[0]
+
 
+registry.register_artifact(registry.Artifact("crs_transform",
+        build=lambda layer, artifacts, feedback: crs_cache.crs_info(layer.crs())))
 
+registry.register(registry.Check("crs_bounds", title="Check data against crs bounds", category=category_name,
+        needs=("geometry", "crs_transform"), scope="feature",
+        issues=lambda result: [(fid, None, None) for fid in result.fids.get("Geometies out of bounds", [])],
+        visitor=lambda layer, artifacts, feedback: CrsBoundsVisitor(layer, artifacts["crs_transform"])))
@@ -1,77 +1,385 @@
 from .status import Result, Infotext
-from qgis.core import QgsVectorLayer
+from .scan import FeatureVisitor, run_scan
+from . import registry, pushdown
+from qgis.core import QgsVectorLayer, QgsFeature, QgsFieldConstraints, QgsGeometry
+
+from array import array
+import hashlib
+import sqlite3
 
 
 
 category_name = "Data Structure Checks"
 
-def null_vals(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
-        method_info = Infotext("Checking for NULL values in the data structure: \n")
-        #print(result)
-        #print(id(result))
-        result = Result(category=category_name, analysis="NULL check")
-        
-        # Problem, dass bei nochmaligem Ablauf des Tools nach Schließen mit cancel das result objekt dieser Funktion
-        # vom vorherigen Druchlauf weiterhin vorhanden ist, obwohl es meiner Meinung nach aufgrund des local namespaces 
-        # der Funktion nach dem return nicht mehr vorhanden sein sollte. Das wäre generell ein großen Problem innerhalb des 
-        # Toolv vielleicht
-        # --> deswegen einmal prüfen, ob es wahrhaftig das selbe Objekt ist (Speicherposition prüfen) und dann auch nochtmal
-        # diesbezüglich recherchieren.
-        # auch müsste doch eigentlich mit dem instantiieren ein neues Objekt geschaffen werden. Warum wird das selbe verwendet?
-        
-        #print(id(result))
-        #print(f"Result at start: {result.info_output.keys()}")
-
-        result.reset_data()
-
-        fields = [(a.name(), a.typeName()) for a in vectorlayer.fields()]
-        data = [ [i+1] + o.attributes() for i, o in enumerate(vectorlayer.getFeatures())]
-        data_transposed = list(zip(*data))
-
-        null_objs = [obj for obj in data if obj.count(None) >= 0.9*len(fields)]
-        if len(null_objs) > 0:
-            method_info.add_info(f"Found {len(null_objs)} objects with over 90% Null values")
-            method_info.append(f"Null objects: \n{null_objs}")
-
-            result.append_info("null objects", null_objs)
-
-        null_attrs = [[f"Field: {fieldname[0]}"] + list(attr) for attr, fieldname in zip(data_transposed, fields) if attr.count(None) >= 0.9*(len(data)-1)]
+def _is_null(value) -> bool:
+        # NULL attributes come back as NULL QVariants which compare equal to None
+        return value == None
+
+
+class NullValuesVisitor(FeatureVisitor):
+    category = category_name
+    analysis = "NULL check"
+    needs_geometry = False
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer], threshold: float=0.9, per_column: bool=True):
+        super().__init__(vectorlayer)
+        self.info = Infotext("Checking for NULL values in the data structure: \n")
+        self.fields = [a.name() for a in vectorlayer.fields()]
+        self.threshold = threshold
+        # without per_column only the null heavy rows are reported, they depend on the row alone
+        self.per_column = per_column
+
+        # one counter per column and the fids of null heavy rows, nothing else is kept
+        self.column_nulls = [0] * len(self.fields)
+        self.row_limit = threshold * len(self.fields)
+        self.null_rows = array('q')
+        self.n_rows = 0
+
+    def visit(self, feat: type[QgsFeature]):
+        self.n_rows += 1
+        attrs = feat.attributes()
+
+        row_nulls = attrs.count(None)
+        if row_nulls == 0:
+            return
+
+        column_nulls = self.column_nulls
+        for i, value in enumerate(attrs):
+            if _is_null(value):
+                column_nulls[i] += 1
+
+        if row_nulls >= self.row_limit:
+            self.null_rows.append(feat.id())
+
+    def pushdown(self, source: type[pushdown.SqlSource]):
+        if not source.all_exact():
+            return
+        (n_rows, column_nulls) = pushdown.null_counts(source)
+        null_rows = pushdown.null_rows(source, self.row_limit)
+        (self.n_rows, self.column_nulls, self.null_rows) = (n_rows, column_nulls, array('q', null_rows))
+        self.done = True
+
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        if len(self.null_rows) > 0:
+            self.info.add_info(f"Found {len(self.null_rows)} objects with over {self.threshold:.0%} Null values",
+                               fids=self.null_rows)
+
+            self.result.append_fids("null objects", self.null_rows)
+
+        null_attrs = {name: count for name, count in zip(self.fields, self.column_nulls)
+                      if self.per_column and self.n_rows > 0 and count >= self.threshold*self.n_rows}
         if len(null_attrs) > 0:
-            method_info.add_info(f"Found {len(null_attrs)} attributes in the data that have over 90% null values")
-            method_info.add_info(f"Fields with mostly NULL values: {[fields[0] for fields in null_attrs]}")
-            method_info.append(f"Null attributes: \n{null_attrs}")
+            self.info.add_info(f"Found {len(null_attrs)} attributes in the data that have over {self.threshold:.0%} null values")
+            self.info.add_info(f"Fields with mostly NULL values: {list(null_attrs)}")
+            self.info.append(f"Null values per attribute: \n{null_attrs}")
 
-            result.append_info("null attributes", null_attrs)
+            self.result.append_info("null attributes", null_attrs)
 
-        return (result if result.geodata_layer or result.info_output else None, 
-                method_info or None)
+        return (self.result if self.result.has_data() else None,
+                self.info or None)
 
-def oid(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
-        info = Infotext()
-        result = Result(category=category_name, analysis="Oid existence")
 
-        result.reset_data()
+def null_vals(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
+        return run_scan(vectorlayer, [NullValuesVisitor(vectorlayer)])[0]
+
+
+def _compact_key(value) -> int:
+        # ints that fit into 64 bit are kept as they are, everything else is reduced to a 64 bit digest of its
+        # type and repr, which also works for the lists and dicts of JSON fields. a digest collision can only
+        # hide a unique column, it never reports a duplicate column as unique.
+        if type(value) is int and -2**63 <= value < 2**63:
+            return value
+        digest = hashlib.blake2b(f"{type(value).__name__}:{value!r}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little", signed=True)
+
+
+class _UniqueColumns():
+    """Tracks which columns hold unique values with one memory budget for all of them.
+
+    The keys of every column are held in sets until ``memory_limit`` keys are held in
+    total, so the usual early collision is found right away. After that the keys go to
+    one temporary sqlite table keyed by column and key, every ``buffer_size`` keys a
+    column whose keys don't all go in is reported by ``collisions``.
+    """
+
+    def __init__(self, columns: list[int], memory_limit: int=1000000, buffer_size: int=100000):
+        self.keys = {idx: set() for idx in columns}
+        self.memory_limit = memory_limit
+        self.buffer_size = buffer_size
+        self.held = 0
+        self.db = None
+
+    @property
+    def columns(self) -> list[int]:
+        return list(self.keys)
+
+    def add(self, idx: int, key: int) -> bool:
+        # spilled keys are only compared when they are flushed, buffered ones right away
+        keys = self.keys[idx]
+        if key in keys:
+            return False
+        keys.add(key)
+        self.held += 1
+        if self.db is None and self.held >= self.memory_limit:
+            self._spill()
+        return True
+
+    def drop(self, idx: int):
+        self.held -= len(self.keys.pop(idx))
+
+    def _spill(self):
+        # an empty filename gives a private on disk database that is removed on close
+        self.db = sqlite3.connect("")
+        self.db.execute("CREATE TABLE keys (col INTEGER, key INTEGER, PRIMARY KEY (col, key)) WITHOUT ROWID")
+        self._flush()
+
+    def _flush(self) -> list[int]:
+        # a key that is already in the table is ignored, so fewer changes than keys mean a repeated value
+        repeated = []
+        for idx, keys in self.keys.items():
+            if not keys:
+                continue
+            changes = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO keys VALUES (?, ?)", ((idx, key) for key in keys))
+            if self.db.total_changes - changes < len(keys):
+                repeated.append(idx)
+            keys.clear()
+        self.db.commit()
+        self.held = 0
+        return repeated
+
+    def collisions(self) -> list[int]:
+        # columns found to repeat a value since the last call, only known once spilled keys are flushed
+        if self.db is None or self.held < self.buffer_size:
+            return []
+        return self._flush()
+
+    def unique(self) -> list[int]:
+        if self.db is None:
+            return self.columns
+        repeated = set(self._flush())
+        self.db.close()
+        self.db = None
+        return [idx for idx in self.keys if idx not in repeated]
+
+
+class OidVisitor(FeatureVisitor):
+    category = category_name
+    analysis = "Oid existence"
+    needs_geometry = False
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer]):
+        super().__init__(vectorlayer)
+        fields = vectorlayer.fields()
+        self.fields = [a.name() for a in fields]
+        self.confirmed = []
+
+        # provider metadata first, only columns the provider can't answer for are scanned
+        primary_keys = set(vectorlayer.primaryKeyAttributes())
+        n_features = vectorlayer.featureCount()
 
-        # start
-        fields = [(a.name, a.type) for a in vectorlayer.fields()]
-        attrs = list(zip(*[o.attributes() for o in vectorlayer.getFeatures()]))
+        self.n_features = 0
+        candidates = []
+        for idx, field in enumerate(fields):
+            constraints = field.constraints()
+            provider_unique = (constraints.constraints() & QgsFieldConstraints.ConstraintUnique
+                               and constraints.constraintOrigin(QgsFieldConstraints.ConstraintUnique) == QgsFieldConstraints.ConstraintOriginProvider)
 
-        for attr, fname in zip(attrs, fields):
-              if len(set(attr)) == len(attr):
-                    pass
-        
-        pot_oids = [field for attr, field in zip(attrs, fields) if len(set(attr)) == len(attr)]
+            if idx in primary_keys or provider_unique:
+                self.confirmed.append(field.name())
+            elif n_features != 0:
+                # the values are collected in the scan, an empty layer has no column to identify objects by
+                candidates.append(idx)
+
+        self.candidates = _UniqueColumns(candidates)
+        # columns the table found unique, they are not read anymore
+        self.known_unique = []
+        self.done = not candidates
+
+    @property
+    def attributes(self) -> list[int]:
+        # only the columns the provider can't answer for are read
+        return self.candidates.columns
+
+    def visit(self, feat: type[QgsFeature]):
+        attrs = feat.attributes()
+        self.n_features += 1
+
+        dropped = []
+        for idx in self.candidates.columns:
+            value = attrs[idx]
+            if _is_null(value) or not self.candidates.add(idx, _compact_key(value)):
+                dropped.append(idx)
+        dropped.extend(self.candidates.collisions())
+
+        # a column is dropped with its first collision
+        for idx in dropped:
+            self.candidates.drop(idx)
+        if dropped and not self.candidates.columns:
+            self.done = True
+
+    def pushdown(self, source: type[pushdown.SqlSource]):
+        unique = {idx: pushdown.is_unique(source, source.columns[idx]) for idx in self.candidates.columns if source.exact[idx]}
+        for idx, is_unique in unique.items():
+            self.candidates.drop(idx)
+            if is_unique:
+                self.known_unique.append(idx)
+        self.done = not self.candidates.columns
+
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        # the feature count may be unknown, columns are only unique if a feature was seen or the table answered
+        scanned = self.candidates.unique() if self.n_features > 0 else []
+        pot_oids = self.confirmed + [self.fields[idx] for idx in sorted(self.known_unique + scanned)]
 
         if len(pot_oids) > 0:
-              info.add_info(f"{len(pot_oids)} attributes can be user as an object identifier.")
-              info.add_info(f"Potential Oids are: {pot_oids}")
-              result.append_info("Potential OIDs", pot_oids)
+              self.info.add_info(f"{len(pot_oids)} attributes can be user as an object identifier.")
+              self.info.add_info(f"Potential Oids are: {pot_oids}")
+              self.result.append_info("Potential OIDs", pot_oids)
         else:
-              info.add_warning("No attribute can be used as an object identifier. Please consider creating one to be able to identify objects unambiguously.")
-         
-        return (result if result.geodata_layer or result.info_output else None, info or None)
+              self.info.add_warning("No attribute can be used as an object identifier. Please consider creating one to be able to identify objects unambiguously.")
+
+        return (self.result if self.result.has_data() else None, self.info or None)
+
+
+def oid(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
+        return run_scan(vectorlayer, [OidVisitor(vectorlayer)])[0]
+
+
+class _DigestGroups():
+    """Groups fids by digest, spilling to a temporary sqlite database above a memory budget."""
+
+    # rough size of one digest with its fid list in the in memory dict
+    entry_bytes = 200
+
+    def __init__(self, memory_budget_mb: float=256):
+        self.max_entries = max(1, int(memory_budget_mb * 1024**2 / self.entry_bytes))
+        self.groups = {}
+        self.db = None
+
+    def add(self, kind: str, digest: bytes, fid: int):
+        self.groups.setdefault((kind, digest), []).append(fid)
+        if len(self.groups) >= self.max_entries:
+            self._spill()
+
+    def _spill(self):
+        if self.db is None:
+            # an empty filename gives a private on disk database that is removed on close
+            self.db = sqlite3.connect("")
+            self.db.execute("CREATE TABLE digests (kind TEXT, digest BLOB, fid INTEGER)")
+        self.db.executemany("INSERT INTO digests VALUES (?, ?, ?)",
+                            ((kind, digest, fid) for (kind, digest), fids in self.groups.items() for fid in fids))
+        self.db.commit()
+        self.groups = {}
+
+    def duplicate_groups(self) -> dict[str, list[list[int]]]:
+        out = {}
+        if self.db is None:
+            for (kind, _), fids in self.groups.items():
+                if len(fids) > 1:
+                    out.setdefault(kind, []).append(fids)
+            return out
+
+        self._spill()
+        rows = self.db.execute("SELECT kind, group_concat(fid) FROM digests GROUP BY kind, digest HAVING COUNT(*) > 1")
+        for kind, fids in rows:
+            out.setdefault(kind, []).append(sorted(int(fid) for fid in fids.split(",")))
+        self.db.close()
+        self.db = None
+        return out
+
+
+class DuplicatesVisitor(FeatureVisitor):
+    category = category_name
+    analysis = "Duplicate check"
+
+    kinds = {"exact": "exact duplicates", "attributes": "attribute duplicates", "geometry": "geometry duplicates"}
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer], memory_budget_mb: float=256):
+        super().__init__(vectorlayer)
+        self.groups = _DigestGroups(memory_budget_mb)
+        # primary keys like the fid of GeoPackages are unique by definition, they are not compared
+        keys = set(vectorlayer.primaryKeyAttributes())
+        self.compared = [idx for idx in range(len(vectorlayer.fields())) if idx not in keys]
+        # group of every fid with attribute duplicates, once the table grouped the attributes
+        self.attribute_groups = None
+
+    @property
+    def attributes(self) -> list[int]:
+        # once the table grouped the attributes only the geometries are read
+        return self.compared if self.attribute_groups is None else []
+
+    def pushdown(self, source: type[pushdown.SqlSource]):
+        # attributes are grouped by the table, geometries still have to be normalized feature by feature
+        if not self.compared or not all(source.exact[idx] for idx in self.compared):
+            return
+        groups = pushdown.duplicate_rows(source, [source.columns[idx] for idx in self.compared])
+        self.attribute_groups = {}
+        for i, fids in enumerate(groups):
+            digest = i.to_bytes(8, "little")
+            for fid in fids:
+                self.groups.add("attributes", digest, fid)
+                self.attribute_groups[fid] = digest
+        if source.geometry is None:
+            for i, fids in enumerate(groups):
+                for fid in fids:
+                    self.groups.add("exact", i.to_bytes(8, "little"), fid)
+            self.done = True
+
+    def visit(self, feat: type[QgsFeature]):
+        fid = feat.id()
+        if self.attribute_groups is None:
+            attrs = feat.attributes()
+            attr_digest = hashlib.blake2b(repr([attrs[idx] for idx in self.compared]).encode(), digest_size=16).digest()
+            # without other fields than keys all features would be attribute duplicates
+            if self.compared:
+                self.groups.add("attributes", attr_digest, fid)
+        else:
+            # only features with attribute duplicates can be exact duplicates
+            attr_digest = self.attribute_groups.get(fid)
+
+        geom_digest = b""
+        if feat.hasGeometry():
+            # normalized so that the same shape with another start vertex or ring order is equal
+            geom = QgsGeometry(feat.geometry())
+            geom.normalize()
+            geom_digest = hashlib.blake2b(bytes(geom.asWkb()), digest_size=16).digest()
+            self.groups.add("geometry", geom_digest, fid)
+
+        if attr_digest is not None:
+            self.groups.add("exact", hashlib.blake2b(attr_digest + geom_digest, digest_size=16).digest(), fid)
+
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        duplicate_groups = self.groups.duplicate_groups()
+
+        for kind, name in self.kinds.items():
+            groups = sorted(duplicate_groups.get(kind, []))
+            if len(groups) > 0:
+                # the fids of a group follow each other
+                fids = array('q', (fid for group in groups for fid in group))
+                text = f"Found {len(groups)} groups of {name} with {len(fids)} features"
+                self.info.add_warning(text, fids=fids)
+                self.result.append_fids(name, fids)
+                self.result.append_info(name, text)
+            else:
+                self.info.add_info(f"No {name} found")
+
+        return (self.result if self.result.has_data() else None, self.info or None)
 
 
 def duplicates(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
-        pass
+        return run_scan(vectorlayer, [DuplicatesVisitor(vectorlayer)])[0]
+
 
+registry.register(registry.Check("nulls", title="Check for NULL values", category=category_name,
+        needs=("attributes",), per_feature="null_rows",
+        visitor=lambda layer, artifacts, feedback: NullValuesVisitor(layer)))
+registry.register(registry.Check("null_rows", title="Check for records with mostly NULL values", category=category_name,
+        needs=("attributes",), scope="feature",
+        issues=lambda result: [(fid, None, None) for fid in result.fids.get("null objects", [])],
+        visitor=lambda layer, artifacts, feedback: NullValuesVisitor(layer, per_column=False)))
+registry.register(registry.Check("oid", title="Check for object identifiers", category=category_name,
+        needs=("attributes",),
+        visitor=lambda layer, artifacts, feedback: OidVisitor(layer)))
+registry.register(registry.Check("duplicates", title="Check for duplicates", category=category_name,
+        needs=("attributes", "geometry"),
+        visitor=lambda layer, artifacts, feedback: DuplicatesVisitor(layer)))
@@ -1,123 +1,534 @@
 from .status import Result, Infotext
-from qgis.core import QgsVectorLayer
-from qgis.core import QgsPointXY, QgsGeometry, QgsFeature, QgsField
-from qgis import processing
+from .scan import FeatureVisitor, run_scan
+from . import registry, profiling, pushdown
+from qgis.core import QgsVectorLayer, QgsFeatureRequest, QgsSpatialIndex, QgsFeedback
+from qgis.core import QgsGeometry, QgsFeature, QgsField, QgsRectangle
+from qgis.core import QgsPolygon, QgsCurvePolygon, QgsGeometryCollection
 
-from qgis.core import QgsWkbTypes
+from qgis.core import Qgis, QgsWkbTypes
 from qgis.PyQt.QtCore import QVariant
 
-import json
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from collections import deque
+import math
+import os
 
 
 
 
 category_name = "Geometry Checks"
 
+class EmptyGeometriesVisitor(FeatureVisitor):
+    category = category_name
+    analysis = "Check for empty geometries"
+    attributes = ()
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer]):
+        super().__init__(vectorlayer)
+        self.info = Infotext("Analysis for empty geometries:")
+        # only the fids are kept, the attributes are read when the features are looked at
+        self.empty_fids = array('q')
+
+    def visit(self, feat: type[QgsFeature]):
+        if feat.geometry().isEmpty():
+            self.empty_fids.append(feat.id())
+
+    def pushdown(self, source: type[pushdown.SqlSource]):
+        # only the features whose blob header can't prove coordinates are read and confirmed by QGIS,
+        # if those are too many the scan runs as usual
+        if source.geometry is None:
+            return
+        candidates = pushdown.empty_candidates(source, limit=max(1000, source.count() // 10))
+        if candidates is None:
+            return
+        self.empty_fids = array('q', pushdown.empty_fids(source, candidates))
+        self.done = True
+
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        if len(self.empty_fids) > 0:
+            self.info.add_warning(f"found {len(self.empty_fids)} objects with no geometries", fids=self.empty_fids)
+            self.result.append_fids("empty_geometries", self.empty_fids)
+        else:
+            self.info.add_info("No objects with empty geometries found")
+
+        return (self.result if self.result.has_data() else None, self.info)
+
+
 def empty_geomtries(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
-        info = Infotext("Analysis for empty geometries:")
-        result = Result(category= category_name, analysis="Check for empty geometries")
+        return run_scan(vectorlayer, [EmptyGeometriesVisitor(vectorlayer)])[0]
+
+
+def _polygon_parts(geom: type[QgsGeometry]) -> list:
+        abstract_geom = geom.constGet()
+        if abstract_geom is None:
+            return []
+        if isinstance(abstract_geom, QgsCurvePolygon):
+            return [abstract_geom]
+        if isinstance(abstract_geom, QgsGeometryCollection):
+            parts = []
+            for i in range(abstract_geom.numGeometries()):
+                part = abstract_geom.geometryN(i)
+                if isinstance(part, QgsCurvePolygon):
+                    parts.append(part)
+            return parts
+        return []
+
+
+def _feature_holes(feat: type[QgsFeature]) -> list[QgsGeometry]:
+        # read the interior rings straight from the geometry, multipolygons part by part
+        holes = []
+        for part in _polygon_parts(feat.geometry()):
+            for i in range(part.numInteriorRings()):
+                hole = QgsPolygon()
+                hole.setExteriorRing(part.interiorRing(i).clone())
+                holes.append(QgsGeometry(hole))
+
+        return holes
+
+
+def _polygonal_parts(geom: type[QgsGeometry]) -> list[QgsGeometry]:
+        if geom.isEmpty():
+            return []
+        return [part for part in geom.asGeometryCollection() if part.type() == QgsWkbTypes.PolygonGeometry]
+
+
+def _exterior(geom: type[QgsGeometry]) -> QgsGeometry:
+        # like a ring of the dissolved layer, a gap includes the features lying inside of it
+        polygon = QgsPolygon()
+        polygon.setExteriorRing(geom.constGet().exteriorRing().clone())
+        return QgsGeometry(polygon)
+
+
+class _HolesWriter():
+    """Collects hole features and writes them to a memory layer in batches."""
+
+    def __init__(self, crs, out_layer_name: str, batch_size: int=10000):
+        self.layer = QgsVectorLayer("Polygon", out_layer_name, "memory")
+        self.layer.setCrs(crs)
+        self.provider = self.layer.dataProvider()
+        self.provider.addAttributes([QgsField("OID", QVariant.Int), QgsField("SOURCE_FID", QVariant.LongLong)])
+        self.layer.updateFields()
+
+        self.fields = self.layer.fields()
+        self.batch_size = batch_size
+        self.batch = []
+        self.counter = 0
+
+    def add(self, source_fid: int, hole_geoms: list[QgsGeometry]):
+        for new_geom in hole_geoms:
+            self.counter += 1
+            new_feat = QgsFeature(self.fields)
+            new_feat.setGeometry(new_geom)
+            new_feat.setAttributes([self.counter, source_fid])
+            self.batch.append(new_feat)
+
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.provider.addFeatures(self.batch)
+            self.batch = []
+
+
+def _holes_in_polygon(polygon_layer: type[QgsVectorLayer], out_layer_name: str) -> tuple[QgsVectorLayer|None, int]:
+
+        writer = _HolesWriter(polygon_layer.crs(), out_layer_name)
+
+        for feat in profiling.timed(polygon_layer.getFeatures(QgsFeatureRequest().setNoAttributes())):
+            hole_geoms = _feature_holes(feat)
+            if hole_geoms:
+                writer.add(feat.id(), hole_geoms)
+        writer.flush()
 
-        # problem that local namespace of function doesnt get cleared after return inside of qgis session
-        result.reset_data()
+        return (writer.layer if writer.counter > 0 else None, writer.counter)
 
-        attribute_names = [field.name() for field in vectorlayer.fields()]
-        empty_objects = []
 
+def _validate_chunk(chunk: list[tuple[int, QgsGeometry]], method) -> list[tuple[int, object]]:
+        errors = []
+        for fid, geom in chunk:
+            for error in geom.validateGeometry(method):
+                errors.append((fid, error))
+        return errors
+
+
+def validity_errors(vectorlayer: type[QgsVectorLayer], method=Qgis.GeometryValidationEngine.Geos,
+                    chunk_size: int=10000, max_workers: int|None=None, feedback: type[QgsFeedback]=None):
+        # yields (fid, QgsGeometry.Error) chunk by chunk as soon as a range of fids is validated
+        max_workers = max_workers or os.cpu_count() or 1
+        fids = sorted(vectorlayer.allFeatureIds())
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for start in range(0, len(fids), chunk_size):
+                if feedback is not None:
+                    if feedback.isCanceled():
+                        break
+                    feedback.setProgress(100.0 * start / len(fids))
+
+                request = QgsFeatureRequest().setFilterFids(fids[start:start+chunk_size]).setNoAttributes()
+                chunk = [(feat.id(), feat.geometry()) for feat in profiling.timed(vectorlayer.getFeatures(request)) if feat.hasGeometry()]
+
+                pending.append(pool.submit(_validate_chunk, chunk, method))
+                if len(pending) >= 2*max_workers:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+
+
+def validity(vectorlayer: type[QgsVectorLayer], method=Qgis.GeometryValidationEngine.Geos,
+             feedback: type[QgsFeedback]=None) -> tuple[Result or None, Infotext or None]:
+        info = Infotext()
+        result = Result(category=category_name, analysis="Check geometry validity")
+
+        errors_layer = QgsVectorLayer("Point", "validity_errors", "memory")
+        errors_layer.setCrs(vectorlayer.crs())
+        provider = errors_layer.dataProvider()
+        provider.addAttributes([QgsField("FID", QVariant.LongLong), QgsField("ERROR", QVariant.String)])
+        errors_layer.updateFields()
+        fields = errors_layer.fields()
+
+        invalid_fids = set()
         counter = 0
-        for feat in vectorlayer.getFeatures():
-            if feat.geometry().isEmpty():
-                counter += 1
-                empty_objects.append(feat.attributes())
+        batch = []
+        for fid, error in validity_errors(vectorlayer, method, feedback=feedback):
+            counter += 1
+            invalid_fids.add(fid)
+
+            new_feat = QgsFeature(fields)
+            if error.hasWhere():
+                new_feat.setGeometry(QgsGeometry.fromPointXY(error.where()))
+            new_feat.setAttributes([fid, error.what()])
+            batch.append(new_feat)
+
+            if len(batch) >= 10000:
+                provider.addFeatures(batch)
+                batch = []
+
+        if batch:
+            provider.addFeatures(batch)
 
         if counter > 0:
-            info.add_warning(f"found {len(empty_objects)} objects with no geometries")
-            result.append_info("empty_geometries", [attribute_names] + empty_objects)
+            invalid_fids = sorted(invalid_fids)
+            info.add_warning(f"{counter} errors found in {len(invalid_fids)} invalid geometries!", fids=invalid_fids)
+            result.append_geodata("validity_errors", errors_layer)
+            result.append_fids("Invalid features", invalid_fids)
         else:
-            info.add_info("No objects with empty geometries found")
-        
-        return (result if result.geodata_layer or result.info_output else None, info)
+            info.add_info("All geometries are valid")
 
+        return (result if result.has_data() else None, info)
 
-def _holes_in_polygon(polygon_layer: type[QgsVectorLayer], out_layer_name: str) -> tuple[QgsVectorLayer|None, int]:
-        
-        holes = QgsVectorLayer("Polygon", out_layer_name, "memory")
-        holes.setCrs(polygon_layer.crs())
-        holes_data_provider = holes.dataProvider()
 
-        holes.startEditing()
-        holes.addAttribute(QgsField("OID", QVariant.Int))
-        holes.commitChanges()
+def _layer_issues(result: type[Result], name: str, fid_field: str, detail_field: str|None=None,
+                  other_field: str|None=None) -> list[tuple]:
+        # findings per source feature (or pair of them), read back from a result layer
+        layer = result.geodata_layer.get(name)
+        if layer is None:
+            return []
+        return [(feat[fid_field], feat[other_field] if other_field else None, feat[detail_field] if detail_field else None)
+                for feat in layer.getFeatures()]
 
-        counter = 0
-        for i, feat in enumerate(polygon_layer.getFeatures()):
 
-            geom = feat.geometry().asJson()
-            data = json.loads(geom)
-            coords = data["coordinates"]
+def _tile_breaks(start: float, end: float, n: int) -> list[float]:
+        # neighbouring tiles have to share the exact same border coordinate for the stitching
+        step = (end - start) / n
+        return [start + i*step for i in range(n)] + [end]
+
+
+def _tile_gaps(geoms: list[QgsGeometry], core: type[QgsRectangle]) -> tuple[list, list]:
+        # empty space inside the tile core, split into complete gaps and pieces cut by the tile border
+        core_geom = QgsGeometry.fromRect(core)
+        core_border = QgsGeometry(core_geom.constGet().boundary())
+
+        empty = core_geom.difference(QgsGeometry.unaryUnion(geoms)) if geoms else core_geom
+
+        inner, border = [], []
+        for part in _polygonal_parts(empty):
+            if part.intersects(core_border):
+                border.append(part)
+            else:
+                inner.append(part)
+
+        return (inner, border)
+
 
-            oid = 1
-            
-            for obj in coords:
-                                
-                if len(obj) == 1:
+def _stitch(pieces: list[QgsGeometry], extent: type[QgsRectangle]) -> list[QgsGeometry]:
+        # pieces sharing a stretch of a tile border belong to the same gap. groups reaching the layer
+        # extent are open space around the layer, they are dropped without ever being merged
+        index = QgsSpatialIndex()
+        for i, piece in enumerate(pieces):
+            index.addFeature(i, piece.boundingBox())
+
+        parent = list(range(len(pieces)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, piece in enumerate(pieces):
+            for j in index.intersects(piece.boundingBox()):
+                if j <= i or find(i) == find(j):
                     continue
-                else:
-                    counter += 1
-                    for i in range(1, len(obj)):
-                        pointlist = []
-            
-                        for p in obj[i]:
-                            pointlist.append(QgsPointXY(p[0], p[1]))
-                            
-                        new_geom = QgsGeometry.fromPolygonXY([pointlist])
-                        holes.startEditing()
-                        new_feat = QgsFeature()
-                        new_feat.setGeometry(new_geom)
-                        new_feat["OID"] = oid
-                        oid += 1
-                        holes_data_provider.addFeature(new_feat)
-                        holes.commitChanges()
-        
-        return (holes if counter > 0 else None, counter)
+                # pieces only meeting in a corner point stay separate gaps, as in a dissolve
+                if piece.intersection(pieces[j]).length() > 0:
+                    parent[find(j)] = find(i)
+
+        extent_border = QgsGeometry(QgsGeometry.fromRect(extent).constGet().boundary())
+        open_space = {find(i) for i, piece in enumerate(pieces) if piece.intersects(extent_border)}
+
+        groups = {}
+        for i, piece in enumerate(pieces):
+            if find(i) not in open_space:
+                groups.setdefault(find(i), []).append(piece)
+        return [gap for group in groups.values() for gap in _polygonal_parts(QgsGeometry.unaryUnion(group))]
 
-def holes(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
-        info = Infotext()
-        result = Result(category=category_name, analysis="Check for holes in geometries")
 
-        # problem that local namespace of function doesnt get cleared after return inside of qgis session
-        result.reset_data()
+def _gaps_in_layer(vectorlayer: type[QgsVectorLayer], out_layer_name: str, features_per_tile: int=50000,
+                   margin_ratio: float=0.01, max_workers: int|None=None,
+                   feedback: type[QgsFeedback]=None) -> tuple[QgsVectorLayer|None, int]:
+
+        writer = _HolesWriter(vectorlayer.crs(), out_layer_name)
+
+        extent = vectorlayer.extent()
+        if extent.isEmpty():
+            return (None, 0)
+
+        n = max(1, math.ceil(math.sqrt(vectorlayer.featureCount() / features_per_tile)))
+        xs = _tile_breaks(extent.xMinimum(), extent.xMaximum(), n)
+        ys = _tile_breaks(extent.yMinimum(), extent.yMaximum(), n)
+        margin = margin_ratio * max(extent.width(), extent.height()) / n
+
+        max_workers = max_workers or os.cpu_count() or 1
+        border_pieces = []
+
+        def collect(future):
+            (inner, border) = future.result()
+            for gap in inner:
+                writer.add(None, [_exterior(gap)])
+            border_pieces.extend(border)
+
+        # features are read on this thread, only the geometry work runs in the pool
+        # a few tiles are kept in flight so memory stays bounded by the tile size
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for i in range(n):
+                if feedback is not None:
+                    if feedback.isCanceled():
+                        break
+                    feedback.setProgress(100.0 * i / n)
+
+                for j in range(n):
+                    core = QgsRectangle(xs[i], ys[j], xs[i+1], ys[j+1])
+                    expanded = core.buffered(margin)
+                    request = QgsFeatureRequest().setFilterRect(expanded).setNoAttributes()
+                    geoms = [feat.geometry() for feat in profiling.timed(vectorlayer.getFeatures(request)) if feat.hasGeometry()]
+
+                    pending.append(pool.submit(_tile_gaps, geoms, core))
+                    if len(pending) >= 2*max_workers:
+                        collect(pending.popleft())
+
+            while pending:
+                collect(pending.popleft())
+
+        # gaps crossing tile borders are stitched back together, everything touching the
+        # layer extent is open space around the layer and no gap
+        for gap in _stitch(border_pieces, extent):
+            writer.add(None, [_exterior(gap)])
+
+        writer.flush()
+
+        return (writer.layer if writer.counter > 0 else None, writer.counter)
+
+
+class HolesVisitor(FeatureVisitor):
+    category = category_name
+    analysis = "Check for holes in geometries"
+    attributes = ()
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer], feedback: type[QgsFeedback]=None, find_gaps: bool=True):
+        super().__init__(vectorlayer)
+        self.feedback = feedback
+        self.find_gaps = find_gaps
+        self.writer = _HolesWriter(vectorlayer.crs(), "Holes inside geometries")
+        self.hole_fids = array('q')
 
         if vectorlayer.geometryType() != QgsWkbTypes.PolygonGeometry:
-            info.add_error("can't investigate geometries for holes that are not polygons.")
-            return (None, info)
+            self.info.add_error("can't investigate geometries for holes that are not polygons.")
+            self.done = True
+
+    def visit(self, feat: type[QgsFeature]):
+        hole_geoms = _feature_holes(feat)
+        if hole_geoms:
+            self.writer.add(feat.id(), hole_geoms)
+            self.hole_fids.append(feat.id())
 
-        (holes_in_geometries, counter_in_geometries) = _holes_in_polygon(vectorlayer, "Holes inside geometries")
-            
-        if counter_in_geometries > 0:
-            info.add_warning(f"Found {counter_in_geometries} holes in the geometries of this layer")
-            result.append_geodata("Holes_in_geometries", holes_in_geometries)
-            result.append_info("Holes inside geometries", f"Found {counter_in_geometries} holes inside of geometries/features")
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        if self.vectorlayer.geometryType() != QgsWkbTypes.PolygonGeometry:
+            return (None, self.info)
+
+        self.writer.flush()
+        if self.writer.counter > 0:
+            self.info.add_warning(f"Found {self.writer.counter} holes in the geometries of this layer")
+            self.result.append_geodata("Holes_in_geometries", self.writer.layer)
+            self.result.append_info("Holes inside geometries", f"Found {self.writer.counter} holes inside of geometries/features")
+            self.result.append_fids("Features with holes", self.hole_fids)
         else:
-            info.add_info("No holes in the geometries found")
+            self.info.add_info("No holes in the geometries found")
+
+        # gaps between features can't be found feature by feature, they are searched tile by tile
+        if self.find_gaps:
+            _append_gaps(self.result, self.info, *_gaps_in_layer(self.vectorlayer, "gaps_in_layer", feedback=self.feedback))
 
+        return (self.result if self.result.has_data() else None, self.info)
 
-        out = processing.run("native:dissolve", {'INPUT':vectorlayer,
-                                                      'FIELD':[],
-                                                      'SEPARATE_DISJOINT':False,
-                                                      'OUTPUT':'TEMPORARY_OUTPUT'})
-        
-        (gaps_layer, counter_gaps) = _holes_in_polygon(out['OUTPUT'], "gaps_in_layer")
-        
+
+def _append_gaps(result: type[Result], info: type[Infotext], gaps_layer: QgsVectorLayer|None, counter_gaps: int):
         if counter_gaps > 0:
             info.add_warning(f"Found {counter_gaps} gaps between Geometries of the layer.")
             result.append_geodata("gaps_in_layer", gaps_layer)
             result.append_info("Gaps between geometries", f"Found {counter_gaps} gaps between geometries/features of the layer.")
         else:
             info.add_info(f"No gaps between geometries of the layer found")
-        
 
-        return (result if result.geodata_layer or result.info_output else None, info)
 
-def overlaps() -> tuple[Result or None, Infotext or None]:
-        # use index, then check if other features overlap with the current one, if so the actually check for an overlap
-        pass
+def holes(vectorlayer: type[QgsVectorLayer]) -> tuple[Result or None, Infotext or None]:
+        return run_scan(vectorlayer, [HolesVisitor(vectorlayer)])[0]
+
+
+def gaps(vectorlayer: type[QgsVectorLayer], dissolved: tuple|None=None,
+         feedback: type[QgsFeedback]=None) -> tuple[Result or None, Infotext or None]:
+        info = Infotext()
+        result = Result(category=category_name, analysis="Check for gaps between geometries")
+
+        if vectorlayer.geometryType() != QgsWkbTypes.PolygonGeometry:
+            info.add_error("can't investigate gaps between geometries that are not polygons.")
+            return (None, info)
+
+        # the gaps of the tiled dissolve can be handed in when they were already built for another check
+        _append_gaps(result, info, *(dissolved or _gaps_in_layer(vectorlayer, "gaps_in_layer", feedback=feedback)))
+
+        return (result if result.has_data() else None, info)
+
+
+def _polygonal(geom: type[QgsGeometry]) -> QgsGeometry|None:
+        # intersections of touching polygons can contain points and lines, only the areas are overlaps
+        if geom.isEmpty():
+            return None
+        if geom.type() == QgsWkbTypes.PolygonGeometry:
+            return geom
+        parts = _polygonal_parts(geom)
+        return QgsGeometry.collectGeometry(parts) if parts else None
+
+
+def build_spatial_index(vectorlayer: type[QgsVectorLayer], feedback: type[QgsFeedback]=None) -> QgsSpatialIndex:
+        # bulk loading packs the tree in one go and keeps the geometries, so the layer is read only once
+        request = QgsFeatureRequest().setNoAttributes()
+        return QgsSpatialIndex(vectorlayer.getFeatures(request), feedback, QgsSpatialIndex.FlagStoreFeatureGeometries)
+
+
+def overlaps(vectorlayer: type[QgsVectorLayer], batch_size: int=10000, feedback: type[QgsFeedback]=None,
+             index: type[QgsSpatialIndex]=None) -> tuple[Result or None, Infotext or None]:
+        info = Infotext()
+        result = Result(category=category_name, analysis="Check for overlapping geometries")
+
+        if vectorlayer.geometryType() != QgsWkbTypes.PolygonGeometry:
+            info.add_error("can't investigate geometries for overlaps that are not polygons.")
+            return (None, info)
+
+        if index is None:
+            index = build_spatial_index(vectorlayer, feedback)
+
+        overlaps_layer = QgsVectorLayer("MultiPolygon", "overlaps_in_layer", "memory")
+        overlaps_layer.setCrs(vectorlayer.crs())
+        provider = overlaps_layer.dataProvider()
+        provider.addAttributes([QgsField("FID_A", QVariant.LongLong), QgsField("FID_B", QVariant.LongLong)])
+        overlaps_layer.updateFields()
+        fields = overlaps_layer.fields()
+
+        # the pairs are kept in the overlaps layer only, here just their number and the fids in them
+        n_pairs = 0
+        flagged = set()
+        batch = []
+        fids = vectorlayer.allFeatureIds()
+        for i, fid in enumerate(fids):
+            if feedback is not None:
+                if feedback.isCanceled():
+                    break
+                if i % 1000 == 0:
+                    feedback.setProgress(100.0 * i / len(fids))
+
+            geom = index.geometry(fid)
+            if geom.isEmpty():
+                continue
+
+            candidates = [other for other in index.intersects(geom.boundingBox()) if other > fid]
+            if not candidates:
+                continue
+
+            # prepare once per feature, then test every bbox candidate against it
+            engine = QgsGeometry.createGeometryEngine(geom.constGet())
+            engine.prepareGeometry()
+
+            for other in candidates:
+                other_geom = index.geometry(other)
+                if not engine.intersects(other_geom.constGet()) or engine.touches(other_geom.constGet()):
+                    continue
+
+                overlap = _polygonal(QgsGeometry(engine.intersection(other_geom.constGet())))
+                if overlap is None or overlap.area() <= 0:
+                    continue
+
+                n_pairs += 1
+                flagged.update((fid, other))
+                new_feat = QgsFeature(fields)
+                new_feat.setGeometry(overlap)
+                new_feat.setAttributes([fid, other])
+                batch.append(new_feat)
+
+            if len(batch) >= batch_size:
+                provider.addFeatures(batch)
+                batch = []
+
+        if batch:
+            provider.addFeatures(batch)
+
+        if n_pairs > 0:
+            flagged = array('q', sorted(flagged))
+            info.add_warning(f"Found {n_pairs} overlapping pairs of geometries in this layer", fids=flagged)
+            result.append_geodata("overlaps_in_layer", overlaps_layer)
+            result.append_info("Overlapping features", f"Found {n_pairs} overlapping pairs of geometries")
+            result.append_fids("Overlapping features", flagged)
+        else:
+            info.add_info("No overlapping geometries found")
+
+        return (result if result.has_data() else None, info)
+
+
+registry.register_artifact(registry.Artifact("dissolved", needs=("geometry",),
+        build=lambda layer, artifacts, feedback: _gaps_in_layer(layer, "gaps_in_layer", feedback=feedback)))
+registry.register_artifact(registry.Artifact("spatial_index", needs=("geometry",),
+        build=lambda layer, artifacts, feedback: build_spatial_index(layer, feedback)))
+
+registry.register(registry.Check("validity", title="Check geometry validity", category=category_name,
+        needs=("geometry",), produces=("validity_errors",), scope="feature",
+        issues=lambda result: _layer_issues(result, "validity_errors", "FID", "ERROR"),
+        run=lambda layer, artifacts, feedback: validity(layer, feedback=feedback)))
+registry.register(registry.Check("holes", title="Check for holes in geometries", category=category_name,
+        needs=("geometry",), produces=("Holes_in_geometries",), scope="feature",
+        issues=lambda result: _layer_issues(result, "Holes_in_geometries", "SOURCE_FID"),
+        visitor=lambda layer, artifacts, feedback: HolesVisitor(layer, feedback, find_gaps=False)))
+registry.register(registry.Check("gaps", title="Check for gaps between geometries", category=category_name,
+        needs=("dissolved",), produces=("gaps_in_layer",),
+        run=lambda layer, artifacts, feedback: gaps(layer, artifacts["dissolved"], feedback)))
+registry.register(registry.Check("empty", title="Check for empty geometries", category=category_name,
+        needs=("geometry",), scope="feature",
+        issues=lambda result: [(fid, None, None) for fid in result.fids.get("empty_geometries", [])],
+        visitor=lambda layer, artifacts, feedback: EmptyGeometriesVisitor(layer)))
+registry.register(registry.Check("overlaps", title="Check for overlaps", category=category_name,
+        needs=("spatial_index",), produces=("overlaps_in_layer",), scope="neighbours",
+        issues=lambda result: _layer_issues(result, "overlaps_in_layer", "FID_A", other_field="FID_B"),
+        run=lambda layer, artifacts, feedback: overlaps(layer, feedback=feedback, index=artifacts["spatial_index"])))
@@ -0,0 +1,47 @@
+from qgis.core import QgsCoordinateReferenceSystem, QgsCoordinateTransform
+from qgis.core import QgsProject, QgsRectangle, QgsGeometry
+
+from collections import namedtuple
+from functools import lru_cache
+
+
+CrsInfo = namedtuple("CrsInfo", ["crs", "transform", "bounds", "is_geographic", "has_vertical_axis", "postgis_srid"])
+
+
+def crs_key(crs: type[QgsCoordinateReferenceSystem]) -> str:
+        # canonical identity of a crs: its authority id, the WKT for crs without one
+        return crs.authid() or "WKT:" + crs.toWkt(QgsCoordinateReferenceSystem.WKT_PREFERRED)
+
+
+@lru_cache(maxsize=128)
+def _crs_info(key: str) -> CrsInfo:
+        dest_crs = QgsCoordinateReferenceSystem(key)
+
+        source_crs = QgsCoordinateReferenceSystem(4326)
+        crs_transform = QgsCoordinateTransform(source_crs, dest_crs, QgsProject.instance())
+
+        # crs bounds are given in WGS84 and have to be projected into the crs itself
+        bound_polygon = QgsGeometry.fromWkt(dest_crs.bounds().asWktPolygon())
+        bound_polygon.transform(crs_transform)
+        bbox = bound_polygon.boundingBox()
+
+        return CrsInfo(crs=dest_crs,
+                       transform=crs_transform,
+                       bounds=QgsRectangle(bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum()),
+                       is_geographic=dest_crs.isGeographic(),
+                       has_vertical_axis=dest_crs.hasVerticalAxis(),
+                       postgis_srid=dest_crs.postgisSrid())
+
+
+def crs_info(crs: type[QgsCoordinateReferenceSystem]) -> CrsInfo:
+        """Cached transform from WGS84, projected bounds and metadata of a crs, shared by the whole process."""
+        return _crs_info(crs_key(crs))
+
+
+def cache_info():
+        """Hits, misses, maxsize and current size of the crs cache."""
+        return _crs_info.cache_info()
+
+
+def cache_clear():
+        _crs_info.cache_clear()
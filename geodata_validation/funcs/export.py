@@ -0,0 +1,254 @@
+from .status import ResultStore
+from qgis.core import QgsVectorLayer, QgsVectorFileWriter, QgsFeatureRequest, QgsFeature, QgsFeedback
+from qgis.core import QgsField, QgsFields, QgsWkbTypes, QgsCoordinateTransformContext, QgsCoordinateReferenceSystem
+from qgis.PyQt.QtCore import QVariant
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import re
+
+
+FORMATS = {".gpkg": "gpkg", ".jsonl": "jsonl", ".ndjson": "jsonl", ".geojsonl": "jsonl", ".parquet": "parquet"}
+JSONL_COMPRESSION = {".gz": ("gzip", gzip.open), ".bz2": ("bz2", bz2.open), ".xz": ("xz", lzma.open)}
+
+# lists in the info output longer than this are only exported as their length, their content is in the fids or layers
+MAX_INFO_ITEMS = 1000
+
+
+def export_format(path: str) -> str:
+        (stem, ext) = os.path.splitext(path.lower())
+        if ext in JSONL_COMPRESSION:
+            ext = os.path.splitext(stem)[1]
+        if ext not in FORMATS:
+            raise ValueError(f"Unknown export format {ext}, use one of {', '.join(FORMATS)}")
+        return FORMATS[ext]
+
+
+def _value(value):
+        # NULL QVariants compare equal to None, everything json can't handle is written as text
+        if value == None:
+            return None
+        return value if isinstance(value, (bool, int, float, str)) else str(value)
+
+
+def _summary(name: str, result) -> list[dict]:
+        rows = []
+        for key, fids in result.fids.items():
+            rows.append({"check": name, "category": result.category, "analysis": result.analysis,
+                         "name": key, "count": len(fids), "info": None})
+        for key, layer in result.geodata_layer.items():
+            rows.append({"check": name, "category": result.category, "analysis": result.analysis,
+                         "name": key, "count": layer.featureCount(), "info": None})
+        for key, info in result.info_output.items():
+            count = len(info) if isinstance(info, (list, dict)) else None
+            value = None if isinstance(info, list) and len(info) > MAX_INFO_ITEMS else info
+            rows.append({"check": name, "category": result.category, "analysis": result.analysis,
+                         "name": key, "count": count, "info": json.dumps(value, default=str)})
+        return rows
+
+
+class _GpkgWriter():
+    """Writes every section to a layer of its own and the summaries to a table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.created = False
+        self.writer = None
+
+    def _create(self, layer_name: str, fields: type[QgsFields], wkb_type, crs):
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.layerName = re.sub(r"\W+", "_", layer_name).strip("_").lower()[:60]
+        options.actionOnExistingFile = (QgsVectorFileWriter.CreateOrOverwriteLayer if self.created
+                                        else QgsVectorFileWriter.CreateOrOverwriteFile)
+        writer = QgsVectorFileWriter.create(self.path, fields, wkb_type, crs, QgsCoordinateTransformContext(), options)
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            raise IOError(f"Can't write layer {layer_name} to {self.path}: {writer.errorMessage()}")
+        self.created = True
+        return writer
+
+    def begin(self, kind: str, check: str, name: str, fields: type[QgsFields], wkb_type, crs):
+        self.fields = QgsFields(fields)
+        self.flagged = kind == "flagged"
+        if self.flagged:
+            self.fields.append(QgsField("source_fid", QVariant.LongLong))
+        self.writer = self._create(f"{check}_{name}", self.fields, wkb_type, crs)
+
+    def write(self, feats: list):
+        if self.flagged:
+            out = []
+            for feat in feats:
+                new_feat = QgsFeature(self.fields)
+                new_feat.setGeometry(feat.geometry())
+                new_feat.setAttributes(feat.attributes() + [feat.id()])
+                out.append(new_feat)
+            feats = out
+        self.writer.addFeatures(feats)
+
+    def end(self):
+        # the file writer only flushes and closes when it is deleted
+        del self.writer
+        self.writer = None
+
+    def summary(self, rows: list[dict]):
+        fields = QgsFields()
+        for (name, kind) in (("check", QVariant.String), ("category", QVariant.String), ("analysis", QVariant.String),
+                             ("name", QVariant.String), ("count", QVariant.LongLong), ("info", QVariant.String)):
+            fields.append(QgsField(name, kind))
+        writer = self._create("summary", fields, QgsWkbTypes.NoGeometry, QgsCoordinateReferenceSystem())
+        for row in rows:
+            feat = QgsFeature(fields)
+            feat.setAttributes([row[field.name()] for field in fields])
+            writer.addFeature(feat)
+        del writer
+
+    def close(self):
+        pass
+
+
+class _JsonlWriter():
+    """Writes one GeoJSON feature per line, optionally compressed, and the summaries as lines of their own."""
+
+    def __init__(self, path: str, compression: str|None=None):
+        suffix = os.path.splitext(path.lower())[1]
+        if compression is None and suffix in JSONL_COMPRESSION:
+            compression = JSONL_COMPRESSION[suffix][0]
+        openers = {name: opener for (name, opener) in JSONL_COMPRESSION.values()}
+        if compression is not None and compression not in openers:
+            raise ValueError(f"Unknown compression {compression} for JSON Lines, use one of {', '.join(openers)}")
+        self.file = openers[compression](path, "wt", encoding="utf-8") if compression else open(path, "w", encoding="utf-8")
+
+    def begin(self, kind: str, check: str, name: str, fields: type[QgsFields], wkb_type, crs):
+        self.section = {"kind": kind, "check": check, "name": name}
+        self.names = fields.names()
+
+    def write(self, feats: list):
+        lines = []
+        for feat in feats:
+            geometry = json.loads(feat.geometry().asJson()) if feat.hasGeometry() else None
+            properties = {name: _value(value) for name, value in zip(self.names, feat.attributes())}
+            lines.append(json.dumps({"type": "Feature", "id": feat.id(), **self.section,
+                                     "geometry": geometry, "properties": properties}))
+        self.file.write("\n".join(lines) + "\n")
+
+    def end(self):
+        pass
+
+    def summary(self, rows: list[dict]):
+        self.file.write("".join(json.dumps({"type": "Summary", **row}) + "\n" for row in rows))
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter():
+    """Writes all sections as row groups of one table, geometries as WKB and attributes as JSON."""
+
+    def __init__(self, path: str, compression: str|None=None):
+        # pyarrow takes long to import, it is only loaded for parquet exports
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow, install it into the python environment of QGIS")
+        self.pa = pa
+        self.schema = pa.schema([("kind", pa.string()), ("check", pa.string()), ("name", pa.string()),
+                                 ("fid", pa.int64()), ("geometry", pa.binary()), ("properties", pa.string()),
+                                 ("count", pa.int64()), ("info", pa.string())])
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression or "snappy")
+
+    def _write_rows(self, rows: dict):
+        self.writer.write_table(self.pa.Table.from_pydict(rows, schema=self.schema))
+
+    def begin(self, kind: str, check: str, name: str, fields: type[QgsFields], wkb_type, crs):
+        self.section = (kind, check, name)
+        self.names = fields.names()
+
+    def write(self, feats: list):
+        (kind, check, name) = self.section
+        self._write_rows({"kind": [kind] * len(feats), "check": [check] * len(feats), "name": [name] * len(feats),
+                          "fid": [feat.id() for feat in feats],
+                          "geometry": [bytes(feat.geometry().asWkb()) if feat.hasGeometry() else None for feat in feats],
+                          "properties": [json.dumps({n: _value(v) for n, v in zip(self.names, feat.attributes())})
+                                         for feat in feats],
+                          "count": [None] * len(feats), "info": [None] * len(feats)})
+
+    def end(self):
+        pass
+
+    def summary(self, rows: list[dict]):
+        self._write_rows({"kind": ["summary"] * len(rows), "check": [row["check"] for row in rows],
+                          "name": [row["name"] for row in rows], "fid": [None] * len(rows),
+                          "geometry": [None] * len(rows), "properties": [None] * len(rows),
+                          "count": [row["count"] for row in rows], "info": [row["info"] for row in rows]})
+
+    def close(self):
+        self.writer.close()
+
+
+def _chunks(feats, chunk_size: int):
+        batch = []
+        for feat in feats:
+            batch.append(feat)
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def export_results(results: type[ResultStore], vectorlayer: type[QgsVectorLayer], path: str, compression: str|None=None,
+                   chunk_size: int=10000, feedback: type[QgsFeedback]=None) -> int:
+        """Writes flagged features, derived geometries and a summary per check to GeoPackage,
+        JSON Lines or Parquet (chosen by the file extension) and returns the number of written features.
+
+        Flagged features are read from ``vectorlayer`` by fid and written ``chunk_size``
+        features at a time, nothing is collected for the whole export in memory.
+        """
+        fmt = export_format(path)
+        if fmt == "gpkg":
+            if compression:
+                raise ValueError("GeoPackage output can't be compressed, use JSON Lines or Parquet")
+            writer = _GpkgWriter(path)
+        elif fmt == "jsonl":
+            writer = _JsonlWriter(path, compression)
+        else:
+            writer = _ParquetWriter(path, compression)
+
+        total = sum(len(fids) for result in results.values() for fids in result.fids.values())
+        total += sum(layer.featureCount() for result in results.values() for layer in result.geodata_layer.values())
+        written = 0
+        summary = []
+
+        try:
+            for check, result in results.items():
+                summary.extend(_summary(check, result))
+
+                sections = []
+                for name, fids in result.fids.items():
+                    request = QgsFeatureRequest().setFilterFids(fids.tolist())
+                    sections.append(("flagged", name, vectorlayer, request))
+                for name, layer in result.geodata_layer.items():
+                    sections.append(("derived", name, layer, QgsFeatureRequest()))
+
+                for (kind, name, layer, request) in sections:
+                    if feedback is not None and feedback.isCanceled():
+                        return written
+                    writer.begin(kind, check, name, layer.fields(), layer.wkbType(), layer.crs())
+                    for chunk in _chunks(layer.getFeatures(request), chunk_size):
+                        if feedback is not None:
+                            if feedback.isCanceled():
+                                break
+                            feedback.setProgress(100.0 * written / total if total else 0)
+                        writer.write(chunk)
+                        written += len(chunk)
+                    writer.end()
+
+            writer.summary(summary)
+        finally:
+            writer.close()
+
+        return written
@@ -0,0 +1,199 @@
+from .status import Infotext
+from .scan import FeatureVisitor, run_scan
+from . import incremental, scheduler
+from qgis.core import QgsVectorLayer, QgsFeature, QgsFeedback
+
+import hashlib
+import json
+import os
+import sqlite3
+
+
+# files that belong to a dataset next to the one that is opened
+SIDECARS = {".shp": (".shx", ".dbf", ".prj", ".cpg"), ".gpkg": ("-wal",), ".sqlite": ("-wal",)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT,
+                                  checks TEXT, output TEXT);
+CREATE TABLE IF NOT EXISTS layers (uri TEXT PRIMARY KEY, checks TEXT);
+CREATE TABLE IF NOT EXISTS features (uri TEXT, fid INTEGER, geometry BLOB, attributes BLOB,
+                                     PRIMARY KEY (uri, fid)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS issues (uri TEXT, check_name TEXT, fid INTEGER, other_fid INTEGER, detail TEXT);
+CREATE INDEX IF NOT EXISTS issues_fid ON issues (uri, check_name, fid);
+CREATE INDEX IF NOT EXISTS issues_other_fid ON issues (uri, check_name, other_fid);
+"""
+
+
+def dataset_files(path: str) -> list[str]:
+        (stem, ext) = os.path.splitext(path)
+        sidecars = [stem + sidecar if sidecar.startswith(".") else path + sidecar for sidecar in SIDECARS.get(ext.lower(), ())]
+        return [path] + [sidecar for sidecar in sidecars if os.path.exists(sidecar)]
+
+
+def file_stat(path: str) -> tuple[int, int]:
+        stats = [os.stat(name) for name in dataset_files(path)]
+        return (sum(stat.st_size for stat in stats), max(stat.st_mtime_ns for stat in stats))
+
+
+def file_digest(path: str, chunk_size: int=1 << 20) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for name in dataset_files(path):
+            with open(name, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+
+class FingerprintVisitor(FeatureVisitor):
+    """Hands the geometry and attribute digest of every feature to ``write`` in batches."""
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer], write, batch_size: int=10000):
+        super().__init__(vectorlayer)
+        self.write = write
+        self.batch_size = batch_size
+        self.batch = []
+
+    def visit(self, feat: type[QgsFeature]):
+        geometry = bytes(feat.geometry().asWkb()) if feat.hasGeometry() else b""
+        self.batch.append((feat.id(),
+                           hashlib.blake2b(geometry, digest_size=16).digest(),
+                           hashlib.blake2b(repr(feat.attributes()).encode(), digest_size=16).digest()))
+        if len(self.batch) >= self.batch_size:
+            self.write(self.batch)
+            self.batch = []
+
+    def finish(self):
+        if self.batch:
+            self.write(self.batch)
+            self.batch = []
+        return (None, None)
+
+
+class FingerprintCache():
+    """Fingerprints of validated files and features with their findings, kept in a sqlite file.
+
+    A file whose size and modification time (or, failing that, content digest) did not
+    change since it was stored is not validated again. For a changed layer the digests
+    of its features tell which features have to be checked again.
+    """
+
+    def __init__(self, path: str, timeout: float=60):
+        # several worker processes share the file, WAL lets them read while one writes
+        self.db = sqlite3.connect(path, timeout=timeout)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.executescript("""
+            CREATE TEMP TABLE IF NOT EXISTS current (fid INTEGER PRIMARY KEY, geometry BLOB, attributes BLOB);
+            CREATE TEMP TABLE IF NOT EXISTS dirty (fid INTEGER PRIMARY KEY);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def cached_output(self, path: str, checks) -> dict|None:
+        row = self.db.execute("SELECT size, mtime_ns, digest, checks, output FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None or json.loads(row[3]) != sorted(checks):
+            return None
+
+        (size, mtime_ns) = file_stat(path)
+        if (size, mtime_ns) == (row[0], row[1]):
+            return json.loads(row[4])
+        # touched but maybe not changed, the content decides
+        if size == row[0] and file_digest(path) == row[2]:
+            with self.db:
+                self.db.execute("UPDATE files SET mtime_ns = ? WHERE path = ?", (mtime_ns, path))
+            return json.loads(row[4])
+        return None
+
+    def store_output(self, path: str, checks, output: dict):
+        (size, mtime_ns) = file_stat(path)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                            (path, size, mtime_ns, file_digest(path), json.dumps(sorted(checks)),
+                             json.dumps(output, default=str)))
+
+    def _write_current(self, rows: list[tuple]):
+        self.db.executemany("INSERT INTO current VALUES (?, ?, ?)", rows)
+
+    def diff_features(self, uri: str, vectorlayer: type[QgsVectorLayer], checks,
+                      feedback: type[QgsFeedback]=None) -> tuple[set[int], set[int], bool]:
+        """Returns the changed (or added) and the removed fids of a layer since it was stored
+        and whether the layer was stored for the same checks at all."""
+        self.db.execute("DELETE FROM current")
+        run_scan(vectorlayer, [FingerprintVisitor(vectorlayer, self._write_current)], feedback=feedback)
+
+        row = self.db.execute("SELECT checks FROM layers WHERE uri = ?", (uri,)).fetchone()
+        if row is None or json.loads(row[0]) != sorted(checks):
+            return (set(), set(), False)
+
+        changed = {fid for (fid,) in self.db.execute("""
+            SELECT c.fid FROM current c LEFT JOIN features f ON f.uri = ? AND f.fid = c.fid
+            WHERE f.fid IS NULL OR f.geometry != c.geometry OR f.attributes != c.attributes""", (uri,))}
+        removed = {fid for (fid,) in self.db.execute("""
+            SELECT fid FROM features WHERE uri = ? AND fid NOT IN (SELECT fid FROM current)""", (uri,))}
+        return (changed, removed, True)
+
+    def store_features(self, uri: str, checks):
+        with self.db:
+            self.db.execute("DELETE FROM features WHERE uri = ?", (uri,))
+            self.db.execute("INSERT INTO features SELECT ?, fid, geometry, attributes FROM current", (uri,))
+            self.db.execute("INSERT OR REPLACE INTO layers VALUES (?, ?)", (uri, json.dumps(sorted(checks))))
+            self.db.execute("DELETE FROM current")
+
+    def issues(self, uri: str, check: str) -> list[tuple]:
+        return self.db.execute("SELECT fid, other_fid, detail FROM issues WHERE uri = ? AND check_name = ? ORDER BY fid, other_fid",
+                               (uri, check)).fetchall()
+
+    def replace_issues(self, uri: str, check: str, issues: list[tuple], fids=None):
+        """Replaces the findings of a check that involve one of ``fids``, all of them without ``fids``."""
+        with self.db:
+            if fids is None:
+                self.db.execute("DELETE FROM issues WHERE uri = ? AND check_name = ?", (uri, check))
+            else:
+                self.db.execute("DELETE FROM dirty")
+                self.db.executemany("INSERT INTO dirty VALUES (?)", ((fid,) for fid in fids))
+                self.db.execute("""DELETE FROM issues WHERE uri = ? AND check_name = ?
+                                   AND (fid IN (SELECT fid FROM dirty) OR other_fid IN (SELECT fid FROM dirty))""", (uri, check))
+            self.db.executemany("INSERT INTO issues VALUES (?, ?, ?, ?, ?)",
+                                ((uri, check, fid, other, None if detail is None else str(detail)) for (fid, other, detail) in issues))
+
+
+def revalidate(vectorlayer: type[QgsVectorLayer], uri: str, checks, cache: type[FingerprintCache],
+               feedback: type[QgsFeedback]=None, report=print, profiler=None) -> tuple[dict, dict, dict]:
+        """Validates a layer, checking only the features that changed since the cached run where possible.
+
+        Layer wide checks always run on the whole layer and are returned as Results by check
+        name. Feature and neighbour scoped checks are run again for changed features (and
+        their neighbours) and returned as the merged list of findings per check name.
+        """
+        feature_checks = incremental.incremental_checks(checks)
+        layer_checks = [name for name in checks if name not in feature_checks]
+
+        results = {}
+        if layer_checks:
+            results = scheduler.run_checks(vectorlayer, layer_checks, feedback, report, max_workers=1, by_check=True,
+                                           profiler=profiler)
+
+        info = Infotext()
+        (changed, removed, known) = cache.diff_features(uri, vectorlayer, feature_checks, feedback)
+        if not known:
+            found = incremental.issues_of(scheduler.run_checks(vectorlayer, feature_checks, feedback, report,
+                                                               max_workers=1, by_check=True, profiler=profiler), feature_checks)
+            for name in feature_checks:
+                cache.replace_issues(uri, name, found[name])
+        elif changed or removed:
+            info.add_info(f"{len(changed)} changed and {len(removed)} removed features since the last validation")
+            report(info)
+            found = incremental.check_features(vectorlayer, feature_checks, changed, feedback, report, profiler)
+            for name in feature_checks:
+                cache.replace_issues(uri, name, found[name], changed | removed)
+        else:
+            info.add_info("No features changed since the last validation")
+            report(info)
+
+        if feedback is not None and feedback.isCanceled():
+            return (results, {}, {})
+
+        cache.store_features(uri, feature_checks)
+        issues = {name: cache.issues(uri, name) for name in feature_checks}
+        return (results, issues, {"incremental": known, "changed_features": len(changed), "removed_features": len(removed)})
@@ -0,0 +1,131 @@
+from . import registry, scheduler
+from qgis.core import QgsVectorLayer, QgsFeatureRequest, QgsFeedback, QgsMemoryProviderUtils
+
+
+def incremental_checks(checks) -> list[str]:
+        # checks whose findings can be updated feature by feature, the others need the whole layer
+        return [name for name in checks if registry.CHECKS[name].scope != "layer"]
+
+
+def issues_of(results: dict, checks) -> dict[str, list[tuple]]:
+        # results by check name as returned by run_checks(..., by_check=True)
+        return {name: list(registry.CHECKS[name].issues(results[name])) if name in results else []
+                for name in checks}
+
+
+def with_neighbours(vectorlayer: type[QgsVectorLayer], fids) -> set[int]:
+        # features whose bounding box touches one of the given features, looked up through the provider's spatial index
+        out = set(fids)
+        request = QgsFeatureRequest().setFilterFids(list(fids)).setNoAttributes()
+        for feat in vectorlayer.getFeatures(request):
+            if not feat.hasGeometry():
+                continue
+            near = QgsFeatureRequest().setFilterRect(feat.geometry().boundingBox()).setNoAttributes()
+            out.update(other.id() for other in vectorlayer.getFeatures(near))
+        return out
+
+
+def subset_layer(vectorlayer: type[QgsVectorLayer], fids) -> tuple[QgsVectorLayer, dict[int, int]]:
+        # memory copy of some features and the fids of the source layer by fid of the copy
+        subset = QgsMemoryProviderUtils.createMemoryLayer(vectorlayer.name(), vectorlayer.fields(),
+                                                          vectorlayer.wkbType(), vectorlayer.crs())
+        feats = list(vectorlayer.getFeatures(QgsFeatureRequest().setFilterFids(list(fids))))
+        (_, added) = subset.dataProvider().addFeatures(feats)
+        return (subset, {new.id(): feat.id() for new, feat in zip(added, feats)})
+
+
+def live_checks(checks) -> list[str]:
+        # feature scoped checks and the feature scoped parts of layer wide ones
+        parts = [registry.CHECKS[name].per_feature for name in checks if registry.CHECKS[name].per_feature]
+        return incremental_checks(list(checks) + [name for name in parts if name not in checks])
+
+
+def subsets(vectorlayer: type[QgsVectorLayer], checks, fids) -> list[tuple]:
+        """Copies the features the checks have to look at for changed ``fids`` to memory layers.
+
+        Returns (check names, subset layer, source fids by subset fid) per scope. This reads
+        the layer, with its edit buffer, and belongs on the thread owning the layer.
+        """
+        out = []
+        for scope in ("feature", "neighbours"):
+            names = [name for name in checks if registry.CHECKS[name].scope == scope]
+            if not names or not fids:
+                continue
+            subset_fids = with_neighbours(vectorlayer, fids) if scope == "neighbours" else fids
+            out.append((names, *subset_layer(vectorlayer, subset_fids)))
+        return out
+
+
+def check_subsets(checks, subset_layers: list[tuple], fids, feedback: type[QgsFeedback]=None,
+                  report=print, profiler=None) -> dict[str, list[tuple]]:
+        """Runs the checks on the layers built by ``subsets`` and returns their findings by check name
+        that involve one of the given features, with the fids of the source layer."""
+        fids = set(fids)
+        issues = {name: [] for name in checks}
+
+        for (names, subset, source_fids) in subset_layers:
+            # subsets are small, the checks run one after the other on the calling thread
+            results = scheduler.run_checks(subset, names, feedback, report, max_workers=1, by_check=True, profiler=profiler)
+            for name, found in issues_of(results, names).items():
+                for (fid, other, detail) in found:
+                    fid = source_fids[fid]
+                    other = source_fids[other] if other is not None else None
+                    if fid in fids or other in fids:
+                        issues[name].append((fid, other, detail))
+
+        return issues
+
+
+def check_features(vectorlayer: type[QgsVectorLayer], checks, fids, feedback: type[QgsFeedback]=None,
+                   report=print, profiler=None) -> dict[str, list[tuple]]:
+        """Runs feature and neighbour scoped checks for some features of a layer only.
+
+        Returns the findings by check name that involve one of the given features, with
+        the fids of the source layer. Findings between two features that are not in
+        ``fids`` are left out, they did not change.
+        """
+        fids = set(fids)
+        return check_subsets(checks, subsets(vectorlayer, checks, fids), fids, feedback, report, profiler)
+
+
+class IssueSet():
+    """Running findings of checks by fid, replaced for some features at a time.
+
+    Findings between two features are kept under both fids, so they are dropped
+    as soon as one of the two features changes.
+    """
+
+    def __init__(self):
+        self.by_check = {}
+
+    def replace(self, check: str, issues: list[tuple], fids=None):
+        # findings involving one of fids are replaced, all findings of the check without fids
+        found = self.by_check.setdefault(check, {})
+        if fids is None:
+            found.clear()
+        else:
+            for fid in fids:
+                for (other, _) in found.pop(fid, ()):
+                    if other is None or other not in found:
+                        continue
+                    found[other] = [(o, detail) for (o, detail) in found[other] if o != fid]
+                    if not found[other]:
+                        del found[other]
+
+        for (fid, other, detail) in issues:
+            found.setdefault(fid, []).append((other, detail))
+            if other is not None:
+                found.setdefault(other, []).append((fid, detail))
+
+    def issues(self, check: str) -> list[tuple]:
+        found = self.by_check.get(check, {})
+        out = [(fid, other, detail) for fid, entries in found.items() for (other, detail) in entries
+               if other is None or fid < other]
+        return sorted(out, key=lambda issue: (issue[0], -1 if issue[1] is None else issue[1]))
+
+    def counts(self) -> dict[str, int]:
+        return {check: sum(1 for fid, entries in found.items() for (other, _) in entries if other is None or fid < other)
+                for check, found in self.by_check.items()}
+
+    def fids(self, check: str) -> list[int]:
+        return sorted(self.by_check.get(check, {}))
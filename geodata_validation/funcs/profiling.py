@@ -0,0 +1,182 @@
+from .status import Infotext
+
+from contextlib import contextmanager
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, the peak RSS is left out there
+    resource = None
+
+
+# profile of the step running on the current thread, read by the instrumented hot paths
+_local = threading.local()
+
+
+def peak_rss() -> int|None:
+        # peak resident set size of the whole process in bytes
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current():
+        return getattr(_local, "profile", None)
+
+
+def timed(feats):
+        """Counts the features of a provider iterator and the time spent waiting for them.
+
+        Returns ``feats`` itself when no step is profiled on this thread, so the hot
+        paths only pay for the instrumentation while profiling.
+        """
+        profile = current()
+        if profile is None:
+            return feats
+        return _timed(feats, profile)
+
+
+def _timed(feats, profile):
+        feats = iter(feats)
+        while True:
+            started = time.perf_counter()
+            try:
+                feat = next(feats)
+            except StopIteration:
+                profile.provider += time.perf_counter() - started
+                return
+            profile.provider += time.perf_counter() - started
+            profile.features += 1
+            yield feat
+
+
+class StepProfile():
+    """Timings of one step (check, shared scan or artifact) of a validation run."""
+
+    __slots__ = ("name", "kind", "wall", "cpu", "provider", "features", "rss", "visits")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.provider = 0.0
+        self.features = 0
+        self.rss = None
+        # compute time of every check fed by a shared scan
+        self.visits = {}
+
+    @property
+    def compute(self) -> float:
+        return max(self.wall - self.provider, 0.0)
+
+    @property
+    def rate(self) -> float:
+        return self.features / self.wall if self.wall > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "kind": self.kind, "wall": self.wall, "cpu": self.cpu,
+                "provider": self.provider, "compute": self.compute, "features": self.features,
+                "features_per_second": self.rate, "peak_rss_increase": self.rss, "visits": self.visits}
+
+    def render(self) -> str:
+        text = (f"{self.kind} {self.name}: wall {self.wall:.3f} s, cpu {self.cpu:.3f} s, "
+                f"provider {self.provider:.3f} s, compute {self.compute:.3f} s, "
+                f"{self.features} features ({self.rate:.0f}/s)")
+        if self.rss is not None:
+            text += f", peak RSS +{self.rss / 2**20:.1f} MB"
+        if self.visits:
+            text += " - " + ", ".join(f"{check} {seconds:.3f} s" for check, seconds in self.visits.items())
+        return text
+
+
+class Profiler():
+    """Collects the timings of every step of a validation run.
+
+    Wall and cpu time are measured for the thread running a step, time spent on the
+    provider and the number of features only where the layer is read through ``timed``.
+    The peak RSS is the one of the process, steps running at the same time share it.
+    With ``capture`` the steps of that check run under cProfile and the statistics of
+    the ``top`` functions are kept in ``stats``. Since Python 3.12 cProfile sees all
+    threads, run the checks with one worker to keep other steps out of the statistics.
+    """
+
+    def __init__(self, capture: str|None=None, top: int=25):
+        self.capture = capture
+        self.top = top
+        self.profiles = {}
+        self.stats = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, node: tuple):
+        # node of the scheduler DAG, (kind, name) with the names of all checks of a shared scan
+        (kind, name) = node
+        names = name if kind == "scan" else (name,)
+        profile = StepProfile(kind, ", ".join(names))
+        profiler = cProfile.Profile() if self.capture is not None and self.capture in names else None
+        _local.profile = profile
+        rss = peak_rss()
+        cpu = time.thread_time()
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield profile
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._keep_stats(profiler)
+            profile.wall = time.perf_counter() - started
+            profile.cpu = time.thread_time() - cpu
+            if rss is not None:
+                profile.rss = peak_rss() - rss
+            _local.profile = None
+            with self.lock:
+                self.profiles[node] = profile
+
+    def _keep_stats(self, profiler):
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def stats_text(self, sort: str="cumulative") -> str:
+        if self.stats is None:
+            return ""
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(sort).print_stats(self.top)
+        return out.getvalue()
+
+    def report(self) -> Infotext:
+        info = Infotext()
+        if not self.profiles:
+            return info
+        info.add_info("Profile of the validation run:")
+        for profile in sorted(self.profiles.values(), key=lambda p: p.wall, reverse=True):
+            info.append(profile.render())
+        if self.stats is not None:
+            info.add_info(f"cProfile of check {self.capture}, top {self.top} functions:", self.capture)
+            info.append(self.stats_text(), self.capture)
+        return info
+
+    def as_dict(self) -> dict:
+        return {"steps": [profile.as_dict() for profile in self.profiles.values()],
+                "capture": self.capture, "stats": self.stats_text() or None}
+
+    def write(self, path: str):
+        """Writes the timings as a JSON sidecar and the cProfile statistics, if any, next to it."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        if self.stats is not None:
+            self.stats.dump_stats(path + ".prof")
@@ -0,0 +1,251 @@
+from qgis.core import QgsVectorLayer, QgsFeatureRequest, QgsFields, QgsProviderRegistry, QgsDataSourceUri
+from qgis.PyQt.QtCore import QVariant
+
+from urllib.request import pathname2url
+import os
+import sqlite3
+import struct
+
+
+# field types whose values compare, count and group in sqlite exactly like the attributes of QgsFeatures.
+# dates are stored as text that QGIS parses, blobs and lists are converted, those stay on the iteration path
+EXACT_TYPES = (QVariant.Int, QVariant.UInt, QVariant.LongLong, QVariant.ULongLong,
+               QVariant.Double, QVariant.String, QVariant.Bool)
+
+SQL_EXTENSIONS = (".gpkg", ".sqlite", ".db", ".spatialite")
+
+# sqlite limits the columns of a result and the depth of an expression
+MAX_COLUMNS = 500
+
+
+def quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+
+def balanced_sum(terms: list[str]) -> str:
+        # a + b + c + ... nests one level per term, halving keeps the expression shallow for wide tables
+        if len(terms) == 1:
+            return terms[0]
+        middle = len(terms) // 2
+        return f"({balanced_sum(terms[:middle])} + {balanced_sum(terms[middle:])})"
+
+
+class SqlSource():
+    """Read only sqlite connection to the table behind a GeoPackage or SpatiaLite layer.
+
+    ``columns`` holds the quoted column of every field of the layer, None for fields that
+    are not a column of the table (joins, expressions). ``exact`` tells for every field if
+    sqlite sees the same values as the features of the layer.
+    """
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer], path: str, table: str, fid_column: str,
+                 geometry_column: str|None):
+        self.vectorlayer = vectorlayer
+        self.db = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+        self.table = quote(table)
+        self.fid = fid_column if fid_column == "rowid" else quote(fid_column)
+        self.geometry = quote(geometry_column) if geometry_column else None
+
+        names = {row[1] for row in self.db.execute(f"PRAGMA table_info({self.table})")}
+        fields = vectorlayer.fields()
+        self.columns = [quote(field.name()) if field.name() in names and fields.fieldOrigin(i) == QgsFields.OriginProvider
+                        else None for i, field in enumerate(fields)]
+        self.exact = [column is not None and field.type() in EXACT_TYPES for column, field in zip(self.columns, fields)]
+
+    def all_exact(self) -> bool:
+        return all(self.exact)
+
+    def query(self, sql: str, params: tuple=()) -> list:
+        return self.db.execute(sql, params).fetchall()
+
+    def count(self) -> int:
+        return self.query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+
+    def close(self):
+        self.db.close()
+
+
+def _table(db, kind: str) -> str|None:
+        # the only feature table of a file opened without a layer name
+        if kind == "gpkg":
+            rows = db.execute("SELECT table_name FROM gpkg_contents WHERE data_type = 'features'").fetchall()
+        else:
+            rows = db.execute("SELECT f_table_name FROM geometry_columns").fetchall()
+        return rows[0][0] if len(rows) == 1 else None
+
+
+def _geometry_column(db, kind: str, table: str) -> str|None:
+        if kind == "gpkg":
+            rows = db.execute("SELECT column_name FROM gpkg_geometry_columns WHERE lower(table_name) = lower(?)",
+                              (table,)).fetchall()
+        else:
+            rows = db.execute("SELECT f_geometry_column FROM geometry_columns WHERE lower(f_table_name) = lower(?)",
+                              (table,)).fetchall()
+        return rows[0][0] if rows else None
+
+
+def _fid_column(db, table: str, key: str|None=None) -> str|None:
+        # the fids of QGIS are the integer primary key, the rowid of tables without one
+        columns = db.execute(f"PRAGMA table_info({quote(table)})").fetchall()
+        if key:
+            return key if any(column[1] == key and column[2].upper() == "INTEGER" for column in columns) else None
+        primary_keys = [column for column in columns if column[5] > 0]
+        if not primary_keys:
+            return "rowid"
+        if len(primary_keys) == 1 and primary_keys[0][2].upper() == "INTEGER":
+            return primary_keys[0][1]
+        return None
+
+
+def sql_source(vectorlayer: type[QgsVectorLayer]) -> SqlSource|None:
+        """Opens the GeoPackage or SpatiaLite table of a layer, None if the layer can't be answered by sql.
+
+        Filtered layers and layers with pending edits are not what is in the file, they
+        are never answered by sql.
+        """
+        if vectorlayer.subsetString():
+            return None
+        edits = vectorlayer.editBuffer()
+        if edits is not None and edits.isModified():
+            return None
+
+        key = None
+        if vectorlayer.providerType() == "ogr":
+            parts = QgsProviderRegistry.instance().decodeUri("ogr", vectorlayer.source())
+            (path, table) = (parts.get("path") or "", parts.get("layerName"))
+            if parts.get("layerId") not in (None, 0) or not path.lower().endswith(SQL_EXTENSIONS):
+                return None
+            kind = "gpkg" if path.lower().endswith(".gpkg") else "sqlite"
+        elif vectorlayer.providerType() == "spatialite":
+            uri = QgsDataSourceUri(vectorlayer.source())
+            (path, table, key) = (uri.database(), uri.table(), uri.keyColumn() or None)
+            kind = "sqlite"
+        else:
+            return None
+
+        if not os.path.isfile(path):
+            return None
+        try:
+            db = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+            try:
+                table = table or _table(db, kind)
+                fid_column = _fid_column(db, table, key) if table else None
+                geometry_column = _geometry_column(db, kind, table) if fid_column else None
+            finally:
+                db.close()
+            if fid_column is None:
+                return None
+            return SqlSource(vectorlayer, path, table, fid_column, geometry_column)
+        except sqlite3.Error:
+            return None
+
+
+def _wkb_may_be_empty(blob: bytes, offset: int) -> bool:
+        # only a line with points or a polygon whose first ring has points is certainly not empty,
+        # points may hold NaN coordinates and multi geometries and collections only empty parts
+        if len(blob) < offset + 13:
+            return True
+        order = "<" if blob[offset] == 1 else ">"
+        (kind, count, first) = struct.unpack_from(order + "3I", blob, offset + 1)
+        # ISO types count Z and M in thousands, EWKB sets high bits for them
+        kind = (kind & 0x0fffffff) % 1000
+        if kind == 2:
+            return count == 0
+        if kind == 3:
+            return count == 0 or first == 0
+        return True
+
+
+def _spatialite_may_be_empty(blob: bytes) -> bool:
+        # header, srid, mbr and 0x7C, then class type and counts like WKB, the types of compressed
+        # geometries are offset by 1000000
+        order = "<" if blob[1] == 1 else ">"
+        (kind, count, first) = struct.unpack_from(order + "3I", blob, 39)
+        kind = kind % 1000
+        if kind == 2:
+            return count == 0
+        if kind == 3:
+            return count == 0 or first == 0
+        return True
+
+
+def may_be_empty(blob: bytes|None) -> bool:
+        """False only if the header of a GeoPackage, SpatiaLite or WKB blob proves the geometry has coordinates.
+
+        Everything else, NULL, flagged empty, unknown and geometries that can hide empty parts,
+        has to be confirmed by QGIS.
+        """
+        if blob is None:
+            return True
+        blob = bytes(blob)
+        if blob[:2] == b"GP" and len(blob) >= 8:
+            flags = blob[3]
+            if flags & 16:
+                return True
+            envelope = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}.get((flags >> 1) & 7)
+            return envelope is None or _wkb_may_be_empty(blob, 8 + envelope)
+        if blob[:1] == b"\x00" and len(blob) >= 51 and blob[38] == 0x7C:
+            return _spatialite_may_be_empty(blob)
+        return _wkb_may_be_empty(blob, 0)
+
+
+# the largest header may_be_empty reads: GeoPackage header, envelope and the first WKB counts
+HEADER_BYTES = 8 + 64 + 13
+
+
+def empty_candidates(source: type[SqlSource], limit: int) -> list[int]|None:
+        """Fids of features whose geometry may be empty by its blob header, in fid order.
+
+        None if there are more than ``limit`` of them, reading them one by one would take
+        longer than the scan then. Layers of points or multi geometries usually end up here.
+        """
+        source.db.create_function("may_be_empty", 1, may_be_empty, deterministic=True)
+        rows = source.query(f"SELECT {source.fid} FROM {source.table} "
+                            f"WHERE may_be_empty(substr({source.geometry}, 1, {HEADER_BYTES})) "
+                            f"ORDER BY {source.fid} LIMIT ?", (limit + 1,))
+        if len(rows) > limit:
+            return None
+        return [row[0] for row in rows]
+
+
+def empty_fids(source: type[SqlSource], fids: list[int]) -> list[int]:
+        # the candidates are read through the layer, so empty means exactly what it means to QGIS
+        if not fids:
+            return []
+        request = QgsFeatureRequest().setFilterFids(fids).setNoAttributes()
+        return sorted(feat.id() for feat in source.vectorlayer.getFeatures(request) if feat.geometry().isEmpty())
+
+
+def null_counts(source: type[SqlSource]) -> tuple[int, list[int]]:
+        # number of rows and the NULLs of every field, counted for a few hundred columns per query
+        n_rows = source.count()
+        nulls = []
+        for start in range(0, len(source.columns), MAX_COLUMNS):
+            columns = source.columns[start:start + MAX_COLUMNS]
+            counts = source.query(f"SELECT {', '.join(f'COUNT({column})' for column in columns)} FROM {source.table}")[0]
+            nulls.extend(n_rows - count for count in counts)
+        return (n_rows, nulls)
+
+
+def null_rows(source: type[SqlSource], limit: float) -> list[int]:
+        # fids of rows with at least limit NULL attributes (and at least one), in fid order
+        if not source.columns:
+            return []
+        nulls = balanced_sum([f"({column} IS NULL)" for column in source.columns])
+        rows = source.query(f"SELECT {source.fid} FROM {source.table} WHERE {nulls} >= ? ORDER BY {source.fid}",
+                            (max(limit, 1),))
+        return [row[0] for row in rows]
+
+
+def is_unique(source: type[SqlSource], column: str) -> bool:
+        # no NULLs and no value twice, an empty table has no unique column
+        (n_rows, n_values, n_distinct) = source.query(f"SELECT COUNT(*), COUNT({column}), COUNT(DISTINCT {column}) "
+                                                      f"FROM {source.table}")[0]
+        return n_rows > 0 and n_rows == n_values == n_distinct
+
+
+def duplicate_rows(source: type[SqlSource], columns: list[str]) -> list[list[int]]:
+        # fids of rows with the same values in the given columns, sorted within every group
+        columns = ", ".join(columns)
+        rows = source.query(f"SELECT group_concat({source.fid}) FROM {source.table} GROUP BY {columns} HAVING COUNT(*) > 1")
+        return [sorted(int(fid) for fid in fids.split(",")) for (fids,) in rows]
@@ -0,0 +1,129 @@
+# registry of all checks and the shared intermediate products (artifacts) they need
+
+# needs that are served by reading the features themselves, every other need is an artifact
+FEATURE_DATA = ("attributes", "geometry")
+
+
+class Check():
+    """Declaration of a check.
+
+    A check is either fed by the shared feature scan (``visitor``) or runs on its own
+    (``run``). Both are called with the layer, the dict of built artifacts and a feedback;
+    ``visitor`` returns a FeatureVisitor, ``run`` a (Result, Infotext) tuple.
+
+    ``scope`` tells what the findings for a feature depend on: the feature alone
+    ("feature"), the feature and its spatial neighbours ("neighbours") or the whole
+    layer ("layer"). Checks that are not layer wide list their findings through
+    ``issues``, which turns their Result into (fid, other fid or None, detail) tuples,
+    so they can be run again for changed features only. A layer wide check can name the
+    feature scoped check finding its per feature part in ``per_feature``, live validation
+    runs that one in its place.
+    """
+
+    scopes = ("feature", "neighbours", "layer")
+
+    def __init__(self, name: str, needs: tuple=(), produces: tuple=(), visitor=None, run=None,
+                 title: str="", category: str="", scope: str="layer", issues=None, per_feature: str|None=None):
+        if (visitor is None) == (run is None):
+            raise ValueError(f"Check {name} needs either a visitor or a run function")
+        if scope not in self.scopes:
+            raise ValueError(f"Unknown scope {scope} of check {name}")
+        if scope != "layer" and issues is None:
+            raise ValueError(f"Check {name} with scope {scope} needs an issues function")
+        self.name = name
+        self.title = title or name
+        self.category = category
+        self.needs = tuple(needs)
+        self.produces = tuple(produces)
+        self.visitor = visitor
+        self.run = run
+        self.scope = scope
+        self.issues = issues
+        self.per_feature = per_feature
+
+
+class Artifact():
+    """Declaration of an intermediate product that is built once and shared by all checks needing it."""
+
+    def __init__(self, name: str, build, needs: tuple=()):
+        self.name = name
+        self.build = build
+        self.needs = tuple(needs)
+
+
+CHECKS = {}
+ARTIFACTS = {}
+
+
+def register(check: Check) -> Check:
+    if check.name in CHECKS:
+        raise ValueError(f"Check {check.name} is already registered")
+    CHECKS[check.name] = check
+    return check
+
+
+def register_artifact(artifact: Artifact) -> Artifact:
+    if artifact.name in ARTIFACTS:
+        raise ValueError(f"Artifact {artifact.name} is already registered")
+    ARTIFACTS[artifact.name] = artifact
+    return artifact
+
+
+def load() -> dict:
+    # the check modules register their checks and artifacts on import, they are only imported when checks are needed
+    from . import GeometryChecks, DataStructureChecks, CrsChecks
+    return CHECKS
+
+
+def plan(names) -> dict[tuple, set]:
+    """Builds the DAG for the requested checks.
+
+    Nodes are ("artifact", name), ("check", name) and one ("scan", names) node that holds
+    all visitor checks. Returns the nodes in dependency order mapped to the nodes they
+    depend on.
+    """
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        raise ValueError(f"Unknown checks: {unknown}")
+
+    selected = [check for name, check in CHECKS.items() if name in names]
+    scan_checks = tuple(check.name for check in selected if check.visitor is not None)
+
+    producers = {name: ("artifact", name) for name in ARTIFACTS}
+    for check in selected:
+        for name in check.produces:
+            producers[name] = ("scan", scan_checks) if check.visitor is not None else ("check", check.name)
+
+    graph = {}
+
+    def require(needs) -> set:
+        deps = set()
+        for need in needs:
+            if need in FEATURE_DATA:
+                continue
+            if need not in producers:
+                raise ValueError(f"Nothing produces {need}")
+            node = producers[need]
+            if node not in graph and node[0] == "artifact":
+                graph[node] = set()
+                graph[node] = require(ARTIFACTS[need].needs)
+            deps.add(node)
+        return deps
+
+    if scan_checks:
+        graph[("scan", scan_checks)] = require(need for check in selected if check.visitor is not None for need in check.needs)
+
+    for check in selected:
+        if check.run is not None:
+            graph[("check", check.name)] = require(check.needs)
+
+    # kahn's algorithm, anything left over is part of a cycle
+    ordered = {}
+    while len(ordered) < len(graph):
+        ready = [node for node, deps in graph.items() if node not in ordered and deps.issubset(ordered)]
+        if not ready:
+            raise ValueError(f"Cyclic dependencies between {[node for node in graph if node not in ordered]}")
+        for node in ready:
+            ordered[node] = graph[node]
+
+    return ordered
@@ -0,0 +1,136 @@
+from .status import Result, Infotext
+from . import profiling, pushdown
+from qgis.core import QgsVectorLayer, QgsFeature, QgsFeatureRequest, QgsFeedback, QgsRectangle
+
+import sqlite3
+import time
+
+
+class FeatureVisitor():
+    """Base class for checks that are fed feature by feature from a shared scan.
+
+    Every visitor keeps its own state. ``visit`` is called once per feature of the
+    layer and ``finish`` builds the (Result, Infotext) tuple the check functions return.
+    A visitor that does not need any (more) features sets ``done`` to True, one that
+    only looks at attributes sets ``needs_geometry`` to False. ``attributes`` lists the
+    indexes of the fields ``visit`` reads, None for all of them, and ``rect`` limits the
+    features a visitor needs to a rectangle in layer crs. The scan fetches the union of
+    what its visitors need, so a visitor can still be handed more than it asked for.
+    Visitors that can be answered by sql on GeoPackage and SpatiaLite files implement
+    ``pushdown``.
+    """
+    category = ""
+    analysis = ""
+    needs_geometry = True
+    attributes = None
+    rect = None
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer]):
+        self.vectorlayer = vectorlayer
+        self.info = Infotext()
+        self.result = Result(category=self.category, analysis=self.analysis)
+        self.done = False
+
+    def pushdown(self, source: type[pushdown.SqlSource]):
+        # called before the scan, sets done if the table answered everything. queries first, state after,
+        # so a failing query leaves the visitor as it was
+        pass
+
+    def visit(self, feat: type[QgsFeature]):
+        pass
+
+    def finish(self) -> tuple[Result or None, Infotext or None]:
+        return (self.result if self.result.has_data() else None,
+                self.info or None)
+
+
+def _pushdown(vectorlayer: type[QgsVectorLayer], visitors: list, timings: dict|None=None):
+    # a whole layer scan only, a filtered request is not what the table holds
+    pending = [visitor for visitor in visitors if not visitor.done]
+    if not pending:
+        return
+    source = pushdown.sql_source(vectorlayer)
+    if source is None:
+        return
+    try:
+        for visitor in pending:
+            started = time.perf_counter()
+            try:
+                visitor.pushdown(source)
+            except sqlite3.Error:
+                # the visitor falls back to the scan
+                pass
+            if timings is not None:
+                timings[visitor] = timings.get(visitor, 0.0) + time.perf_counter() - started
+    finally:
+        source.close()
+
+
+def plan_request(visitors: list, request: type[QgsFeatureRequest]=None) -> QgsFeatureRequest:
+    """Builds the smallest request that serves all visitors of a scan.
+
+    Geometries are only fetched if a visitor needs them, attributes only for the fields
+    the visitors read and features only in the union of their rectangles, if every
+    visitor has one. Invalid geometries are never skipped, finding them is what the
+    checks are for. The filters of a given ``request`` are kept.
+    """
+    request = QgsFeatureRequest(request) if request is not None else QgsFeatureRequest()
+    request.setInvalidGeometryCheck(QgsFeatureRequest.GeometryNoCheck)
+
+    if not any(visitor.needs_geometry for visitor in visitors):
+        request.setFlags(request.flags() | QgsFeatureRequest.NoGeometry)
+
+    if all(visitor.attributes is not None for visitor in visitors):
+        request.setSubsetOfAttributes(sorted({idx for visitor in visitors for idx in visitor.attributes}))
+
+    rects = [visitor.rect for visitor in visitors]
+    if rects and all(rect is not None for rect in rects) and request.filterRect().isNull():
+        extent = QgsRectangle(rects[0])
+        for rect in rects[1:]:
+            extent.combineExtentWith(rect)
+        request.setFilterRect(extent)
+
+    return request
+
+
+def run_scan(vectorlayer: type[QgsVectorLayer], visitors: list, request: type[QgsFeatureRequest]=None,
+             feedback: type[QgsFeedback]=None, progress_interval: int=1000, timings: dict|None=None,
+             sql: bool=True) -> list:
+    # iterate the layer only once and hand every feature to all visitors still interested in it,
+    # with timings the seconds spent in every visitor are summed up by visitor
+    if sql and request is None:
+        _pushdown(vectorlayer, visitors, timings)
+    active = [visitor for visitor in visitors if not visitor.done]
+
+    # planned after the pushdown, visitors answered by the table don't widen the request
+    request = plan_request(active, request)
+
+    if feedback is not None:
+        request.setFeedback(feedback)
+        total = vectorlayer.featureCount()
+        step = 100.0 / total if total > 0 else 0
+
+    if active:
+        for i, feat in enumerate(profiling.timed(vectorlayer.getFeatures(request))):
+            # cancellation is checked for every feature, progress signals are throttled
+            if feedback is not None:
+                if feedback.isCanceled():
+                    break
+                if i % progress_interval == 0:
+                    feedback.setProgress(i * step)
+
+            if timings is None:
+                for visitor in active:
+                    visitor.visit(feat)
+            else:
+                for visitor in active:
+                    started = time.perf_counter()
+                    visitor.visit(feat)
+                    timings[visitor] = timings.get(visitor, 0.0) + time.perf_counter() - started
+
+            if any(visitor.done for visitor in active):
+                active = [visitor for visitor in active if not visitor.done]
+                if not active:
+                    break
+
+    return [visitor.finish() for visitor in visitors]
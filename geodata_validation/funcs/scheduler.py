@@ -0,0 +1,252 @@
+from .status import Infotext
+from .scan import run_scan
+from . import registry, profiling
+from qgis.core import QgsApplication, QgsMapLayer, QgsVectorLayer, QgsFeedback
+from qgis.core import QgsVectorLayerFeatureSource, QgsFeatureRequest
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import os
+import traceback
+
+
+# names of all registered checks, in the order they are reported. the per feature parts of layer
+# wide checks are left out, the layer wide checks report their findings as well
+CHECKS = tuple(name for name, check in registry.load().items()
+               if name not in {other.per_feature for other in registry.CHECKS.values()})
+
+
+class _Edits():
+    # all a snapshot keeps of the edit buffer: whether there were unsaved edits
+
+    def __init__(self, modified: bool):
+        self.modified = modified
+
+    def isModified(self) -> bool:
+        return self.modified
+
+
+class LayerSnapshot():
+    """The part of a layer the checks read, taken on the main thread for the worker threads.
+
+    Project layers and their edit buffers must only be touched on the main thread, while a
+    validation runs the user may go on editing them. The features come from a
+    QgsVectorLayerFeatureSource, which copies the edits and can be read on any thread with
+    the fids of the layer, the metadata the checks ask for is copied as well.
+    """
+
+    def __init__(self, vectorlayer: type[QgsVectorLayer]):
+        self.feature_source = QgsVectorLayerFeatureSource(vectorlayer)
+        self._fields = vectorlayer.fields()
+        self._crs = vectorlayer.crs()
+        self._wkb_type = vectorlayer.wkbType()
+        self._geometry_type = vectorlayer.geometryType()
+        self._extent = vectorlayer.extent()
+        self._feature_count = vectorlayer.featureCount()
+        self._primary_keys = vectorlayer.primaryKeyAttributes()
+        self._source = vectorlayer.source()
+        self._name = vectorlayer.name()
+        self._provider_type = vectorlayer.providerType()
+        self._subset = vectorlayer.subsetString()
+        edits = vectorlayer.editBuffer()
+        self._edits = _Edits(True) if edits is not None and edits.isModified() else None
+
+    def getFeatures(self, request: type[QgsFeatureRequest]=None):
+        return self.feature_source.getFeatures(request if request is not None else QgsFeatureRequest())
+
+    def allFeatureIds(self) -> list[int]:
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setNoAttributes()
+        return [feat.id() for feat in self.getFeatures(request)]
+
+    def fields(self):
+        return self._fields
+
+    def crs(self):
+        return self._crs
+
+    def wkbType(self):
+        return self._wkb_type
+
+    def geometryType(self):
+        return self._geometry_type
+
+    def extent(self):
+        return self._extent
+
+    def featureCount(self) -> int:
+        return self._feature_count
+
+    def primaryKeyAttributes(self) -> list[int]:
+        return self._primary_keys
+
+    def source(self) -> str:
+        return self._source
+
+    def name(self) -> str:
+        return self._name
+
+    def providerType(self) -> str:
+        return self._provider_type
+
+    def subsetString(self) -> str:
+        return self._subset
+
+    def editBuffer(self):
+        return self._edits
+
+
+def reopenable(vectorlayer: type[QgsVectorLayer]) -> bool:
+        # memory layers and unsaved edits only exist in this layer object (or its snapshot), opening the source
+        # again loses them
+        if vectorlayer.providerType() == "memory":
+            return False
+        edits = vectorlayer.editBuffer()
+        return edits is None or not edits.isModified()
+
+
+def layer_for_thread(vectorlayer: type[QgsVectorLayer]) -> QgsVectorLayer:
+        # layers are not thread safe, file based ones are opened again for the thread using them.
+        # the others are shared, run_checks runs their steps one after the other. on worker threads
+        # project layers are only read through a LayerSnapshot taken on the main thread
+        if not reopenable(vectorlayer):
+            return vectorlayer
+        return QgsVectorLayer(vectorlayer.source(), vectorlayer.name(), vectorlayer.providerType())
+
+
+def _to_main_thread(layers):
+        # layers created on a worker thread have to be handed over to the main thread by that worker
+        app = QgsApplication.instance()
+        if app is None:
+            return
+        for layer in layers:
+            if isinstance(layer, QgsMapLayer) and layer.thread() != app.thread():
+                layer.moveToThread(app.thread())
+
+
+def _run_node(node: tuple, vectorlayer: type[QgsVectorLayer], artifacts: dict, feedback: type[QgsFeedback],
+              profiler: type[profiling.Profiler]=None):
+        if profiler is None:
+            return _run_step(node, vectorlayer, artifacts, feedback)
+
+        with profiler.measure(node) as profile:
+            return _run_step(node, vectorlayer, artifacts, feedback, profile.visits if node[0] == "scan" else None)
+
+
+def _run_step(node: tuple, vectorlayer: type[QgsVectorLayer], artifacts: dict, feedback: type[QgsFeedback],
+              timings: dict|None=None):
+        (kind, name) = node
+        layer = layer_for_thread(vectorlayer)
+
+        if kind == "artifact":
+            value = registry.ARTIFACTS[name].build(layer, artifacts, feedback)
+            _to_main_thread(value if isinstance(value, (tuple, list)) else [value])
+            return value
+
+        if kind == "scan":
+            visitors = [registry.CHECKS[check].visitor(layer, artifacts, feedback) for check in name]
+            by_visitor = {} if timings is not None else None
+            outputs = run_scan(layer, visitors, feedback=feedback, timings=by_visitor)
+            if timings is not None:
+                timings.update({check: by_visitor.get(visitor, 0.0) for check, visitor in zip(name, visitors)})
+        else:
+            outputs = [registry.CHECKS[name].run(layer, artifacts, feedback)]
+
+        for (result, _) in outputs:
+            if result:
+                _to_main_thread(result.geodata_layer.values())
+        return outputs
+
+
+def _describe(node: tuple) -> str:
+        (kind, name) = node
+        if kind == "artifact":
+            return f"Building shared {name}..."
+        if kind == "scan":
+            return f"Scanning the features of the layer for: {', '.join(name)}"
+        return f"Running check {name}..."
+
+
+def _report(report, level: str, text: str, check: str|None=None, trace: bool=False):
+        info = Infotext()
+        getattr(info, f"add_{level}")(text, check)
+        if trace:
+            info.append(traceback.format_exc(), check)
+        report(info)
+
+
+def run_checks(vectorlayer: type[QgsVectorLayer], checks, feedback: type[QgsFeedback]=None, report=print,
+               max_workers: int|None=None, poll_interval: float=0.2, by_check: bool=False,
+               profiler: type[profiling.Profiler]=None) -> dict:
+        """Runs the requested checks on a layer and returns the results by analysis name
+        (or by check name with ``by_check``).
+
+        Every shared artifact is built once, nodes of the DAG that don't depend on each
+        other run at the same time on a thread pool, one after the other for layers that
+        can't be opened again per thread (memory layers and layers with unsaved edits).
+        Called off the main thread ``vectorlayer`` has to be a LayerSnapshot of the layer.
+        The Infotext log of every node is handed to ``report`` on the calling thread as
+        soon as the node is done, with a ``profiler`` followed by the timings of the node.
+        """
+        graph = registry.plan(checks)
+        feedback = feedback or QgsFeedback()
+        if not reopenable(vectorlayer):
+            max_workers = 1
+
+        artifacts = {}
+        results = {}
+        finished, failed = set(), set()
+
+        # one feedback per node, cancellation and progress are passed on by polling because
+        # the worker threads have no event loop to deliver queued signals
+        node_feedbacks = {node: QgsFeedback() for node in graph}
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+            running = {}
+            while len(finished) + len(failed) < len(graph):
+                if feedback.isCanceled():
+                    for node_feedback in node_feedbacks.values():
+                        node_feedback.cancel()
+                    break
+
+                for node, deps in graph.items():
+                    if node in running.values() or node in finished or node in failed:
+                        continue
+                    if deps & failed:
+                        failed.add(node)
+                        _report(report, "error", f"Skipped {node[1]} because a step it depends on failed", node[1])
+                    elif deps.issubset(finished):
+                        _report(report, "info", _describe(node), node[1] if node[0] == "check" else None)
+                        running[pool.submit(_run_node, node, vectorlayer, artifacts, node_feedbacks[node], profiler)] = node
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                feedback.setProgress(sum(f.progress() for f in node_feedbacks.values()) / len(node_feedbacks))
+
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception:
+                        failed.add(node)
+                        _report(report, "error", f"{_describe(node)} failed!", node[1] if node[0] == "check" else None, trace=True)
+                        continue
+
+                    finished.add(node)
+                    if profiler is not None and node in profiler.profiles:
+                        _report(report, "info", profiler.profiles[node].render(), node[1] if node[0] == "check" else None)
+                    if node[0] == "artifact":
+                        artifacts[node[1]] = value
+                        continue
+                    names = node[1] if node[0] == "scan" else (node[1],)
+                    for name, (result, info) in zip(names, value):
+                        if info:
+                            info.tag(name)
+                            report(info)
+                        if result:
+                            results[name if by_check else result.analysis] = result
+
+        if feedback.isCanceled():
+            _report(report, "warning", "Validation was cancelled, results are incomplete.")
+
+        return results
@@ -1,45 +1,126 @@
+from qgis.core import QgsVectorLayer, QgsFeatureRequest
 
+from array import array
+import time
 
 
 
+
+
+
+# severities of log events, plain text ranks with info but is rendered without a prefix
+SEVERITIES = {"text": 0, "info": 1, "warning": 2, "error": 3}
+PREFIXES = ("", "INFO: ", "WARNING: ", "ERROR: ")
+
+
+class Event():
+    """One record of an Infotext log, its text is only rendered when it is shown."""
+
+    __slots__ = ("severity", "text", "check", "fids", "time")
+
+    def __init__(self, severity: int, text: str, check: str|None=None, fids=None):
+        self.severity = severity
+        self.text = text
+        self.check = check
+        self.fids = array('q', fids) if fids is not None else None
+        self.time = time.time()
+
+    def render(self, max_fids: int=20) -> str:
+        if not self.text and not self.fids:
+            return "\n"
+        text = f"{PREFIXES[self.severity]}{self.text}"
+        if self.fids:
+            more = f" ... ({len(self.fids) - max_fids} more)" if len(self.fids) > max_fids else ""
+            text += f" \nfids: {', '.join(map(str, self.fids[:max_fids]))}{more}"
+        return f"{text} \n"
+
+    def as_dict(self) -> dict:
+        return {"severity": [name for name, rank in SEVERITIES.items() if rank == self.severity][0],
+                "text": self.text,
+                "check": self.check,
+                "fids": self.fids.tolist() if self.fids is not None else None,
+                "time": self.time}
+
+
 class Infotext():
+    """Log of events with a severity, the check they belong to and the fids they refer to.
+
+    Events are kept as records, the text is rendered on demand: only the events from
+    ``start`` on and optionally only those of a minimum severity.
+    """
+
     def __init__(self, text: str="") -> None:
-        self.content = self._set_content(text)
-    
-    def _set_content(self, text):
-        if len(text.strip()) < 2 or text.strip()[-2:] != "\n":
-            return text
-        else:
-            return text + "\n"
-            
+        self.events = []
+        if text.strip():
+            self.append(text.strip())
+
+    def __str__(self) -> str:
+        return self.content
+
+    @property
+    def content(self) -> str:
+        return self.render()
+
+    def render(self, start: int=0, min_severity: str="text") -> str:
+        rank = SEVERITIES[min_severity]
+        return "".join(event.render() for event in self.events[start:] if event.severity >= rank)
+
+    def filter(self, min_severity: str="text", check: str|None=None) -> list[Event]:
+        rank = SEVERITIES[min_severity]
+        return [event for event in self.events if event.severity >= rank and (check is None or event.check == check)]
+
     def newline(self):
-        self.content += "\n"
+        self.events.append(Event(SEVERITIES["text"], ""))
 
-    def append(self, text: str|None):
+    def append(self, text: str|None, check: str|None=None, fids=None):
         if not text:
-            pass
-        self.content += f"{text} \n"
+            return
+        self.events.append(Event(SEVERITIES["text"], text, check, fids))
+
+    def add_info(self, text: str, check: str|None=None, fids=None):
+        self.events.append(Event(SEVERITIES["info"], text, check, fids))
 
-    def add_info(self, text: str):
-        self.content += f"INFO: {text} \n"
+    def add_warning(self, text: str, check: str|None=None, fids=None):
+        self.events.append(Event(SEVERITIES["warning"], text, check, fids))
 
-    def add_warning(self, text: str):
-        self.content += f"WARNING: {text} \n"
+    def add_error(self, text: str, check: str|None=None, fids=None):
+        self.events.append(Event(SEVERITIES["error"], text, check, fids))
 
-    def add_error(self, text: str):
-        self.content += f"ERROR: {text} \n"
+    def extend(self, other: "Infotext"):
+        self.events.extend(other.events)
+
+    def tag(self, check: str):
+        # events are written by the checks without knowing under which name they run
+        for event in self.events:
+            if event.check is None:
+                event.check = check
+
+    def as_dicts(self) -> list[dict]:
+        return [event.as_dict() for event in self.events]
 
     def clear(self):
-        self.content = ""
+        self.events = []
 
 
 
 class Result():
-    def __init__(self, category: str, analysis: str, geodata_layer: dict={}, info_output: dict={}):
+    """Result of one check.
+
+    Flagged features are kept as arrays of fids in ``fids``, their attributes and
+    geometries are only read from the layer when they are looked at (``features``).
+    """
+
+    __slots__ = ("category", "analysis", "geodata_layer", "info_output", "fids")
+
+    def __init__(self, category: str, analysis: str, geodata_layer: dict|None=None, info_output: dict|None=None):
         self.category = category
         self.analysis = analysis
-        self.geodata_layer = geodata_layer # dict of keys (names) and values (geodata_layer)
-        self.info_output = info_output # dict of keys (names) and values (info)
+        self.geodata_layer = {} if geodata_layer is None else geodata_layer # dict of keys (names) and values (geodata_layer)
+        self.info_output = {} if info_output is None else info_output # dict of keys (names) and values (info)
+        self.fids = {} # dict of keys (names) and values (array of fids)
+
+    def has_data(self) -> bool:
+        return bool(self.geodata_layer or self.info_output or self.fids)
 
     def append_geodata(self, name: str, geodata):
         if name not in self.geodata_layer:
@@ -52,9 +133,55 @@ class Result():
             self.info_output[name] = info
         else:
             raise ValueError(f"Key name already exists in this dictionary - {self.info_output.keys()}")
-    
-    def reset_data(self):
-        if len(self.geodata_layer) > 0 or len(self.info_output) > 0:
-            self.geodata_layer.clear()
-            self.info_output.clear()
 
+    def append_fids(self, name: str, fids):
+        if name not in self.fids:
+            self.fids[name] = fids if isinstance(fids, array) else array('q', fids)
+        else:
+            raise ValueError(f"Key name already exists in this dictionary - {self.fids.keys()}")
+
+    def features(self, vectorlayer: type[QgsVectorLayer], name: str, attributes: list[str]|None=None,
+                 geometry: bool=True):
+        # the flagged features are read from the layer, only with the attributes and geometry asked for
+        request = QgsFeatureRequest().setFilterFids(self.fids[name].tolist())
+        if not geometry:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+        if attributes is not None:
+            request.setSubsetOfAttributes(attributes, vectorlayer.fields())
+        return vectorlayer.getFeatures(request)
+
+
+class ResultStore():
+    """Results of one validation run by check name, every run gets a store of its own."""
+
+    __slots__ = ("source", "started", "results")
+
+    def __init__(self, source: str="", results: dict|None=None):
+        self.source = source
+        self.started = time.time()
+        self.results = {} if results is None else results
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.results
+
+    def __getitem__(self, name: str) -> Result:
+        return self.results[name]
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def items(self):
+        return self.results.items()
+
+    def values(self):
+        return self.results.values()
+
+    def flagged(self, name: str) -> array:
+        # all fids flagged by a check, each fid once
+        fids = set()
+        for values in self.results[name].fids.values():
+            fids.update(values)
+        return array('q', sorted(fids))
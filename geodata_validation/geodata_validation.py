@@ -24,20 +24,15 @@
 from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
-from qgis import processing
-from qgis.core import Qgis
+from qgis.core import Qgis, QgsApplication, QgsProject, QgsVectorLayer
 
 # Initialize Qt resources from file resources.py
 from .resources import *
-# Import the code for the dialog
-from .geodata_validation_dialog import ValidateGeodataDialog
-from .funcs import GeometryChecks, DataStructureChecks, CrsChecks
+# the dialog, the tasks and the check modules are imported on first use, QGIS starts faster without them
 from .funcs import status
 
 import os.path
-
-# ONLY DURING DEVELOPEMENT!!!!!!
-import traceback
+import tempfile
 
 
 class ValidateGeodata:
@@ -72,9 +67,15 @@ class ValidateGeodata:
         self.menu = self.tr(u'&Geodata Validation')
 
         self.validated = False
-        self.results = [] # list of Result objects
-        self.results = {} # change to results list of results objects (make result class that can be analysed standardised)
+        self.results = status.ResultStore() # results of the last validation run by check name
         self.infotext = status.Infotext("")
+        self.task = None
+        self.export_task = None
+        self.validated_layer = None
+        self.validated_checks = set()
+        self.live = None
+        self.provider = None
+        self.results_model = None
 
         # Check if plugin was started the first time in current QGIS session
         # Must be set in initGui() to survive plugin reloads
@@ -171,30 +172,72 @@ class ValidateGeodata:
         return action
 
     def __clicked_export__(self):
-        self.infotext.append("Clicked Export functionality... not implemented yet")
-
-        if self.validated:
-            if self.dlg.OutputFilePath.filePath() != '':
-                self.infotext.append(f" Output path: {self.dlg.OutputFilePath.filePath()}")
+        info = status.Infotext()
+        output_path = self.dlg.OutputFilePath.filePath()
+
+        if not self.validated:
+            info.add_warning("Need to validate geodata beforehand")
+        elif output_path == '':
+            info.add_error("Missing output file!")
+        elif self.export_task is not None:
+            info.add_warning("An export is already running")
+        else:
+            from .funcs import export
+            from .validation_task import ExportTask
+            try:
+                export.export_format(output_path)
+            except ValueError as e:
+                info.add_error(str(e))
             else:
-                self.infotext.add_error("Missing output file!")
+                # the export streams from the source layer in the background, large runs don't block QGIS
+                info.add_info(f"Exporting results to {output_path}")
+                self.export_task = ExportTask(self.results, self.validated_layer, output_path)
+                self.export_task.taskCompleted.connect(self.__export_finished__)
+                self.export_task.taskTerminated.connect(self.__export_finished__)
+                QgsApplication.taskManager().addTask(self.export_task)
+        self.__report__(info)
+
+    def __export_finished__(self):
+        task = self.export_task
+        self.export_task = None
+        info = status.Infotext()
+        if task.error:
+            info.add_error("Export failed!")
+            info.append(task.error)
+        elif task.isCanceled():
+            info.add_warning("Export was cancelled, the output file is incomplete.")
         else:
-            self.infotext.add_warning("Need to validate geodata beforehand")
-        self.dlg.OutputTextArea.setPlainText(self.infotext.content)
+            info.add_info(f"Exported {task.written} features to {task.path}")
+        self.__report__(info)
     
     def __clicked_cancel__(self):
+        # a running validation is stopped, not only the dialog closed
+        if self.task is not None:
+            self.task.cancel()
+        if self.export_task is not None:
+            self.export_task.cancel()
+        self.__stop_live__()
+
         # need to clean up infos first because states are stored (like text editor box, set crs, ...)
         self.infotext.clear()
-        self.dlg.OutputTextArea.setPlainText(self.infotext.content)
+        self.__show_output__()
         #self.dlg.checkBoxGeometry.setChecked(True)
         #self.dlg.checkBoxDataStructure.setChecked(True)
         #self.dlg.checkBoxCrs.setChecked(True)
         self.dlg.close()
     
     def __validate_geodata__(self):
+        if self.task is not None:
+            info = status.Infotext()
+            info.add_warning("A validation is already running")
+            self.__report__(info)
+            return
+
         # clear all previous validaton results first
+        self.__stop_live__()
         self.infotext.clear()
-        self.results.clear()
+        self.results = status.ResultStore()
+        self.__show_results__()
 
         input_file = self.dlg.InputFilePath.filePath()
         self.infotext.add_info(f"input filepath: {input_file}")
@@ -202,83 +245,11 @@ class ValidateGeodata:
         map_layer = self.dlg.SelectMapLayer.currentLayer()
         self.infotext.add_info(f"selected_project_layer: {map_layer}")
 
-        input_layer = map_layer or input_file
+        input_layer = map_layer or QgsVectorLayer(input_file, os.path.basename(input_file), "ogr")
         self.infotext.add_info(f"input_layer: {input_layer}")
         
         # totally forgot about other geometry types. Have to deal with points and lines too
 
-        
-        # geometryy checks
-        if self.dlg.checkBoxGeometryValidity.isChecked():
-            
-            #TOTALLY STILL TO DO IN GENERALL
-            self.infotext.add_info("Checking validity of geometry!")
-            
-            try:
-                checkvalidity = processing.run("qgis:checkvalidity", {
-                    'INPUT_LAYER':'D:\\Jo\\PythonProjekte\\QGIS\\testdata\\nogeometry.shp',
-                    'METHOD':1,
-                    'IGNORE_RING_SELF_INTERSECTION':False,
-                    'VALID_OUTPUT':'TEMPORARY_OUTPUT',
-                    'INVALID_OUTPUT':'TEMPORARY_OUTPUT',
-                    'ERROR_OUTPUT':'TEMPORARY_OUTPUT'})
-                
-                self.infotext.add_info("...")
-
-                check_valid_result = status.Result('check_validity')
-
-                for k in checkvalidity.keys():
-                    if 'OUTPUT' in k: 
-                        checkvalidity[k].setName('CheckValid_' + k)
-                
-
-                
-                if checkvalidity['ERROR_COUNT'] > 0: 
-                    self.infotext.add_warning(f"{checkvalidity['ERROR_COUNT']} errors found!")
-                if checkvalidity['INVALID_COUNT'] > 0:
-                    self.infotext.add_warning(f"{checkvalidity['INVALID_COUNT']} invalid gemetries found!")
-
-            except:
-                self.infotext.add_error("Running qgis algorithm check validity failed")
-        
-
-        if self.dlg.checkBoxGeoHoles.isChecked():
-            try:
-                (result, info) = GeometryChecks.holes(input_layer)
-            except Exception:
-                self.infotext.add_error(f"Checking for Holes in Geometries and layer failed!")
-                self.infotext.append(f"{traceback.format_exc()}")
-
-
-        if self.dlg.checkBoxGeoEmpty.isChecked():
-            pass
-
-
-        if self.dlg.checkBoxGeoOverlaps.isChecked():
-            pass
-
-        
-        # data structure checks
-        if self.dlg.checkBoxDSIntegrity.isChecked():
-            # Problem bei mehrmaliger Durchführung nach schließen mit cancel --> siehe diese Funktion!!!!!
-            self.infotext.add_info("Checking the data structure!")
-            self.infotext.add_info("Checking if attributes or objects with mostly NULL values exist...")
-            try:
-                (null_geodata, null_info) = DataStructureChecks.null_vals(vectorlayer=input_layer)
-                if null_info:
-                    self.infotext.append(null_info.content)
-                if null_geodata:
-                    # DEAL WITH RESULTINGGEODATA IF THERE ARE SOME
-                    pass
-
-            except Exception as e:
-                self.infotext.add_error(f"Failed to test for null values")
-                self.infotext.append(f"{traceback.format_exc()}")
-        
-        if self.dlg.checkBoxDSDuplicates.isChecked():
-            pass
-        
-
         # crs checks
         if self.dlg.checkBoxCrs.isChecked():
             self.infotext.add_info("checking and characterizing the crs")
@@ -289,13 +260,77 @@ class ValidateGeodata:
                 self.infotext.add_info(f"Crs: {crs}")
             else:
                 self.infotext.add_warning("no Crs chosen")
-        
-        if self.dlg.checkBoxCrsBounds.isChecked():
-            pass
-        
-        self.dlg.OutputTextArea.setPlainText(self.infotext.content)
 
-        self.validated = True
+        self.__show_output__()
+
+        checks = set()
+        if self.dlg.checkBoxGeometryValidity.isChecked():
+            checks.add("validity")
+        if self.dlg.checkBoxGeoHoles.isChecked():
+            checks.update(("holes", "gaps"))
+        if self.dlg.checkBoxGeoEmpty.isChecked():
+            checks.add("empty")
+        if self.dlg.checkBoxGeoOverlaps.isChecked():
+            checks.add("overlaps")
+        if self.dlg.checkBoxDSIntegrity.isChecked():
+            checks.update(("nulls", "oid"))
+        if self.dlg.checkBoxDSDuplicates.isChecked():
+            checks.add("duplicates")
+        if self.dlg.checkBoxCrsBounds.isChecked():
+            checks.add("crs_bounds")
+
+        # the timings of a profiled run are written next to the export file or to the temp directory
+        profile_path = None
+        if self.dlg.checkBoxProfile.isChecked():
+            output_path = self.dlg.OutputFilePath.filePath()
+            profile_path = (output_path if output_path else os.path.join(tempfile.gettempdir(), input_layer.name())) + ".profile.json"
+            self.infotext.add_info(f"Profiling the checks, timings are written to {profile_path}")
+            self.__show_output__()
+
+        # the checks run as a background task so QGIS stays usable, output arrives piece by piece
+        from .validation_task import ValidationTask
+        self.validated = False
+        task = ValidationTask(input_layer, checks, profile_path)
+        task.reported.connect(self.__report__)
+        # the handlers get the task that finished, self.task may already belong to the next one
+        task.taskCompleted.connect(lambda: self.__validation_finished__(task))
+        task.taskTerminated.connect(lambda: self.__validation_finished__(task))
+        self.task = task
+        self.dlg.ButtonValidate.setEnabled(False)
+        QgsApplication.taskManager().addTask(task)
+
+    def __report__(self, info: type[status.Infotext]):
+        # only the new events are rendered and appended, the output is never rebuilt while checks are running
+        start = len(self.infotext.events)
+        self.infotext.extend(info)
+        text = self.infotext.render(start, self.__min_severity__()).rstrip("\n")
+        if text:
+            self.dlg.OutputTextArea.append(text)
+
+    def __min_severity__(self) -> str:
+        return ("text", "warning", "error")[max(self.dlg.comboBoxSeverity.currentIndex(), 0)]
+
+    def __show_output__(self):
+        # renders the whole log, while checks are running only new events are appended in __report__
+        self.dlg.OutputTextArea.setPlainText(self.infotext.render(min_severity=self.__min_severity__()))
+
+    def __validation_finished__(self, task):
+        if self.task is task:
+            self.task = None
+            self.dlg.ButtonValidate.setEnabled(True)
+        if task.error:
+            info = status.Infotext()
+            info.add_error("Validation failed!")
+            info.append(task.error)
+            self.__report__(info)
+        self.results = task.results
+        self.validated = not task.isCanceled() and task.error is None
+
+        self.validated_layer = task.layer
+        self.validated_checks = task.checks
+        self.__show_results__()
+        if self.dlg.checkBoxLive.isChecked():
+            self.__start_live__()
 
         # run all the different validaton algorithms
         # 1) check for validity (processing.run("qgis:checkvalidity"))
@@ -320,8 +355,61 @@ class ValidateGeodata:
         # out = dict and it will contain all 3 layers and all 3 values
 
 
+    def __show_results__(self):
+        # the table reads the flagged fids from the result store, grouped by check and optionally for one check only
+        self.results_model.set_results(self.results, self.validated_layer, self.dlg.comboBoxResultCheck.currentData())
+
+        self.dlg.comboBoxResultCheck.blockSignals(True)
+        self.dlg.comboBoxResultCheck.clear()
+        self.dlg.comboBoxResultCheck.addItem("All checks", None)
+        for name in self.results_model.checks:
+            self.dlg.comboBoxResultCheck.addItem(name, name)
+        self.dlg.comboBoxResultCheck.setCurrentIndex(max(self.dlg.comboBoxResultCheck.findData(self.results_model.check), 0))
+        self.dlg.comboBoxResultCheck.blockSignals(False)
+
+    def __selected_results__(self):
+        # only layers of the project show a selection on the map canvas
+        layer = self.validated_layer
+        if layer is None or QgsProject.instance().mapLayer(layer.id()) is None:
+            return
+        ranges = [(sel.top(), sel.bottom()) for sel in self.dlg.ResultsTable.selectionModel().selection()]
+        layer.selectByIds(self.results_model.fids_in_ranges(ranges).tolist())
+
+    def __zoom_to_results__(self):
+        if self.validated_layer is not None and self.validated_layer.selectedFeatureCount() > 0:
+            self.iface.mapCanvas().zoomToSelected(self.validated_layer)
+
+    def __start_live__(self):
+        # edits of a validated project layer are followed from here on, starting with its results
+        self.__stop_live__()
+        if not self.validated or self.validated_layer is not self.dlg.SelectMapLayer.currentLayer():
+            return
+        from .live_validation import LiveValidator
+        self.live = LiveValidator(self.validated_layer, self.validated_checks, self.results)
+        self.live.reported.connect(self.__report__)
+        self.live.start()
+
+    def __stop_live__(self):
+        if self.live is not None:
+            self.live.stop()
+            self.live = None
+
+    def __toggled_live__(self, checked: bool):
+        if checked:
+            self.__start_live__()
+        else:
+            self.__stop_live__()
+
+    def initProcessing(self):
+        """Registers the checks as algorithms of the Processing toolbox."""
+        from .processing_provider import ValidateGeodataProvider
+        self.provider = ValidateGeodataProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+
+
     def initGui(self):
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
+        self.initProcessing()
 
         icon_path = ':/plugins/geodata_validation/icon.png'
         self.add_action(
@@ -340,6 +428,9 @@ class ValidateGeodata:
                 self.tr(u'&Geodata Validation'),
                 action)
             self.iface.removeToolBarIcon(action)
+        if self.provider:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+        self.__stop_live__()
 
 
     def run(self):
@@ -348,6 +439,9 @@ class ValidateGeodata:
         # Create the dialog with elements (after translation) and keep reference
         # Only create GUI ONCE in callback, so that it will only load when the plugin is started
         if self.first_start == True:
+            from .geodata_validation_dialog import ValidateGeodataDialog
+            from .results_model import ResultsTableModel
+
             self.first_start = False
             self.dlg = ValidateGeodataDialog()
 
@@ -356,21 +450,32 @@ class ValidateGeodata:
             self.dlg.ButtonValidate.clicked.connect(self.__validate_geodata__)
             
             self.dlg.ButtonCancel.clicked.connect(self.__clicked_cancel__)
+
+            self.dlg.checkBoxLive.toggled.connect(self.__toggled_live__)
+
+            self.dlg.comboBoxSeverity.addItems(["All messages", "Warnings and errors", "Errors"])
+            self.dlg.comboBoxSeverity.currentIndexChanged.connect(self.__show_output__)
+
+            # flagged features are only fetched from the results when the table is scrolled to them
+            self.results_model = ResultsTableModel()
+            self.dlg.ResultsTable.setModel(self.results_model)
+            self.dlg.ResultsTable.selectionModel().selectionChanged.connect(self.__selected_results__)
+            self.dlg.ResultsTable.doubleClicked.connect(self.__zoom_to_results__)
+            self.dlg.comboBoxResultCheck.addItem("All checks", None)
+            self.dlg.comboBoxResultCheck.currentIndexChanged.connect(self.__show_results__)
             
             self.dlg.CrsSelector.setMessage("Optional - can be used to check Crs against this selection")
             #self.dlg.CrsSelector.setNotSetText("Optional - can be used to check Crs against this selection")
             #self.dlg.CrsSelector.setOptionVisible(1, False)
             
-            self.dlg.OutputFilePath.setFilter("Text (*.txt)")
+            self.dlg.OutputFilePath.setFilter("GeoPackage (*.gpkg);;JSON Lines (*.jsonl *.jsonl.gz *.jsonl.bz2 *.jsonl.xz);;Parquet (*.parquet)")
 
             self.dlg.SelectMapLayer.setAllowEmptyLayer(allowEmpty=True, text='no project layer')
             self.dlg.SelectMapLayer.setFilters(Qgis.LayerFilter.VectorLayer)
         
         
-        # show the dialog
+        # show the dialog, it is not modal so QGIS can be used while a validation is running
         self.dlg.show()
-        # Run the dialog event loop
-        running = self.dlg.exec_()
 
 
     
\ No newline at end of file
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ LiveValidator
+                                 A QGIS plugin
+ Vaildate geodata in repect to geometry, coordinate reference system and data structure
+                              -------------------
+        begin                : 2025-02-16
+        copyright            : (C) 2025 by Jo Ritter
+        email                : tempmail@mail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+from qgis.core import QgsApplication, QgsVectorLayer
+
+from .funcs import incremental, registry
+from .funcs.status import Infotext
+from .validation_task import LiveCheckTask
+
+import time
+
+
+class LiveValidator(QObject):
+    """Validates the features of a layer again while it is edited.
+
+    Edits are collected from the signals of the layer and checked together once
+    editing pauses for ``delay`` ms. Only feature and neighbour scoped checks (and the
+    per feature parts of layer wide ones) are run, for the edited features and their
+    neighbours, and merged into ``issues``. The edited features are copied on the GUI
+    thread, the checks run as a background task, one at a time.
+    """
+
+    reported = pyqtSignal(object)
+
+    def __init__(self, vectorlayer: QgsVectorLayer, checks, results: dict|None=None, delay: int=250):
+        super().__init__()
+        self.vectorlayer = vectorlayer
+        self.checks = incremental.live_checks(checks)
+        self.partial = [name for name in checks if name not in self.checks and registry.CHECKS[name].per_feature]
+        self.skipped = [name for name in checks if name not in self.checks and name not in self.partial]
+
+        # the results of the last full validation by check name are the starting point,
+        # a per feature part starts from the result of its layer wide check
+        results = dict(results.items()) if results else {}
+        for name in self.partial:
+            results.setdefault(registry.CHECKS[name].per_feature, results.get(name))
+        self.issues = incremental.IssueSet()
+        for name, found in incremental.issues_of({name: result for name, result in results.items() if result}, self.checks).items():
+            self.issues.replace(name, found)
+
+        self.changed = set()
+        self.removed = set()
+        # every fid touched in the edit session, these are checked again when the edits are rolled back
+        self.edited = set()
+        self.task = None
+        self.running = False
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.validate)
+
+        self.connections = [(vectorlayer.featureAdded, self.__changed__),
+                            (vectorlayer.geometryChanged, self.__changed__),
+                            (vectorlayer.attributeValueChanged, self.__changed__),
+                            (vectorlayer.featureDeleted, self.__removed__),
+                            (vectorlayer.committedFeaturesAdded, self.__committed__),
+                            (vectorlayer.afterRollBack, self.__rolled_back__),
+                            (vectorlayer.willBeDeleted, self.stop)]
+
+    def start(self):
+        self.running = True
+        for signal, slot in self.connections:
+            signal.connect(slot)
+        if self.skipped:
+            self.__report__(f"Live validation skips the layer wide checks {', '.join(self.skipped)}")
+        if self.partial:
+            self.__report__(f"Live validation checks only the single records for {', '.join(self.partial)}")
+        self.__report__(f"Live validation of {', '.join(self.checks)} started")
+
+    def stop(self):
+        self.running = False
+        self.timer.stop()
+        if self.task is not None:
+            self.task.cancel()
+        for signal, slot in self.connections:
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+
+    def __changed__(self, fid: int, *args):
+        self.changed.add(fid)
+        self.edited.add(fid)
+        self.timer.start()
+
+    def __removed__(self, fid: int):
+        self.changed.discard(fid)
+        self.removed.add(fid)
+        self.edited.add(fid)
+        self.timer.start()
+
+    def __committed__(self, layer_id: str, features: list):
+        # added features get their final fids on commit, the temporary (negative) ones are gone
+        self.removed.update(fid for fid in self.edited if fid < 0)
+        self.changed.update(feat.id() for feat in features)
+        self.edited.clear()
+        self.timer.start()
+
+    def __rolled_back__(self):
+        self.removed.update(fid for fid in self.edited if fid < 0)
+        self.changed.update(fid for fid in self.edited if fid >= 0)
+        self.edited.clear()
+        self.timer.start()
+
+    def validate(self):
+        # edits made while a task is running are checked once it is done
+        if self.task is not None or (not self.changed and not self.removed):
+            return
+        started = time.perf_counter()
+        (changed, removed) = (self.changed, self.removed)
+        (self.changed, self.removed) = (set(), set())
+
+        # the layer and its edit buffer are only read here, the task gets copies of the edited features
+        task = LiveCheckTask(self.checks, incremental.subsets(self.vectorlayer, self.checks, changed), changed)
+        task.taskCompleted.connect(lambda: self.__checked__(task, changed, removed, started))
+        task.taskTerminated.connect(lambda: self.__checked__(task, changed, removed, started))
+        self.task = task
+        QgsApplication.taskManager().addTask(task)
+
+    def __checked__(self, task: LiveCheckTask, changed: set, removed: set, started: float):
+        self.task = None
+        if not self.running:
+            return
+        if task.found is None:
+            # edits made while the task was running were not picked up by the timer
+            pending = bool(self.changed or self.removed)
+            if task.error:
+                info = Infotext()
+                info.add_error("Live validation failed, the edited features are checked again with the next edits!")
+                info.append(task.error)
+                self.reported.emit(info)
+            self.changed |= changed - self.removed
+            self.removed |= removed
+            # a cancelled run is retried right away, a failed one would most likely fail again
+            if pending or not task.error:
+                self.timer.start()
+            return
+
+        before = self.issues.counts()
+        for name in self.checks:
+            self.issues.replace(name, task.found[name], changed | removed)
+        if self.changed or self.removed:
+            self.timer.start()
+
+        after = self.issues.counts()
+        counts = ", ".join(f"{name}: {after.get(name, 0)} ({after.get(name, 0) - before.get(name, 0):+d})"
+                           for name in self.checks)
+        self.__report__(f"Checked {len(changed)} edited features in {(time.perf_counter() - started) * 1000:.0f} ms - {counts}")
+
+    def __report__(self, text: str):
+        info = Infotext()
+        info.add_info(text)
+        self.reported.emit(info)
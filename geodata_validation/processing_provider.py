@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ValidateGeodataProvider
+                                 A QGIS plugin
+ Vaildate geodata in repect to geometry, coordinate reference system and data structure
+                              -------------------
+        begin                : 2025-02-16
+        copyright            : (C) 2025 by Jo Ritter
+        email                : tempmail@mail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import (QgsProcessingProvider,
+                       QgsProcessingAlgorithm,
+                       QgsProcessingException,
+                       QgsProcessingParameterVectorLayer,
+                       QgsProcessingParameterFeatureSink,
+                       QgsProcessingOutputNumber,
+                       QgsProcessingOutputString,
+                       QgsFeatureSink)
+
+from .funcs import registry
+from .funcs.status import Infotext, ResultStore, SEVERITIES
+
+import os
+
+
+class ValidationCheckAlgorithm(QgsProcessingAlgorithm):
+    """Processing algorithm running one registered check.
+
+    Every layer the check produces is offered as a feature sink, the text report and
+    the number of flagged issues are returned as outputs. An issue is a feature of the
+    input layer flagged by the check, counted once however often it is flagged. Checks of
+    the layer as a whole, like gaps or the columns of NULL values, flag no features and
+    return 0, their findings are in the report and the produced layers.
+    """
+
+    INPUT = 'INPUT'
+    REPORT = 'REPORT'
+    ISSUES = 'ISSUES'
+
+    def __init__(self, check: type[registry.Check]):
+        super().__init__()
+        self.check = check
+
+    def createInstance(self):
+        return ValidationCheckAlgorithm(self.check)
+
+    def name(self):
+        return self.check.name
+
+    def displayName(self):
+        return self.tr(self.check.title)
+
+    def group(self):
+        return self.tr(self.check.category)
+
+    def groupId(self):
+        return self.check.category.lower().replace(" ", "_")
+
+    def shortHelpString(self):
+        return self.tr(f"{self.check.title}. Produces: {', '.join(self.check.produces) or 'a report only'}. "
+                       "Issues are the flagged features of the input layer, each counted once.")
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterVectorLayer(self.INPUT, self.tr('Input layer')))
+        for name in self.check.produces:
+            self.addParameter(QgsProcessingParameterFeatureSink(name.upper(), self.tr(name.replace("_", " ")), optional=True))
+        self.addOutput(QgsProcessingOutputString(self.REPORT, self.tr('Report')))
+        self.addOutput(QgsProcessingOutputNumber(self.ISSUES, self.tr('Number of flagged features')))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        if layer is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+
+        log = Infotext()
+
+        def report(info):
+            log.extend(info)
+            for event in info.events:
+                if event.severity == SEVERITIES["error"]:
+                    feedback.reportError(event.render().strip(), False)
+                elif event.severity == SEVERITIES["warning"]:
+                    feedback.pushWarning(event.render().strip())
+                else:
+                    feedback.pushInfo(event.render().strip())
+
+        # batch processing already runs one algorithm per row, the checks of one row stay on one thread
+        from .funcs import scheduler
+        results = ResultStore(layer.source(), scheduler.run_checks(layer, [self.check.name], feedback, report=report,
+                                                                   max_workers=1, by_check=True))
+        if feedback.isCanceled():
+            return {}
+
+        outputs = {self.REPORT: log.content,
+                   self.ISSUES: len(results.flagged(self.check.name)) if self.check.name in results else 0}
+        for result in results.values():
+            for name, result_layer in result.geodata_layer.items():
+                if name.upper() not in parameters or parameters[name.upper()] is None:
+                    continue
+                (sink, dest_id) = self.parameterAsSink(parameters, name.upper(), context,
+                                                       result_layer.fields(), result_layer.wkbType(), result_layer.crs())
+                if sink is None:
+                    continue
+                for feat in result_layer.getFeatures():
+                    if feedback.isCanceled():
+                        break
+                    sink.addFeature(feat, QgsFeatureSink.FastInsert)
+                outputs[name.upper()] = dest_id
+
+        return outputs
+
+
+class ValidateGeodataProvider(QgsProcessingProvider):
+    """Processing provider offering every registered check as an algorithm."""
+
+    def loadAlgorithms(self):
+        # the checks that are parts of other checks for single features are not offered on their own
+        from .funcs import scheduler
+        for name in scheduler.CHECKS:
+            self.addAlgorithm(ValidationCheckAlgorithm(registry.CHECKS[name]))
+
+    def id(self):
+        return 'geodata_validation'
+
+    def name(self):
+        return self.tr('Geodata Validation')
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'icon.png'))
+
+    def longName(self):
+        return self.name()
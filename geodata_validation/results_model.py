@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ResultsTableModel
+                                 A QGIS plugin
+ Vaildate geodata in repect to geometry, coordinate reference system and data structure
+                              -------------------
+        begin                : 2025-02-16
+        copyright            : (C) 2025 by Jo Ritter
+        email                : tempmail@mail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import Qt, QAbstractTableModel, QModelIndex
+from qgis.core import QgsVectorLayer, QgsFeatureRequest
+
+from .funcs.status import ResultStore
+
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """Table of the features flagged in a validation run, one row per check finding and fid.
+
+    Rows are not copied out of the result store, a row is looked up in the fid arrays of
+    the results when it is shown and rows are handed to the view in batches while it
+    scrolls. Attributes of a feature are only read for its tooltip.
+    """
+
+    columns = ("Check", "Finding", "FID")
+
+    def __init__(self, batch_size: int=1000, max_tooltip_fields: int=20):
+        super().__init__()
+        self.batch_size = batch_size
+        self.max_tooltip_fields = max_tooltip_fields
+        self.set_results(ResultStore(), None)
+
+    def set_results(self, results: ResultStore, vectorlayer: QgsVectorLayer|None, check: str|None=None):
+        self.beginResetModel()
+        self.results = results
+        self.vectorlayer = vectorlayer
+        self.checks = [name for name, result in results.items() if any(len(fids) > 0 for fids in result.fids.values())]
+        self.check = check if check in self.checks else None
+        # one group per fid array, grouped by check
+        self.groups = [(name, key, fids) for name, result in results.items() if self.check in (None, name)
+                       for key, fids in result.fids.items() if len(fids) > 0]
+        self.starts = [0] + list(accumulate(len(fids) for (_, _, fids) in self.groups))
+        self.total = self.starts.pop()
+        self.loaded = min(self.batch_size, self.total)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        n = min(self.batch_size, self.total - self.loaded)
+        if n <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + n - 1)
+        self.loaded += n
+        self.endInsertRows()
+
+    def _locate(self, row: int) -> tuple[int, int]:
+        group = bisect_right(self.starts, row) - 1
+        return (group, row - self.starts[group])
+
+    def fid(self, row: int) -> int:
+        (group, offset) = self._locate(row)
+        return self.groups[group][2][offset]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        (group, offset) = self._locate(index.row())
+        (check, key, fids) = self.groups[group]
+
+        if role == Qt.DisplayRole:
+            return (check, key, fids[offset])[index.column()]
+        if role == Qt.ToolTipRole and self.vectorlayer is not None:
+            return self._details(fids[offset])
+        return None
+
+    def _details(self, fid: int) -> str|None:
+        # attributes are read from the layer for this one feature only when they are looked at
+        request = QgsFeatureRequest(fid).setFlags(QgsFeatureRequest.NoGeometry)
+        feat = next(self.vectorlayer.getFeatures(request), None)
+        if feat is None:
+            return None
+        names = self.vectorlayer.fields().names()[:self.max_tooltip_fields]
+        return "\n".join(f"{name}: {value}" for name, value in zip(names, feat.attributes()))
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section]
+        return None
+
+    def fids_in_ranges(self, ranges: list[tuple[int, int]]) -> array:
+        """Returns the fids of the rows in the (top, bottom) ranges, each fid once."""
+        fids = set()
+        for (top, bottom) in ranges:
+            row = top
+            while row <= bottom:
+                (group, offset) = self._locate(row)
+                group_fids = self.groups[group][2]
+                end = min(len(group_fids), offset + bottom - row + 1)
+                fids.update(group_fids[offset:end])
+                row += end - offset
+        return array('q', sorted(fids))
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""Tests for the synthetic layers and the comparison of benchmarks.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+from ..benchmark import synthetic
+from ..benchmark.bench import compare, main
+
+
+class SyntheticTest(unittest.TestCase):
+    """Test the features of synthetic layers."""
+
+    def test_deterministic(self):
+        """Test that the same arguments give the same features."""
+        first = list(synthetic.features(100, seed=3, nulls=0.1, holes=0.2, invalid=0.1))
+        second = list(synthetic.features(100, seed=3, nulls=0.1, holes=0.2, invalid=0.1))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, list(synthetic.features(100, seed=4, nulls=0.1, holes=0.2, invalid=0.1)))
+
+    def test_defects(self):
+        """Test that defects are planted in their shares and change the geometry as expected."""
+        feats = list(synthetic.features(2000, vertices=4, extra_fields=2, nulls=0.1, holes=0.1, empty=0.1, gaps=0.1))
+        counts = {}
+        for (rings, attributes, defects) in feats:
+            self.assertEqual(len(attributes), 6)
+            for defect in defects:
+                counts[defect] = counts.get(defect, 0) + 1
+            if "holes" in defects:
+                self.assertEqual(len(rings), 2)
+            elif "empty" in defects:
+                self.assertEqual(rings, [])
+            else:
+                self.assertEqual(len(rings), 1)
+                # 4 vertices per side and the closing one
+                self.assertEqual(len(rings[0][0]), 17)
+            if "nulls" in defects:
+                self.assertEqual(attributes[1:], [None] * 5)
+        for defect in ("nulls", "holes", "empty", "gaps"):
+            self.assertGreater(counts[defect], 150)
+            self.assertLess(counts[defect], 250)
+
+    def test_unknown_defect(self):
+        """Test that unknown defects and shares above 1 are rejected."""
+        with self.assertRaises(ValueError):
+            list(synthetic.features(10, slivers=0.1))
+        with self.assertRaises(ValueError):
+            list(synthetic.features(10, holes=0.6, gaps=0.6))
+
+
+class CompareTest(unittest.TestCase):
+    """Test that regressions above the threshold are flagged."""
+
+    def test_compare(self):
+        """Test time and memory regressions and runs missing in the baseline."""
+        mb = 2**20
+        baseline = {"runs": {"validity@1000": {"wall": 1.0, "peak_rss_increase": 100 * mb},
+                             "nulls@1000": {"wall": 1.0, "peak_rss_increase": 1 * mb}}}
+        current = {"runs": {"validity@1000": {"wall": 1.2, "peak_rss_increase": 200 * mb},
+                            "nulls@1000": {"wall": 2.0, "peak_rss_increase": 10 * mb},
+                            "gaps@1000": {"wall": 5.0, "peak_rss_increase": 1000 * mb}}}
+        regressions = compare(baseline, current, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("nulls@1000: wall"))
+        self.assertTrue(regressions[1].startswith("validity@1000: peak RSS"))
+
+    def test_empty_baseline(self):
+        """Test that comparing with a baseline without any of the runs fails."""
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for (name, runs) in (("baseline", {}), ("current", {"nulls@1000": {"wall": 1.0}})):
+                paths.append(os.path.join(directory, f"{name}.json"))
+                with open(paths[-1], "w", encoding="utf-8") as f:
+                    json.dump({"runs": runs}, f)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(["compare", *paths]), 2)
+                self.assertEqual(main(["compare", paths[1], paths[1]]), 0)
+                self.assertEqual(main(["compare", os.path.join(directory, "missing.json"), paths[1]]), 2)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(SyntheticTest), unittest.makeSuite(CompareTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,77 @@
+# coding=utf-8
+"""Tests for the file discovery of the batch command line.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from .. import cli
+from ..cli import discover
+
+
+class DiscoverTest(unittest.TestCase):
+    """Test that vector files are found recursively."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp = tempfile.TemporaryDirectory()
+        for name in ("a.shp", "a.dbf", "sub/b.GPKG", "sub/deeper/c.geojson", "notes.txt", "reports/old.gpkg"):
+            path = os.path.join(self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.tmp.cleanup()
+
+    def test_discover(self):
+        """Test that only vector files are returned, sidecar files are skipped."""
+        found = [os.path.relpath(path, self.tmp.name) for path in discover([self.tmp.name])]
+        self.assertEqual(found, ["a.shp", os.path.join("reports", "old.gpkg"),
+                                 os.path.join("sub", "b.GPKG"), os.path.join("sub", "deeper", "c.geojson")])
+
+    def test_discover_excludes_output(self):
+        """Test that the output directory is not searched."""
+        found = discover([self.tmp.name], exclude=os.path.join(self.tmp.name, "reports"))
+        self.assertFalse(any("reports" in path for path in found))
+
+
+class ArgumentsTest(unittest.TestCase):
+    """Test that wrong check names are rejected before any worker is started."""
+
+    def _main(self, *argv):
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(SystemExit) as raised:
+                cli.main([directory, "-o", os.path.join(directory, "reports")] + list(argv))
+        return raised.exception.code, stderr.getvalue()
+
+    def test_unknown_check(self):
+        """Test that an unknown check is a usage error."""
+        (code, stderr) = self._main("-c", "empty", "emtpy")
+        self.assertEqual(code, 2)
+        self.assertIn("unknown checks: emtpy", stderr)
+
+    def test_cprofile_not_run(self):
+        """Test that the profiled check has to be one of the checks that are run."""
+        (code, stderr) = self._main("-c", "empty", "--cprofile", "holes")
+        self.assertEqual(code, 2)
+        self.assertIn("--cprofile holes", stderr)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(DiscoverTest), unittest.makeSuite(ArgumentsTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""Tests for the crs bounds check and the cache of crs transforms.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+from unittest import mock
+
+from qgis.core import QgsCoordinateReferenceSystem, QgsPointXY
+
+from ..funcs import crs_cache
+from ..funcs.scan import run_scan
+from ..funcs.CrsChecks import CrsBoundsVisitor
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+
+class CrsBoundsTest(unittest.TestCase):
+    """Test which features lie out of the bounds of the crs of their layer."""
+
+    def test_extent_inside(self):
+        """Test that no feature is read if the layer extent lies inside the bounds."""
+        layer = memory_layer("Point", ["id:integer"], [([1], "POINT(500000 5500000)"), ([2], "POINT(600000 5600000)")])
+        visitor = CrsBoundsVisitor(layer)
+        self.assertTrue(visitor.done)
+        (result, info) = run_scan(layer, [visitor])[0]
+        self.assertIsNone(result)
+        self.assertEqual(len(visitor.fids), 0)
+        self.assertIn("layer extent lies inside the bounds", info.content)
+
+    def test_out_of_bounds(self):
+        """Test the features out of bounds, with and without numpy."""
+        rows = [([1], "POINT(10 50)"), ([2], "POINT(200 10)"), ([3], None), ([4], "LINESTRING(170 0, 175 95)"),
+                ([5], "POINT(-10 -50)")]
+        layer = memory_layer("Geometry", ["id:integer"], rows, crs="EPSG:4326")
+        (result, _) = run_scan(layer, [CrsBoundsVisitor(layer)])[0]
+        self.assertEqual(list(result.fids["Geometies out of bounds"]), [2])
+
+        # a line partly out of bounds is not flagged, only boxes entirely outside are
+        with mock.patch.dict("sys.modules", {"numpy": None}):
+            (result, _) = run_scan(layer, [CrsBoundsVisitor(layer)])[0]
+        self.assertEqual(list(result.fids["Geometies out of bounds"]), [2])
+
+
+class CrsCacheTest(unittest.TestCase):
+    """Test that transforms and bounds are built once per crs."""
+
+    def setUp(self):
+        """Runs before each test."""
+        crs_cache.cache_clear()
+
+    def test_hits_and_misses(self):
+        """Test that equal crs objects share an entry and other crs get one of their own."""
+        first = crs_cache.crs_info(QgsCoordinateReferenceSystem("EPSG:25832"))
+        second = crs_cache.crs_info(QgsCoordinateReferenceSystem("EPSG:25832"))
+        self.assertIs(first, second)
+        self.assertEqual(crs_cache.cache_info()[:2], (1, 1))
+
+        crs_cache.crs_info(QgsCoordinateReferenceSystem("EPSG:4326"))
+        self.assertEqual(crs_cache.cache_info()[:2], (1, 2))
+        self.assertEqual(crs_cache.cache_info().currsize, 2)
+
+        crs_cache.cache_clear()
+        self.assertEqual(crs_cache.cache_info().currsize, 0)
+
+    def test_info(self):
+        """Test the projected bounds and the metadata of a crs."""
+        info = crs_cache.crs_info(QgsCoordinateReferenceSystem("EPSG:25832"))
+        self.assertFalse(info.is_geographic)
+        self.assertEqual(info.crs.authid(), "EPSG:25832")
+        self.assertTrue(info.bounds.contains(QgsPointXY(500000, 5500000)))
+        self.assertFalse(info.bounds.contains(QgsPointXY(10, 50)))
+        self.assertTrue(crs_cache.crs_info(QgsCoordinateReferenceSystem("EPSG:4326")).is_geographic)
+
+    def test_key(self):
+        """Test that a crs without authority id is keyed by its WKT."""
+        self.assertEqual(crs_cache.crs_key(QgsCoordinateReferenceSystem("EPSG:4326")), "EPSG:4326")
+        crs = QgsCoordinateReferenceSystem.fromProj("+proj=tmerc +lat_0=0 +lon_0=7.25 +k=1 +x_0=0 +y_0=0 +ellps=GRS80 +units=m")
+        self.assertTrue(crs_cache.crs_key(crs).startswith("WKT:"))
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(CrsBoundsTest), unittest.makeSuite(CrsCacheTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
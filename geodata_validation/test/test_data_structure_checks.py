@@ -0,0 +1,133 @@
+# coding=utf-8
+"""Tests for the data structure checks on small memory layers with known answers.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from ..funcs.scan import run_scan
+from ..funcs.DataStructureChecks import OidVisitor, NullValuesVisitor, _UniqueColumns, _compact_key
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+FIELDS = ["id:integer", "name:string", "code:string"]
+
+
+class OidTest(unittest.TestCase):
+    """Test which attributes can identify the objects of a layer."""
+
+    def test_unique_columns(self):
+        """Test that columns with a repeated value or a NULL are no oids."""
+        layer = memory_layer("Point", FIELDS, [([1, "a", "x"], "POINT(0 0)"), ([2, "a", None], "POINT(1 1)"),
+                                               ([3, "b", "y"], "POINT(2 2)")])
+        visitor = OidVisitor(layer)
+        self.assertEqual(visitor.attributes, [0, 1, 2])
+        (result, _) = run_scan(layer, [visitor])[0]
+        self.assertEqual(result.info_output["Potential OIDs"], ["id"])
+
+    def test_empty_layer(self):
+        """Test that no column of an empty layer is taken for an oid."""
+        layer = memory_layer("Point", FIELDS, [])
+        visitor = OidVisitor(layer)
+        self.assertTrue(visitor.done)
+        (result, info) = run_scan(layer, [visitor])[0]
+        self.assertIsNone(result)
+        self.assertIn("No attribute can be used as an object identifier", info.content)
+
+    def test_unknown_feature_count(self):
+        """Test that columns are not unique if the scan saw no feature."""
+        layer = memory_layer("Point", FIELDS, [([1, "a", "x"], "POINT(0 0)")])
+        visitor = OidVisitor(layer)
+        layer.dataProvider().truncate()
+        (result, _) = run_scan(layer, [visitor])[0]
+        self.assertIsNone(result)
+
+
+class UniqueColumnsTest(unittest.TestCase):
+    """Test the keys of values and the unique columns with one memory budget."""
+
+    def test_keys(self):
+        """Test that values hash() mixes up stay apart and unhashable values get a key too."""
+        self.assertNotEqual(_compact_key(-1.0), _compact_key(-2.0))
+        self.assertNotEqual(_compact_key(1), _compact_key("1"))
+        self.assertEqual(_compact_key(2**40), 2**40)
+        self.assertEqual(_compact_key({"a": [1, 2]}), _compact_key({"a": [1, 2]}))
+        self.assertNotEqual(_compact_key([1, 2]), _compact_key([2, 1]))
+
+    def test_spilled(self):
+        """Test collisions found in memory, in the buffer and against the spilled keys."""
+        columns = _UniqueColumns([0, 1, 2], memory_limit=6, buffer_size=4)
+        for key in range(3):
+            for idx in (0, 1, 2):
+                self.assertTrue(columns.add(idx, key))
+        self.assertIsNotNone(columns.db)
+        self.assertEqual(columns.held, 3)
+
+        # a key repeating a spilled one is found with the next flush, one in the buffer right away
+        self.assertTrue(columns.add(1, 0))
+        self.assertEqual(columns.collisions(), [1])
+        columns.drop(1)
+
+        self.assertTrue(columns.add(2, 10))
+        self.assertFalse(columns.add(2, 10))
+        self.assertTrue(columns.add(0, 2))
+        self.assertEqual(columns.collisions(), [])
+        self.assertEqual(columns.unique(), [2])
+        self.assertIsNone(columns.db)
+
+    def test_in_memory(self):
+        """Test that without spilling the columns without a repeated key are unique."""
+        columns = _UniqueColumns([3, 5])
+        self.assertTrue(columns.add(3, 1))
+        self.assertTrue(columns.add(5, 1))
+        self.assertFalse(columns.add(5, 1))
+        columns.drop(5)
+        self.assertEqual(columns.unique(), [3])
+
+
+class NullValuesTest(unittest.TestCase):
+    """Test the records and the columns with mostly NULL values."""
+
+    def setUp(self):
+        """Runs before each test."""
+        rows = [([None, None, None], "POINT(0 0)"), ([1, None, None], "POINT(1 1)"), ([2, None, "x"], "POINT(2 2)"),
+                ([None, None, None], None), ([4, None, "y"], "POINT(4 4)")]
+        self.layer = memory_layer("Point", FIELDS, rows)
+
+    def test_null_rows_and_columns(self):
+        """Test the fids of records above the threshold and the counts of the columns above it."""
+        (result, _) = run_scan(self.layer, [NullValuesVisitor(self.layer)])[0]
+        self.assertEqual(list(result.fids["null objects"]), [1, 4])
+        self.assertEqual(result.info_output["null attributes"], {"name": 5})
+
+        (result, _) = run_scan(self.layer, [NullValuesVisitor(self.layer, threshold=0.5)])[0]
+        self.assertEqual(list(result.fids["null objects"]), [1, 2, 4])
+        self.assertEqual(result.info_output["null attributes"], {"name": 5, "code": 3})
+
+    def test_rows_only(self):
+        """Test that without the per column part only the records are reported."""
+        (result, _) = run_scan(self.layer, [NullValuesVisitor(self.layer, per_column=False)])[0]
+        self.assertEqual(list(result.fids["null objects"]), [1, 4])
+        self.assertNotIn("null attributes", result.info_output)
+
+    def test_no_nulls(self):
+        """Test that a layer without NULLs gives no result."""
+        layer = memory_layer("Point", FIELDS, [([1, "a", "x"], "POINT(0 0)")])
+        (result, _) = run_scan(layer, [NullValuesVisitor(layer)])[0]
+        self.assertIsNone(result)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(OidTest), unittest.makeSuite(UniqueColumnsTest), unittest.makeSuite(NullValuesTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,134 @@
+# coding=utf-8
+"""Tests for the export of validation results.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+import gzip
+import importlib.util
+import json
+import os
+import tempfile
+
+from qgis.core import QgsVectorLayer
+
+from ..funcs.export import export_format, export_results
+from ..funcs.scan import run_scan
+from ..funcs.status import ResultStore
+from ..funcs.GeometryChecks import HolesVisitor
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+
+class ExportFormatTest(unittest.TestCase):
+    """Test that the export format follows the file extension."""
+
+    def test_formats(self):
+        """Test the supported extensions, compressed JSON Lines included."""
+        self.assertEqual(export_format("/tmp/results.gpkg"), "gpkg")
+        self.assertEqual(export_format("/tmp/results.JSONL"), "jsonl")
+        self.assertEqual(export_format("/tmp/results.jsonl.gz"), "jsonl")
+        self.assertEqual(export_format("/tmp/results.parquet"), "parquet")
+
+    def test_unknown_format(self):
+        """Test that unknown extensions are rejected."""
+        with self.assertRaises(ValueError):
+            export_format("/tmp/results.txt")
+
+
+class ExportResultsTest(unittest.TestCase):
+    """Test that written results read back as the flagged features, the derived layers and the summary."""
+
+    def setUp(self):
+        """Runs the holes check on a layer with holes in its second and third feature."""
+        self.dir = tempfile.TemporaryDirectory()
+        self.layer = memory_layer("Polygon", ["name:string", "value:integer"], [
+            (["a", 1], "POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))"),
+            (["b", None], "POLYGON((2 0, 6 0, 6 4, 2 4, 2 0), (3 1, 4 1, 4 2, 3 2, 3 1))"),
+            (["c", 3], "POLYGON((7 0, 11 0, 11 4, 7 4, 7 0), (8 1, 9 1, 9 2, 8 2, 8 1), (8 3, 9 3, 9 3.5, 8 3.5, 8 3))")])
+        (result, _) = run_scan(self.layer, [HolesVisitor(self.layer, find_gaps=False)])[0]
+        self.results = ResultStore("test", {"holes": result})
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.dir.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir.name, name)
+
+    def test_gpkg(self):
+        """Test a layer per section with the source fids of the flagged features and the summary table."""
+        path = self._path("results.gpkg")
+        self.assertEqual(export_results(self.results, self.layer, path, chunk_size=1), 5)
+
+        flagged = QgsVectorLayer(f"{path}|layername=holes_features_with_holes", "flagged", "ogr")
+        self.assertTrue(flagged.isValid())
+        feats = sorted(flagged.getFeatures(), key=lambda feat: feat["source_fid"])
+        self.assertEqual([(feat["source_fid"], feat["name"]) for feat in feats], [(2, "b"), (3, "c")])
+        self.assertTrue(feats[0]["value"] == None)
+        self.assertAlmostEqual(feats[0].geometry().area(), 15.0)
+
+        derived = QgsVectorLayer(f"{path}|layername=holes_holes_in_geometries", "derived", "ogr")
+        self.assertEqual(sorted(feat["SOURCE_FID"] for feat in derived.getFeatures()), [2, 3, 3])
+
+        summary = QgsVectorLayer(f"{path}|layername=summary", "summary", "ogr")
+        rows = {feat["name"]: feat for feat in summary.getFeatures()}
+        self.assertEqual(rows["Features with holes"]["count"], 2)
+        self.assertEqual(rows["Holes_in_geometries"]["count"], 3)
+        self.assertEqual(json.loads(rows["Holes inside geometries"]["info"]), "Found 3 holes inside of geometries/features")
+
+    def _read_jsonl(self, lines) -> tuple[list, list]:
+        records = [json.loads(line) for line in lines]
+        return ([record for record in records if record["type"] == "Feature"],
+                [record for record in records if record["type"] == "Summary"])
+
+    def test_jsonl(self):
+        """Test one GeoJSON feature per line, plain and compressed."""
+        for (name, opener) in (("results.jsonl", open), ("results.jsonl.gz", gzip.open)):
+            path = self._path(name)
+            self.assertEqual(export_results(self.results, self.layer, path, chunk_size=2), 5)
+            with opener(path, "rt", encoding="utf-8") as f:
+                (feats, summary) = self._read_jsonl(f)
+
+            flagged = [feat for feat in feats if feat["kind"] == "flagged"]
+            self.assertEqual([(feat["id"], feat["properties"]) for feat in flagged],
+                             [(2, {"name": "b", "value": None}), (3, {"name": "c", "value": 3})])
+            self.assertEqual(flagged[0]["geometry"]["type"], "Polygon")
+            self.assertEqual(len(flagged[0]["geometry"]["coordinates"]), 2)
+            self.assertEqual(len([feat for feat in feats if feat["kind"] == "derived"]), 3)
+            self.assertEqual({row["name"]: row["count"] for row in summary},
+                             {"Features with holes": 2, "Holes_in_geometries": 3, "Holes inside geometries": None})
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet(self):
+        """Test the rows of the flagged features and the summary in one table."""
+        import pyarrow.parquet as pq
+        path = self._path("results.parquet")
+        self.assertEqual(export_results(self.results, self.layer, path, chunk_size=1), 5)
+        rows = pq.read_table(path).to_pylist()
+        flagged = [row for row in rows if row["kind"] == "flagged"]
+        self.assertEqual([(row["fid"], json.loads(row["properties"])) for row in flagged],
+                         [(2, {"name": "b", "value": None}), (3, {"name": "c", "value": 3})])
+        self.assertTrue(all(row["geometry"] for row in flagged))
+        self.assertEqual(len([row for row in rows if row["kind"] == "summary"]), 3)
+
+    def test_compressed_gpkg(self):
+        """Test that GeoPackages can't be compressed."""
+        with self.assertRaises(ValueError):
+            export_results(self.results, self.layer, self._path("results.gpkg"), compression="gzip")
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(ExportFormatTest), unittest.makeSuite(ExportResultsTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,68 @@
+# coding=utf-8
+"""Tests for the persistent fingerprint cache.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import os
+import tempfile
+import unittest
+
+from ..funcs.fingerprint_cache import FingerprintCache
+
+
+class FingerprintCacheTest(unittest.TestCase):
+    """Test that unchanged files are recognised and findings are merged."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "data.geojson")
+        with open(self.path, "w") as f:
+            f.write('{"type": "FeatureCollection", "features": []}')
+        self.cache = FingerprintCache(os.path.join(self.tmp.name, "cache.sqlite"))
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_unchanged_file(self):
+        """Test that the stored output is returned while the file is unchanged."""
+        self.cache.store_output(self.path, ["validity"], {"status": "ok"})
+        self.assertEqual(self.cache.cached_output(self.path, ["validity"]), {"status": "ok"})
+        self.assertIsNone(self.cache.cached_output(self.path, ["validity", "overlaps"]))
+
+    def test_touched_file(self):
+        """Test that a new modification time alone does not invalidate the output."""
+        self.cache.store_output(self.path, ["validity"], {"status": "ok"})
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.cache.cached_output(self.path, ["validity"]), {"status": "ok"})
+
+    def test_changed_file(self):
+        """Test that a changed file is validated again."""
+        self.cache.store_output(self.path, ["validity"], {"status": "ok"})
+        with open(self.path, "a") as f:
+            f.write("\n")
+        self.assertIsNone(self.cache.cached_output(self.path, ["validity"]))
+
+    def test_replace_issues(self):
+        """Test that only findings involving changed features are replaced."""
+        self.cache.replace_issues("uri", "overlaps", [(1, 2, None), (3, 4, None), (5, 6, None)])
+        self.cache.replace_issues("uri", "overlaps", [(2, 7, None)], fids={2, 6})
+        self.assertEqual(self.cache.issues("uri", "overlaps"), [(2, 7, None), (3, 4, None)])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(FingerprintCacheTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
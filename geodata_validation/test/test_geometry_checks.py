@@ -0,0 +1,186 @@
+# coding=utf-8
+"""Tests for the geometry checks on small memory layers with known answers.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from qgis.core import QgsGeometry, QgsPolygon
+
+from ..funcs import GeometryChecks
+from ..funcs.scan import run_scan
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+
+def _cell(x: int, y: int) -> str:
+    return f"POLYGON(({x} {y}, {x+1} {y}, {x+1} {y+1}, {x} {y+1}, {x} {y}))"
+
+
+def _grid(missing: set, size: int=10):
+    # unit squares covering size x size, without the missing cells
+    rows = [([x * size + y], _cell(x, y)) for x in range(size) for y in range(size) if (x, y) not in missing]
+    return memory_layer("Polygon", ["id:integer"], rows)
+
+
+def _dissolved_gaps(layer) -> list[float]:
+    # areas of the rings inside the dissolved layer, what native:dissolve and a hole search find
+    union = QgsGeometry.unaryUnion([feat.geometry() for feat in layer.getFeatures()])
+    areas = []
+    for part in union.asGeometryCollection():
+        polygon = part.constGet()
+        for i in range(polygon.numInteriorRings()):
+            ring = QgsPolygon()
+            ring.setExteriorRing(polygon.interiorRing(i).clone())
+            areas.append(ring.area())
+    return sorted(areas)
+
+
+def _gap_areas(gaps_layer) -> list[float]:
+    if gaps_layer is None:
+        return []
+    return sorted(feat.geometry().area() for feat in gaps_layer.getFeatures())
+
+
+class GapsTest(unittest.TestCase):
+    """Test that tiled gap detection finds what a dissolve of the whole layer finds."""
+
+    # one cell inside a tile, a pair across x = 2.5 and a block across x = 5 and y = 7.5,
+    # cells at the edge of the layer are open space and no gaps
+    MISSING = {(1, 1), (2, 4), (3, 4), (4, 7), (5, 7), (4, 8), (5, 8), (0, 5), (9, 9)}
+
+    def test_tiles_match_dissolve(self):
+        """Test gaps crossing tile borders with 4 x 4 tiles against one tile and the dissolve."""
+        layer = _grid(self.MISSING)
+        expected = _dissolved_gaps(layer)
+        self.assertEqual(expected, [1.0, 2.0, 4.0])
+
+        (tiled, tiled_count) = GeometryChecks._gaps_in_layer(layer, "gaps", features_per_tile=10)
+        (single, single_count) = GeometryChecks._gaps_in_layer(layer, "gaps")
+        self.assertEqual(tiled_count, 3)
+        self.assertEqual(single_count, 3)
+        for areas in (_gap_areas(tiled), _gap_areas(single)):
+            self.assertEqual(len(areas), len(expected))
+            for area, expected_area in zip(areas, expected):
+                self.assertAlmostEqual(area, expected_area)
+
+    def test_open_space_is_no_gap(self):
+        """Test that an open bay reaching the layer edge through several tiles is no gap."""
+        # a channel from the left edge to the middle of the layer, crossing two tile borders
+        layer = _grid({(0, 5), (1, 5), (2, 5), (3, 5), (4, 5), (5, 5)})
+        self.assertEqual(_dissolved_gaps(layer), [])
+        (gaps_layer, count) = GeometryChecks._gaps_in_layer(layer, "gaps", features_per_tile=10)
+        self.assertEqual(count, 0)
+        self.assertIsNone(gaps_layer)
+
+
+class HolesTest(unittest.TestCase):
+    """Test that the interior rings of polygons and multipolygons are found."""
+
+    def test_holes(self):
+        """Test two holes in a polygon, one in the second part of a multipolygon and none in a square."""
+        layer = memory_layer("MultiPolygon", ["id:integer"], [
+            ([1], "POLYGON((0 0, 10 0, 10 10, 0 10, 0 0), (1 1, 2 1, 2 2, 1 2, 1 1), (5 5, 7 5, 7 7, 5 7, 5 5))"),
+            ([2], _cell(20, 20)),
+            ([3], "MULTIPOLYGON(((30 0, 31 0, 31 1, 30 1, 30 0)), ((40 0, 50 0, 50 10, 40 10, 40 0), (41 1, 44 1, 44 4, 41 4, 41 1)))")])
+        visitor = GeometryChecks.HolesVisitor(layer, find_gaps=False)
+        (result, _) = run_scan(layer, [visitor])[0]
+
+        self.assertEqual(list(result.fids["Features with holes"]), [1, 3])
+        holes = sorted((feat["SOURCE_FID"], feat.geometry().area()) for feat in result.geodata_layer["Holes_in_geometries"].getFeatures())
+        self.assertEqual(holes, [(1, 1.0), (1, 4.0), (3, 9.0)])
+
+        (holes_layer, count) = GeometryChecks._holes_in_polygon(layer, "holes")
+        self.assertEqual((count, holes_layer.featureCount()), (3, 3))
+
+    def test_no_holes(self):
+        """Test that polygons without interior rings give no result."""
+        layer = memory_layer("Polygon", ["id:integer"], [([1], _cell(0, 0)), ([2], None)])
+        (result, info) = run_scan(layer, [GeometryChecks.HolesVisitor(layer, find_gaps=False)])[0]
+        self.assertIsNone(result)
+        self.assertIn("No holes", info.content)
+        self.assertEqual(GeometryChecks._holes_in_polygon(layer, "holes"), (None, 0))
+
+
+class OverlapsTest(unittest.TestCase):
+    """Test that only pairs sharing an area overlap, not ones touching at an edge or a corner."""
+
+    def test_overlaps(self):
+        """Test the pairs of the index and prepared geometries against intersecting every pair."""
+        layer = memory_layer("Polygon", ["id:integer"], [
+            ([1], "POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))"),
+            ([2], "POLYGON((1 1, 3 1, 3 3, 1 3, 1 1))"),
+            # an edge and a corner in common only
+            ([3], "POLYGON((-1 0, 0 0, 0 1, -1 1, -1 0))"),
+            ([4], "POLYGON((3 3, 4 3, 4 4, 3 4, 3 3))"),
+            # inside of the first one
+            ([5], "POLYGON((0.2 0.2, 0.8 0.2, 0.8 0.8, 0.2 0.8, 0.2 0.2))"),
+            ([6], None)])
+        (result, _) = GeometryChecks.overlaps(layer, batch_size=1)
+
+        pairs = {(feat["FID_A"], feat["FID_B"]): feat.geometry().area() for feat in result.geodata_layer["overlaps_in_layer"].getFeatures()}
+        self.assertEqual(sorted(pairs), [(1, 2), (1, 5)])
+        self.assertAlmostEqual(pairs[(1, 2)], 1.0)
+        self.assertAlmostEqual(pairs[(1, 5)], 0.36)
+        self.assertEqual(list(result.fids["Overlapping features"]), [1, 2, 5])
+
+        feats = [feat for feat in layer.getFeatures() if feat.hasGeometry()]
+        expected = [(a.id(), b.id()) for a in feats for b in feats
+                    if a.id() < b.id() and a.geometry().intersection(b.geometry()).area() > 0]
+        self.assertEqual(sorted(pairs), expected)
+
+    def test_no_overlaps(self):
+        """Test that a grid of touching cells has no overlaps."""
+        (result, info) = GeometryChecks.overlaps(_grid(set(), size=3))
+        self.assertIsNone(result)
+        self.assertIn("No overlapping geometries", info.content)
+
+
+class ValidityTest(unittest.TestCase):
+    """Test that invalid geometries are found whatever the chunks are."""
+
+    # a bow tie and a ring touching itself, the others are valid
+    BOW_TIE = "POLYGON((0 0, 2 2, 2 0, 0 2, 0 0))"
+    SELF_TOUCHING = "POLYGON((10 0, 14 0, 14 4, 12 0, 10 4, 10 0))"
+
+    def setUp(self):
+        """Runs before each test."""
+        rows = [([i], _cell(i * 2, 0)) for i in range(7)]
+        rows[2] = ([2], self.BOW_TIE)
+        rows[5] = ([5], self.SELF_TOUCHING)
+        self.layer = memory_layer("Polygon", ["id:integer"], rows + [([7], None)])
+
+    def test_chunks(self):
+        """Test that chunks smaller than the layer and several workers find the same errors."""
+        single = sorted(fid for fid, _ in GeometryChecks.validity_errors(self.layer, chunk_size=100, max_workers=1))
+        self.assertEqual(sorted(set(single)), [3, 6])
+        for (chunk_size, max_workers) in ((1, 4), (2, 2), (3, 1)):
+            fids = [fid for fid, _ in GeometryChecks.validity_errors(self.layer, chunk_size=chunk_size, max_workers=max_workers)]
+            # chunks come back in the order of the fids
+            self.assertEqual(fids, sorted(fids))
+            self.assertEqual(fids, single)
+
+    def test_validity(self):
+        """Test the flagged fids and the error points of the result."""
+        (result, _) = GeometryChecks.validity(self.layer)
+        self.assertEqual(list(result.fids["Invalid features"]), [3, 6])
+        errors = result.geodata_layer["validity_errors"]
+        self.assertEqual({feat["FID"] for feat in errors.getFeatures()}, {3, 6})
+        self.assertTrue(all(feat["ERROR"] for feat in errors.getFeatures()))
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(GapsTest), unittest.makeSuite(HolesTest), unittest.makeSuite(OverlapsTest),
+                                unittest.makeSuite(ValidityTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
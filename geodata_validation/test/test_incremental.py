@@ -0,0 +1,113 @@
+# coding=utf-8
+"""Tests for the running set of findings of live and cached validations.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from ..funcs import incremental, registry
+from ..funcs.incremental import IssueSet
+from ..live_validation import LiveValidator
+from ..validation_task import LiveCheckTask
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+
+class IssueSetTest(unittest.TestCase):
+    """Test that findings are replaced for changed features only."""
+
+    def test_replace_single_features(self):
+        """Test that the findings of other features are kept."""
+        issues = IssueSet()
+        issues.replace("validity", [(1, None, "Self-intersection"), (2, None, "Ring not closed")])
+        issues.replace("validity", [], fids={1})
+        self.assertEqual(issues.issues("validity"), [(2, None, "Ring not closed")])
+
+    def test_replace_pairs(self):
+        """Test that a pair is dropped when one of its features changes."""
+        issues = IssueSet()
+        issues.replace("overlaps", [(1, 2, None), (3, 4, None)])
+        issues.replace("overlaps", [(4, 5, None)], fids={4})
+        self.assertEqual(issues.issues("overlaps"), [(1, 2, None), (4, 5, None)])
+        self.assertEqual(issues.counts(), {"overlaps": 2})
+        self.assertEqual(issues.fids("overlaps"), [1, 2, 4, 5])
+
+
+class LiveChecksTest(unittest.TestCase):
+    """Test which checks can follow edits feature by feature."""
+
+    def setUp(self):
+        """Runs before each test."""
+        registry.load()
+
+    def test_per_feature_part(self):
+        """Test that the null check is replaced by its per record part, layer wide checks are dropped."""
+        self.assertEqual(incremental.live_checks(["nulls", "gaps", "empty"]), ["empty", "null_rows"])
+        self.assertEqual(incremental.live_checks(["duplicates"]), [])
+
+    def test_null_rows_of_changed_features(self):
+        """Test that records with mostly NULL values are found for the changed features only."""
+        layer = memory_layer("Point", ["a:integer", "b:string", "c:double"],
+                             [([None, None, None], "POINT(0 0)"), ([1, "x", 1.5], "POINT(1 1)"),
+                              ([None, None, None], "POINT(2 2)")])
+        found = incremental.check_features(layer, ["null_rows"], {1, 2}, report=lambda info: None)
+        self.assertEqual(found, {"null_rows": [(1, None, None)]})
+
+
+class LiveValidatorTest(unittest.TestCase):
+    """Test that edited features are checked again when a live task did not finish."""
+
+    def setUp(self):
+        """Runs before each test."""
+        registry.load()
+        layer = memory_layer("Polygon", ["name:string"], [(["a"], "POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))")])
+        self.validator = LiveValidator(layer, ["empty"])
+        self.reported = []
+        self.validator.reported.connect(self.reported.append)
+        self.validator.start()
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.validator.stop()
+
+    def _finished(self, error=None):
+        task = LiveCheckTask(self.validator.checks, [], {1})
+        task.error = error
+        self.validator.__checked__(task, {1}, set(), 0.0)
+
+    def test_cancelled(self):
+        """Test that a cancelled task is retried."""
+        self._finished()
+        self.assertEqual(self.validator.changed, {1})
+        self.assertTrue(self.validator.timer.isActive())
+
+    def test_failed(self):
+        """Test that a failed task is reported and its features wait for the next edits."""
+        self._finished("Traceback")
+        self.assertEqual(self.validator.changed, {1})
+        self.assertFalse(self.validator.timer.isActive())
+        self.assertIn("Live validation failed", self.reported[-1].render())
+
+    def test_failed_with_edits_meanwhile(self):
+        """Test that edits made while a failing task was running are still checked."""
+        self.validator.changed.add(2)
+        self._finished("Traceback")
+        self.assertEqual(self.validator.changed, {1, 2})
+        self.assertTrue(self.validator.timer.isActive())
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(IssueSetTest), unittest.makeSuite(LiveChecksTest),
+                                unittest.makeSuite(LiveValidatorTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
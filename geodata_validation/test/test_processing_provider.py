@@ -0,0 +1,70 @@
+# coding=utf-8
+"""Tests for the checks offered as processing algorithms.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from qgis.core import QgsApplication
+
+from ..funcs import scheduler
+from ..processing_provider import ValidateGeodataProvider
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+SQUARE = "POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))"
+SHIFTED = "POLYGON((1 1, 3 1, 3 3, 1 3, 1 1))"
+OTHER = "POLYGON((5 5, 6 5, 6 6, 5 6, 5 5))"
+
+
+class ProviderTest(unittest.TestCase):
+    """Test the algorithms of the provider run through processing."""
+
+    @classmethod
+    def setUpClass(cls):
+        from processing.core.Processing import Processing
+        Processing.initialize()
+        cls.provider = ValidateGeodataProvider()
+        QgsApplication.processingRegistry().addProvider(cls.provider)
+
+    @classmethod
+    def tearDownClass(cls):
+        QgsApplication.processingRegistry().removeProvider(cls.provider)
+
+    def test_algorithms(self):
+        """Test that every check is offered once, the parts for single features are not."""
+        names = [algorithm.name() for algorithm in self.provider.algorithms()]
+        self.assertEqual(sorted(names), sorted(scheduler.CHECKS))
+        self.assertNotIn("null_rows", names)
+
+    def test_run_empty(self):
+        """Test that the flagged features are counted and the report is returned."""
+        from qgis import processing
+        layer = memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], None), (["c"], None)])
+        outputs = processing.run("geodata_validation:empty", {"INPUT": layer})
+        self.assertEqual(outputs["ISSUES"], 2)
+        self.assertTrue(outputs["REPORT"])
+
+    def test_run_overlaps(self):
+        """Test that a pair of overlapping features counts as two flagged features."""
+        from qgis import processing
+        layer = memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], SHIFTED), (["c"], OTHER)])
+        outputs = processing.run("geodata_validation:overlaps", {"INPUT": layer, "OVERLAPS_IN_LAYER": "TEMPORARY_OUTPUT"})
+        self.assertEqual(outputs["ISSUES"], 2)
+        self.assertIn("OVERLAPS_IN_LAYER", outputs)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ProviderTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
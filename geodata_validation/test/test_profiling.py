@@ -0,0 +1,64 @@
+# coding=utf-8
+"""Tests for the profiling of validation steps.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import json
+import os
+import tempfile
+import unittest
+
+from ..funcs import profiling
+
+
+class ProfilingTest(unittest.TestCase):
+    """Test the timings collected for the steps of a run."""
+
+    def test_timed(self):
+        """Test that features are only counted while a step is measured."""
+        feats = [1, 2, 3]
+        self.assertIs(profiling.timed(feats), feats)
+
+        profiler = profiling.Profiler()
+        with profiler.measure(("check", "validity")) as profile:
+            self.assertIs(profiling.current(), profile)
+            self.assertEqual(list(profiling.timed(feats)), feats)
+        self.assertIsNone(profiling.current())
+
+        profile = profiler.profiles[("check", "validity")]
+        self.assertEqual(profile.features, 3)
+        self.assertGreaterEqual(profile.wall, profile.provider)
+        self.assertIn("validity", profile.render())
+
+    def test_capture(self):
+        """Test that only the captured check is run under cProfile and the sidecar is written."""
+        profiler = profiling.Profiler(capture="nulls", top=5)
+        with profiler.measure(("scan", ("validity", "empty"))):
+            pass
+        self.assertIsNone(profiler.stats)
+        with profiler.measure(("scan", ("nulls", "oid"))):
+            sorted(range(1000), key=str)
+        self.assertIn("function calls", profiler.stats_text())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.profile.json")
+            profiler.write(path)
+            with open(path, encoding="utf-8") as f:
+                steps = json.load(f)["steps"]
+            self.assertEqual([step["name"] for step in steps], ["validity, empty", "nulls, oid"])
+            self.assertTrue(os.path.exists(path + ".prof"))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ProfilingTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
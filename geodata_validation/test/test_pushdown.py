@@ -0,0 +1,219 @@
+# coding=utf-8
+"""Tests for answering checks by sql on GeoPackage and SpatiaLite tables.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+import os
+import sqlite3
+import struct
+import tempfile
+
+from qgis.core import QgsVectorLayer, QgsVectorFileWriter, QgsCoordinateReferenceSystem, QgsCoordinateTransformContext
+from qgis.core import QgsFields, QgsField, QgsFeature, QgsGeometry, QgsWkbTypes
+from qgis.PyQt.QtCore import QVariant
+
+from ..funcs import pushdown
+from ..funcs.scan import run_scan
+from ..funcs.DataStructureChecks import DuplicatesVisitor
+from ..funcs.GeometryChecks import EmptyGeometriesVisitor
+
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+SQUARE = "POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))"
+# the same square starting at another vertex
+SQUARE_SHIFTED = "POLYGON((1 0, 1 1, 0 1, 0 0, 1 0))"
+OTHER = "POLYGON((5 5, 6 5, 6 6, 5 6, 5 5))"
+
+
+def _source(rows: list, names: tuple=("a", "b", "c")) -> pushdown.SqlSource:
+    # a source on an in memory table, without a layer behind it
+    source = pushdown.SqlSource.__new__(pushdown.SqlSource)
+    source.db = sqlite3.connect(":memory:")
+    source.db.execute(f"CREATE TABLE t (fid INTEGER PRIMARY KEY, {', '.join(names)})")
+    source.db.executemany(f"INSERT INTO t VALUES (?{', ?' * len(names)})", rows)
+    (source.table, source.fid, source.geometry) = (pushdown.quote("t"), pushdown.quote("fid"), None)
+    source.columns = [pushdown.quote(name) for name in names]
+    source.exact = [True] * len(names)
+    return source
+
+
+class SqlTest(unittest.TestCase):
+    """Test the sql the checks are answered with."""
+
+    def test_quote(self):
+        """Test that quotes in names are doubled."""
+        self.assertEqual(pushdown.quote('my "field"'), '"my ""field"""')
+
+    def test_balanced_sum(self):
+        """Test that the sum of many terms nests only logarithmically deep."""
+        self.assertEqual(pushdown.balanced_sum(["a"]), "a")
+        self.assertEqual(pushdown.balanced_sum(["a", "b", "c"]), "(a + (b + c))")
+        (depth, deepest) = (0, 0)
+        for char in pushdown.balanced_sum(["x"] * 1000):
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            deepest = max(depth, deepest)
+        self.assertEqual(deepest, 10)
+
+    def test_nulls(self):
+        """Test NULLs per column and the rows with mostly NULLs."""
+        source = _source([(1, 1, "x", None), (2, None, None, None), (3, 3, None, 2.5), (4, None, None, 1.0)])
+        self.assertEqual(pushdown.null_counts(source), (4, [2, 3, 2]))
+        self.assertEqual(pushdown.null_rows(source, 2), [2, 4])
+        # rows without any NULL are never null heavy
+        self.assertEqual(pushdown.null_rows(source, 0), [1, 2, 3, 4])
+
+    def test_wide_table(self):
+        """Test that wide tables are counted in chunks of columns."""
+        names = tuple(f"attr_{i}" for i in range(pushdown.MAX_COLUMNS + 20))
+        source = _source([(1,) + (None,) * len(names), (2,) + (1,) * len(names)], names)
+        (n_rows, nulls) = pushdown.null_counts(source)
+        self.assertEqual((n_rows, nulls), (2, [1] * len(names)))
+        self.assertEqual(pushdown.null_rows(source, len(names)), [1])
+
+    def test_unique(self):
+        """Test that columns with NULLs or repeated values are not unique."""
+        source = _source([(1, 1, "x", 1), (2, 2, "X", None), (3, 3, "y", 3)])
+        self.assertTrue(pushdown.is_unique(source, '"a"'))
+        self.assertTrue(pushdown.is_unique(source, '"b"'))
+        self.assertFalse(pushdown.is_unique(source, '"c"'))
+        source.db.execute("INSERT INTO t VALUES (4, 3, 'z', 4)")
+        self.assertFalse(pushdown.is_unique(source, '"a"'))
+        self.assertFalse(pushdown.is_unique(_source([]), '"a"'))
+
+    def test_duplicate_rows(self):
+        """Test that rows with the same values, NULLs included, are grouped."""
+        source = _source([(5, 1, "x", None), (2, 1, "x", None), (3, 1, "x", 1.0), (4, 2, "y", 1.0), (1, 2, "y", 1.0)])
+        self.assertEqual(sorted(pushdown.duplicate_rows(source, source.columns)), [[1, 4], [2, 5]])
+
+
+def _gpkg(wkb: bytes, envelope: int=0, empty: bool=False) -> bytes:
+    # GeoPackage header: magic, version, flags (little endian, envelope, empty), srs id and the envelope
+    flags = 1 | envelope << 1 | (16 if empty else 0)
+    return b"GP\x00" + bytes([flags]) + struct.pack("<i", 25832) + b"\x00" * {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}[envelope] + wkb
+
+
+def _wkb(kind: int, parts: list[bytes]=()) -> bytes:
+    return struct.pack("<BII", 1, kind, len(parts)) + b"".join(parts)
+
+
+class EmptyCandidatesTest(unittest.TestCase):
+    """Test that every geometry its blob header can't prove to have coordinates is a candidate."""
+
+    def test_headers(self):
+        """Test GeoPackage, SpatiaLite and WKB blobs, flagged or not, against ones with coordinates."""
+        ring = struct.pack("<I", 4) + struct.pack("<8d", 0, 0, 1, 0, 1, 1, 0, 0)
+        polygon = _wkb(3, [ring])
+        polygon_z = struct.pack("<BII", 1, 1003, 1) + struct.pack("<I", 4) + struct.pack("<12d", *[0.0] * 12)
+        line = struct.pack("<BII", 1, 2, 2) + struct.pack("<4d", 0, 0, 1, 1)
+        # a multipolygon of empty polygons without the empty flag, as other writers than GDAL leave it
+        empty_parts = _wkb(6, [_wkb(3)] * 12)
+        spatialite = b"\x00\x01" + struct.pack("<i", 4326) + b"\x00" * 32 + b"\x7c"
+        nan_point = struct.pack("<BI2d", 1, 1, float("nan"), float("nan"))
+        blobs = [None, _gpkg(polygon), _gpkg(empty_parts, envelope=1, empty=True), _gpkg(_wkb(2)),
+                 _gpkg(empty_parts, envelope=1), _gpkg(_wkb(6, [polygon] * 40), envelope=1),
+                 spatialite + struct.pack("<II", 6, 0) + b"\xfe", spatialite + struct.pack("<II", 3, 1) + ring + b"\xfe",
+                 _wkb(5), nan_point, _gpkg(line), _gpkg(polygon_z, envelope=2),
+                 _gpkg(struct.pack("<BIII", 1, 3, 1, 0))]
+        expected = [1, 3, 4, 5, 6, 7, 9, 10, 13]
+        self.assertEqual([i + 1 for i, blob in enumerate(blobs) if pushdown.may_be_empty(blob)], expected)
+
+        source = _source([(i + 1, blob) for i, blob in enumerate(blobs)], names=("geom",))
+        source.geometry = pushdown.quote("geom")
+        self.assertEqual(pushdown.empty_candidates(source, limit=100), expected)
+        self.assertIsNone(pushdown.empty_candidates(source, limit=5))
+
+
+class GeoPackageEmptyTest(unittest.TestCase):
+    """Test that the sql path finds the empty geometries the scan finds."""
+
+    def test_unflagged_empty_multipolygon(self):
+        """Test an empty multipolygon whose header has no empty flag."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "empty.gpkg")
+            fields = QgsFields()
+            fields.append(QgsField("name", QVariant.String))
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = "GPKG"
+            options.layerName = "empty"
+            # without the rtree triggers, which need the sql functions of GDAL, the blob can be replaced below
+            options.layerOptions = ["SPATIAL_INDEX=NO"]
+            writer = QgsVectorFileWriter.create(path, fields, QgsWkbTypes.MultiPolygon, QgsCoordinateReferenceSystem("EPSG:25832"),
+                                                QgsCoordinateTransformContext(), options)
+            for wkt in (f"MULTIPOLYGON({SQUARE[7:]})", f"MULTIPOLYGON({OTHER[7:]})", f"MULTIPOLYGON({SQUARE[7:]})"):
+                feat = QgsFeature(fields)
+                feat.setAttributes(["a"])
+                feat.setGeometry(QgsGeometry.fromWkt(wkt))
+                writer.addFeature(feat)
+            del writer
+
+            db = sqlite3.connect(path)
+            db.execute('UPDATE "empty" SET geom = ? WHERE fid = 2', (_gpkg(_wkb(6, [_wkb(3)] * 3), envelope=1),))
+            db.commit()
+            db.close()
+
+            layer = QgsVectorLayer(path, "empty", "ogr")
+            for sql in (False, True):
+                visitor = EmptyGeometriesVisitor(layer)
+                (result, _) = run_scan(layer, [visitor], sql=sql)[0]
+                self.assertEqual(visitor.done, sql)
+                self.assertEqual(list(result.fids["empty_geometries"]), [2])
+            layer = None
+
+
+class GeoPackageDuplicatesTest(unittest.TestCase):
+    """Test that GeoPackage rows differing only in their fid are duplicates."""
+
+    def setUp(self):
+        """Writes a GeoPackage with fids 1 to 4."""
+        self.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.dir.name, "duplicates.gpkg")
+        fields = QgsFields()
+        fields.append(QgsField("name", QVariant.String))
+        fields.append(QgsField("value", QVariant.Int))
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.layerName = "duplicates"
+        writer = QgsVectorFileWriter.create(path, fields, QgsWkbTypes.Polygon, QgsCoordinateReferenceSystem("EPSG:25832"),
+                                            QgsCoordinateTransformContext(), options)
+        for (name, value, wkt) in (("a", 1, SQUARE), ("a", 1, SQUARE_SHIFTED), ("b", 2, SQUARE), ("a", 1, OTHER)):
+            feat = QgsFeature(fields)
+            feat.setAttributes([name, value])
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            writer.addFeature(feat)
+        del writer
+        self.layer = QgsVectorLayer(path, "duplicates", "ogr")
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.layer = None
+        self.dir.cleanup()
+
+    def test_fid_is_not_compared(self):
+        """Test that the scan and the sql path both find the duplicates next to the fid field."""
+        self.assertEqual(self.layer.fields()[0].name(), "fid")
+        for sql in (False, True):
+            visitor = DuplicatesVisitor(self.layer)
+            (result, _) = run_scan(self.layer, [visitor], sql=sql)[0]
+            self.assertEqual(visitor.attribute_groups is not None, sql)
+            self.assertEqual(list(result.fids["attribute duplicates"]), [1, 2, 4])
+            self.assertEqual(list(result.fids["geometry duplicates"]), [1, 2, 3])
+            self.assertEqual(list(result.fids["exact duplicates"]), [1, 2])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(SqlTest), unittest.makeSuite(EmptyCandidatesTest),
+                                unittest.makeSuite(GeoPackageEmptyTest),
+                                unittest.makeSuite(GeoPackageDuplicatesTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""Tests for the check registry and the DAG planning.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from ..funcs import registry
+
+
+def _noop(layer, artifacts, feedback):
+    return None
+
+
+class RegistryTest(unittest.TestCase):
+    """Test that checks are planned in dependency order."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.checks = dict(registry.CHECKS)
+        self.artifacts = dict(registry.ARTIFACTS)
+        registry.CHECKS.clear()
+        registry.ARTIFACTS.clear()
+
+        registry.register_artifact(registry.Artifact("index", _noop, needs=("geometry",)))
+        registry.register_artifact(registry.Artifact("dissolved", _noop, needs=("index",)))
+        registry.register(registry.Check("nulls", needs=("attributes",), visitor=_noop))
+        registry.register(registry.Check("bounds", needs=("geometry", "index"), visitor=_noop))
+        registry.register(registry.Check("gaps", needs=("dissolved",), run=_noop))
+        registry.register(registry.Check("overlaps", needs=("index",), run=_noop))
+
+    def tearDown(self):
+        """Runs after each test."""
+        registry.CHECKS.clear()
+        registry.ARTIFACTS.clear()
+        registry.CHECKS.update(self.checks)
+        registry.ARTIFACTS.update(self.artifacts)
+
+    def test_shared_artifact_built_once(self):
+        """Test that an artifact needed by several checks is one node."""
+        graph = registry.plan({"bounds", "gaps", "overlaps"})
+        self.assertEqual(list(graph).count(("artifact", "index")), 1)
+        self.assertEqual(graph[("check", "overlaps")], {("artifact", "index")})
+        self.assertEqual(graph[("scan", ("bounds",))], {("artifact", "index")})
+
+    def test_dependency_order(self):
+        """Test that every node comes after the nodes it depends on."""
+        graph = registry.plan({"nulls", "bounds", "gaps", "overlaps"})
+        order = list(graph)
+        for node, deps in graph.items():
+            for dep in deps:
+                self.assertLess(order.index(dep), order.index(node))
+
+    def test_visitor_checks_share_one_scan(self):
+        """Test that all visitor checks end up in the same scan node."""
+        graph = registry.plan({"nulls", "bounds"})
+        self.assertIn(("scan", ("nulls", "bounds")), graph)
+
+    def test_unused_artifacts_not_planned(self):
+        """Test that only artifacts that are needed are built."""
+        graph = registry.plan({"nulls"})
+        self.assertEqual(list(graph), [("scan", ("nulls",))])
+
+    def test_unknown_check(self):
+        """Test that unknown checks are rejected."""
+        with self.assertRaises(ValueError):
+            registry.plan({"does_not_exist"})
+
+    def test_scoped_check_needs_issues(self):
+        """Test that feature scoped checks have to list their findings."""
+        with self.assertRaises(ValueError):
+            registry.Check("scoped", needs=("geometry",), run=_noop, scope="feature")
+
+    def test_cycle(self):
+        """Test that cyclic artifacts are rejected."""
+        registry.register_artifact(registry.Artifact("a", _noop, needs=("b",)))
+        registry.register_artifact(registry.Artifact("b", _noop, needs=("a",)))
+        registry.register(registry.Check("cyclic", needs=("a",), run=_noop))
+        with self.assertRaises(ValueError):
+            registry.plan({"cyclic"})
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(RegistryTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
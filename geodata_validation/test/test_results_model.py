@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Tests for the table model of flagged features.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from ..funcs.status import Result, ResultStore
+from ..results_model import ResultsTableModel
+
+
+def _results():
+    validity = Result(category="Geometry", analysis="validity")
+    validity.append_fids("Invalid features", [1, 2, 3])
+    empty = Result(category="Geometry", analysis="empty")
+    empty.append_fids("empty_geometries", [3, 7])
+    return ResultStore("test", {"validity": validity, "empty": empty, "nulls": Result(category="Data structure", analysis="nulls")})
+
+
+class ResultsTableModelTest(unittest.TestCase):
+    """Test that rows are looked up in the fid arrays of the results."""
+
+    def test_rows(self):
+        """Test that rows are grouped by check and handed out in batches."""
+        model = ResultsTableModel(batch_size=2)
+        model.set_results(_results(), None)
+        self.assertEqual(model.checks, ["validity", "empty"])
+        self.assertEqual(model.total, 5)
+        self.assertEqual(model.loaded, 2)
+        self.assertEqual([model.fid(row) for row in range(5)], [1, 2, 3, 3, 7])
+
+        model.set_results(_results(), None, "empty")
+        self.assertEqual(model.total, 2)
+        self.assertEqual(model.fid(1), 7)
+
+        # unknown checks show all of them
+        model.set_results(_results(), None, "holes")
+        self.assertIsNone(model.check)
+        self.assertEqual(model.total, 5)
+
+    def test_fids_in_ranges(self):
+        """Test that selected rows across checks give every fid once."""
+        model = ResultsTableModel()
+        model.set_results(_results(), None)
+        self.assertEqual(list(model.fids_in_ranges([(1, 3)])), [2, 3])
+        self.assertEqual(list(model.fids_in_ranges([(0, 0), (2, 4)])), [1, 3, 7])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ResultsTableModelTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,125 @@
+# coding=utf-8
+"""Tests for the requests of shared scans.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from qgis.core import QgsFeatureRequest, QgsRectangle
+
+from ..funcs.scan import FeatureVisitor, plan_request, run_scan
+from ..funcs.GeometryChecks import EmptyGeometriesVisitor
+from ..funcs.DataStructureChecks import NullValuesVisitor
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+
+class _Visitor(FeatureVisitor):
+
+    def __init__(self, needs_geometry: bool=True, attributes=None, rect=None):
+        # no layer is needed to plan a request
+        self.needs_geometry = needs_geometry
+        self.attributes = attributes
+        self.rect = rect
+        self.done = False
+
+
+class PlanRequestTest(unittest.TestCase):
+    """Test that a scan fetches only what its visitors need."""
+
+    def test_attribute_only(self):
+        """Test that geometries are skipped and the fields are merged."""
+        request = plan_request([_Visitor(False, [3, 1]), _Visitor(False, [1, 7])])
+        self.assertTrue(request.flags() & QgsFeatureRequest.NoGeometry)
+        self.assertTrue(request.flags() & QgsFeatureRequest.SubsetOfAttributes)
+        self.assertEqual(list(request.subsetOfAttributes()), [1, 3, 7])
+
+    def test_geometry_only(self):
+        """Test that no attributes are fetched for geometry checks."""
+        request = plan_request([_Visitor(True, ()), _Visitor(False, ())])
+        self.assertFalse(request.flags() & QgsFeatureRequest.NoGeometry)
+        self.assertTrue(request.flags() & QgsFeatureRequest.SubsetOfAttributes)
+        self.assertEqual(list(request.subsetOfAttributes()), [])
+        self.assertEqual(request.invalidGeometryCheck(), QgsFeatureRequest.GeometryNoCheck)
+
+    def test_all_attributes(self):
+        """Test that one visitor reading all fields gets all of them."""
+        request = plan_request([_Visitor(True, ()), _Visitor(False, None)])
+        self.assertFalse(request.flags() & QgsFeatureRequest.SubsetOfAttributes)
+
+    def test_rects(self):
+        """Test that rectangles are combined, and dropped if one visitor needs all features."""
+        visitors = [_Visitor(rect=QgsRectangle(0, 0, 1, 1)), _Visitor(rect=QgsRectangle(2, 2, 3, 3))]
+        self.assertEqual(plan_request(visitors).filterRect(), QgsRectangle(0, 0, 3, 3))
+        self.assertTrue(plan_request(visitors + [_Visitor()]).filterRect().isNull())
+
+    def test_given_request(self):
+        """Test that the filters of a given request are kept."""
+        request = plan_request([_Visitor(False, [0])], QgsFeatureRequest().setFilterFids([1, 2]))
+        self.assertEqual(set(request.filterFids()), {1, 2})
+        self.assertTrue(request.flags() & QgsFeatureRequest.NoGeometry)
+
+
+class _Recorder(FeatureVisitor):
+    # remembers the fids it was handed, done after ``limit`` features
+
+    def __init__(self, vectorlayer, limit=None):
+        super().__init__(vectorlayer)
+        self.limit = limit
+        self.seen = []
+
+    def visit(self, feat):
+        self.seen.append(feat.id())
+        self.done = self.limit is not None and len(self.seen) >= self.limit
+
+    def finish(self):
+        return (None, self.seen)
+
+
+class RunScanTest(unittest.TestCase):
+    """Test that one scan serves all visitors like a scan of their own."""
+
+    def setUp(self):
+        """Runs before each test."""
+        rows = [([None, None], "POINT(0 0)"), (["a", 1], None), (["b", None], "POINT(1 1)"), ([None, None], None)]
+        self.layer = memory_layer("Point", ["name:string", "value:integer"], rows)
+
+    def test_every_feature_once(self):
+        """Test that every visitor sees every feature once and the results come in the order of the visitors."""
+        visitors = [_Recorder(self.layer), _Recorder(self.layer)]
+        results = run_scan(self.layer, visitors)
+        self.assertEqual([seen for (_, seen) in results], [[1, 2, 3, 4], [1, 2, 3, 4]])
+
+    def test_done_visitor(self):
+        """Test that a done visitor gets no more features while the others are still fed."""
+        (early, late) = (_Recorder(self.layer, limit=2), _Recorder(self.layer))
+        run_scan(self.layer, [early, late])
+        self.assertEqual(early.seen, [1, 2])
+        self.assertEqual(late.seen, [1, 2, 3, 4])
+
+    def test_shared_like_single(self):
+        """Test that checks sharing a scan find what they find on their own."""
+        shared = run_scan(self.layer, [EmptyGeometriesVisitor(self.layer), NullValuesVisitor(self.layer, threshold=0.5)])
+        single = [run_scan(self.layer, [EmptyGeometriesVisitor(self.layer)])[0],
+                  run_scan(self.layer, [NullValuesVisitor(self.layer, threshold=0.5)])[0]]
+        for ((shared_result, _), (single_result, _)) in zip(shared, single):
+            self.assertEqual({name: list(fids) for name, fids in shared_result.fids.items()},
+                             {name: list(fids) for name, fids in single_result.fids.items()})
+        self.assertEqual(list(shared[0][0].fids["empty_geometries"]), [2, 4])
+        self.assertEqual(list(shared[1][0].fids["null objects"]), [1, 3, 4])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(PlanRequestTest), unittest.makeSuite(RunScanTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
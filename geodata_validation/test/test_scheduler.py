@@ -0,0 +1,99 @@
+# coding=utf-8
+"""Tests for running checks on layers that can't be opened again per thread.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+import os
+import tempfile
+
+from qgis.core import QgsVectorLayer, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsGeometry
+
+from ..funcs import scheduler
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP = get_qgis_app()
+
+SQUARE = "POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))"
+OTHER = "POLYGON((5 5, 6 5, 6 6, 5 6, 5 5))"
+
+
+class SharedLayerTest(unittest.TestCase):
+    """Test that memory layers and unsaved edits are validated as they are."""
+
+    def test_memory_layer(self):
+        """Test that a memory layer is shared and its features are checked."""
+        layer = memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], None)])
+        self.assertFalse(scheduler.reopenable(layer))
+        self.assertIs(scheduler.layer_for_thread(layer), layer)
+
+        results = scheduler.run_checks(layer, ["empty", "holes"], report=lambda info: None, by_check=True)
+        self.assertEqual(list(results["empty"].fids["empty_geometries"]), [2])
+
+    def test_unsaved_edits(self):
+        """Test that the edit buffer of a file layer is validated, not the file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "edited.gpkg")
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = "GPKG"
+            source = memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], OTHER)])
+            error = QgsVectorFileWriter.writeAsVectorFormatV3(source, path, QgsCoordinateTransformContext(), options)
+            self.assertEqual(error[0], QgsVectorFileWriter.NoError)
+
+            layer = QgsVectorLayer(path, "edited", "ogr")
+            self.assertTrue(scheduler.reopenable(layer))
+            layer.startEditing()
+            layer.changeGeometry(2, QgsGeometry())
+            self.assertFalse(scheduler.reopenable(layer))
+            self.assertIs(scheduler.layer_for_thread(layer), layer)
+
+            results = scheduler.run_checks(layer, ["empty"], report=lambda info: None, by_check=True)
+            self.assertEqual(list(results["empty"].fids["empty_geometries"]), [2])
+            layer.rollBack()
+            self.assertTrue(scheduler.reopenable(layer))
+            layer = None
+
+    def test_snapshot(self):
+        """Test that a snapshot keeps the fids and the state of the layer when it was taken."""
+        layer = memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], OTHER), (["c"], None)])
+        snapshot = scheduler.LayerSnapshot(layer)
+        self.assertFalse(scheduler.reopenable(snapshot))
+        self.assertIs(scheduler.layer_for_thread(snapshot), snapshot)
+
+        # edits made after the snapshot was taken, while a validation would be running
+        layer.startEditing()
+        layer.changeGeometry(2, QgsGeometry())
+        layer.deleteFeature(3)
+
+        self.assertEqual(sorted(snapshot.allFeatureIds()), [1, 2, 3])
+        self.assertEqual(snapshot.featureCount(), 3)
+        results = scheduler.run_checks(snapshot, ["empty", "nulls"], report=lambda info: None, by_check=True)
+        self.assertEqual(list(results["empty"].fids["empty_geometries"]), [3])
+        layer.rollBack()
+
+    def test_snapshot_of_edits(self):
+        """Test that unsaved edits are in the snapshot and keep it from being opened again."""
+        layer = memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], OTHER)])
+        layer.startEditing()
+        layer.changeGeometry(1, QgsGeometry())
+        snapshot = scheduler.LayerSnapshot(layer)
+        layer.rollBack()
+
+        self.assertTrue(snapshot.editBuffer().isModified())
+        results = scheduler.run_checks(snapshot, ["empty"], report=lambda info: None, by_check=True)
+        self.assertEqual(list(results["empty"].fids["empty_geometries"]), [1])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(SharedLayerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
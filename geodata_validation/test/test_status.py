@@ -0,0 +1,80 @@
+# coding=utf-8
+"""Tests for the Infotext event log and the result store.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from ..funcs.status import Infotext, Result, ResultStore
+
+
+class InfotextTest(unittest.TestCase):
+    """Test that events are kept as records and rendered on demand."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.info = Infotext("Checking the layer:")
+        self.info.add_info("All geometries are valid")
+        self.info.add_warning("Found 2 overlapping pairs", fids=[4, 7, 9])
+        self.info.add_error("Check failed")
+
+    def test_content(self):
+        """Test that the rendered text keeps the known format."""
+        self.assertEqual(self.info.content,
+                         "Checking the layer: \nINFO: All geometries are valid \n"
+                         "WARNING: Found 2 overlapping pairs \nfids: 4, 7, 9 \nERROR: Check failed \n")
+
+    def test_render_new_events(self):
+        """Test that only events from start on are rendered."""
+        self.assertEqual(self.info.render(3), "ERROR: Check failed \n")
+
+    def test_min_severity(self):
+        """Test that events below a severity are left out."""
+        self.assertEqual(self.info.render(min_severity="error"), "ERROR: Check failed \n")
+        self.assertEqual(len(self.info.filter("warning")), 2)
+
+    def test_long_fid_lists_are_shortened(self):
+        """Test that only the first fids of an event are rendered."""
+        self.info.add_warning("Many", fids=range(1000))
+        self.assertTrue(self.info.render(4).endswith("19 ... (980 more) \n"))
+
+    def test_tag(self):
+        """Test that events without a check get the name of the check."""
+        self.info.tag("overlaps")
+        self.assertEqual(len(self.info.filter(check="overlaps")), 4)
+
+
+class ResultTest(unittest.TestCase):
+    """Test that results keep their data per instance and fids as arrays."""
+
+    def test_results_do_not_share_data(self):
+        """Test that a new result starts empty."""
+        first = Result("Geometry Checks", "Check geometry validity")
+        first.append_info("Invalid features", [1])
+        second = Result("Geometry Checks", "Check geometry validity")
+        self.assertEqual(second.info_output, {})
+        self.assertFalse(second.has_data())
+
+    def test_flagged(self):
+        """Test that the flagged fids of a check are merged."""
+        result = Result("Data Structure Checks", "NULL check")
+        result.append_fids("null objects", [5, 1])
+        result.append_fids("other", [1, 3])
+        store = ResultStore("data.gpkg", {"nulls": result})
+        self.assertEqual(result.fids["null objects"].typecode, "q")
+        self.assertEqual(store.flagged("nulls").tolist(), [1, 3, 5])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(InfotextTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,126 @@
+# coding=utf-8
+"""Tests for the background task running a validation.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'tempmail@mail.com'
+__date__ = '2025-02-16'
+__copyright__ = 'Copyright 2025, Jo Ritter'
+
+import unittest
+
+from ..validation_task import ValidationTask
+from ..geodata_validation import ValidateGeodata
+
+from .utilities import get_qgis_app, memory_layer
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+SQUARE = "POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))"
+
+
+def _layer():
+    return memory_layer("Polygon", ["name:string"], [(["a"], SQUARE), (["b"], None), (["c"], SQUARE)])
+
+
+class ValidationTaskTest(unittest.TestCase):
+    """Test the task run synchronously on the calling thread."""
+
+    def test_run(self):
+        """Test that the results and the output of the checks are kept."""
+        task = ValidationTask(_layer(), {"empty"})
+        reported = []
+        task.reported.connect(reported.append)
+
+        self.assertTrue(task.run())
+        self.assertIsNone(task.error)
+        self.assertEqual(list(task.results["empty"].fids["empty_geometries"]), [2])
+        self.assertTrue(reported)
+
+    def test_cancelled_feedback(self):
+        """Test that a cancelled feedback stops the run before any check."""
+        task = ValidationTask(_layer(), {"empty", "holes"})
+        reported = []
+        task.reported.connect(reported.append)
+        task.feedback.cancel()
+
+        self.assertFalse(task.run())
+        self.assertIsNone(task.error)
+        self.assertEqual(len(task.results), 0)
+        self.assertIn("cancelled", reported[-1].render())
+
+    def test_cancel(self):
+        """Test that cancelling the task cancels its feedback."""
+        task = ValidationTask(_layer(), {"empty"})
+        task.cancel()
+        self.assertTrue(task.feedback.isCanceled())
+        self.assertFalse(task.run())
+
+    def test_edits_after_start(self):
+        """Test that the task validates the layer as it was when it was created."""
+        layer = _layer()
+        task = ValidationTask(layer, {"empty"})
+        layer.startEditing()
+        layer.deleteFeature(2)
+
+        self.assertTrue(task.run())
+        self.assertEqual(list(task.results["empty"].fids["empty_geometries"]), [2])
+        self.assertIs(task.layer, layer)
+
+
+class ValidateClickTest(unittest.TestCase):
+    """Test how the plugin hands validation tasks over to the main thread."""
+
+    def setUp(self):
+        self.plugin = ValidateGeodata(IFACE)
+        self.plugin.first_start = True
+        self.plugin.run()
+
+    def tearDown(self):
+        self.plugin.dlg.close()
+
+    def test_second_click(self):
+        """Test that no second task is started while one is running."""
+        running = ValidationTask(_layer(), {"empty"})
+        self.plugin.task = running
+        self.plugin.__validate_geodata__()
+
+        self.assertIs(self.plugin.task, running)
+        self.assertIn("already running", self.plugin.dlg.OutputTextArea.toPlainText())
+
+    def test_finished(self):
+        """Test that the results of a finished task reach the plugin."""
+        task = ValidationTask(_layer(), {"empty"})
+        self.plugin.task = task
+        self.plugin.dlg.ButtonValidate.setEnabled(False)
+        task.run()
+        self.plugin.__validation_finished__(task)
+
+        self.assertIsNone(self.plugin.task)
+        self.assertTrue(self.plugin.dlg.ButtonValidate.isEnabled())
+        self.assertTrue(self.plugin.validated)
+        self.assertIs(self.plugin.results, task.results)
+        self.assertIs(self.plugin.validated_layer, task.layer)
+
+    def test_stale_task_finished(self):
+        """Test that an older task finishing late leaves the running one alone."""
+        old, running = ValidationTask(_layer(), {"empty"}), ValidationTask(_layer(), {"empty"})
+        self.plugin.task = running
+        self.plugin.dlg.ButtonValidate.setEnabled(False)
+        old.cancel()
+        old.run()
+        self.plugin.__validation_finished__(old)
+
+        self.assertIs(self.plugin.task, running)
+        self.assertFalse(self.plugin.dlg.ButtonValidate.isEnabled())
+        self.assertFalse(self.plugin.validated)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(ValidationTaskTest), unittest.makeSuite(ValidateClickTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
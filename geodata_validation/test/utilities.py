@@ -23,7 +23,7 @@ def get_qgis_app():
     """
 
     try:
-        from qgis.PyQt import QtGui, QtCore
+        from qgis.PyQt import QtWidgets, QtCore
         from qgis.core import QgsApplication
         from qgis.gui import QgsMapCanvas
         from .qgis_interface import QgisInterface
@@ -44,7 +44,7 @@ def get_qgis_app():
     global PARENT  # pylint: disable=W0603
     if PARENT is None:
         #noinspection PyPep8Naming
-        PARENT = QtGui.QWidget()
+        PARENT = QtWidgets.QWidget()
 
     global CANVAS  # pylint: disable=W0603
     if CANVAS is None:
@@ -59,3 +59,25 @@ def get_qgis_app():
         IFACE = QgisInterface(CANVAS)
 
     return QGIS_APP, CANVAS, IFACE, PARENT
+
+
+def memory_layer(geometry: str, fields: list, rows: list, crs: str="EPSG:25832"):
+    """Memory layer for tests with fields given as "name:type" and rows as (attributes, wkt).
+
+    A wkt of None gives a feature without geometry, the fids start with 1 in the
+    order of the rows.
+    """
+    from qgis.core import QgsVectorLayer, QgsFeature, QgsGeometry
+
+    uri = "&".join([f"{geometry}?crs={crs}"] + [f"field={field}" for field in fields])
+    layer = QgsVectorLayer(uri, "test", "memory")
+    feats = []
+    for attributes, wkt in rows:
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes(list(attributes))
+        if wkt is not None:
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+        feats.append(feat)
+    layer.dataProvider().addFeatures(feats)
+    layer.updateExtents()
+    return layer
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ValidationTask
+                                 A QGIS plugin
+ Vaildate geodata in repect to geometry, coordinate reference system and data structure
+                              -------------------
+        begin                : 2025-02-16
+        copyright            : (C) 2025 by Jo Ritter
+        email                : tempmail@mail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import QgsTask, QgsVectorLayer, QgsProcessingFeedback
+
+from .funcs import scheduler, export, profiling, incremental
+from .funcs.status import ResultStore
+
+import traceback
+
+
+class ValidationTask(QgsTask):
+    """Runs the validation checks in the background on the QGIS task manager.
+
+    The Infotext logs of the checks are emitted through ``reported`` while they are running, the
+    results are available in ``results``, a ResultStore of this run, once the task has finished.
+    With ``profile_path`` the timings of every step are reported and written there as JSON,
+    ``capture`` runs that check under cProfile.
+    """
+
+    reported = pyqtSignal(object)
+
+    def __init__(self, vectorlayer: QgsVectorLayer, checks: set, profile_path: str|None=None, capture: str|None=None):
+        super().__init__("Validate geodata", QgsTask.CanCancel)
+        self.checks = set(checks)
+        self.profile_path = profile_path
+        self.profiler = profiling.Profiler(capture) if profile_path else None
+        self.results = ResultStore(vectorlayer.source())
+        self.error = None
+        self.feedback = QgsProcessingFeedback()
+        self.feedback.progressChanged.connect(self.setProgress)
+
+        # taken here on the main thread, the task never touches the layer the user may go on editing.
+        # the layer itself is kept for the main thread, to select and zoom to the results
+        self.vectorlayer = scheduler.LayerSnapshot(vectorlayer)
+        self.layer = vectorlayer
+
+    def run(self):
+        try:
+            # the scheduler opens file based layers again for every thread using them, edited and memory layers run serially
+            # a captured check runs alone, cProfile would see the other checks' threads too
+            max_workers = 1 if self.profiler is not None and self.profiler.capture else None
+            results = scheduler.run_checks(self.vectorlayer, self.checks, self.feedback, self.reported.emit,
+                                           max_workers=max_workers, by_check=True, profiler=self.profiler)
+            self.results = ResultStore(self.vectorlayer.source(), results)
+            if self.profiler is not None:
+                self.reported.emit(self.profiler.report())
+                self.profiler.write(self.profile_path)
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+        # a cancelled feedback stops the checks too, their results are incomplete then
+        return not (self.isCanceled() or self.feedback.isCanceled())
+
+    def cancel(self):
+        self.feedback.cancel()
+        super().cancel()
+
+
+class ExportTask(QgsTask):
+    """Writes the results of a validation run to a file in the background."""
+
+    def __init__(self, results: ResultStore, vectorlayer: QgsVectorLayer, path: str, compression: str|None=None):
+        super().__init__("Export validation results", QgsTask.CanCancel)
+        self.results = results
+        self.path = path
+        self.compression = compression
+        self.written = 0
+        self.error = None
+        self.feedback = QgsProcessingFeedback()
+        self.feedback.progressChanged.connect(self.setProgress)
+
+        self.vectorlayer = scheduler.LayerSnapshot(vectorlayer)
+
+    def run(self):
+        try:
+            # flagged features are read again from the source, by fid and chunk by chunk
+            self.written = export.export_results(self.results, scheduler.layer_for_thread(self.vectorlayer), self.path,
+                                                 self.compression, feedback=self.feedback)
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+        return not self.isCanceled()
+
+    def cancel(self):
+        self.feedback.cancel()
+        super().cancel()
+
+
+class LiveCheckTask(QgsTask):
+    """Runs the live checks on the copies of edited features in the background."""
+
+    def __init__(self, checks: list, subsets: list, fids: set):
+        super().__init__("Validate edited features", QgsTask.CanCancel)
+        self.checks = checks
+        self.subsets = subsets
+        self.fids = fids
+        self.found = None
+        self.error = None
+        self.feedback = QgsProcessingFeedback()
+
+    def run(self):
+        try:
+            # the text output of the single checks would flood the output, only the changes are reported
+            self.found = incremental.check_subsets(self.checks, self.subsets, self.fids, self.feedback,
+                                                   report=lambda info: None)
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+        return not self.isCanceled()
+
+    def cancel(self):
+        self.feedback.cancel()
+        super().cancel()